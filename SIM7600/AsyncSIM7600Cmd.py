@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import os
+import queue
+import time
+from typing import AsyncIterator, Dict, Any, Optional, List
+
+import serial
+from serial import SerialException
+
+from CommandMetrics import CommandMetrics, traced
+from CommandTimeouts import CommandTimeouts
+import ResponseParsers
+from ResponseCache import ResponseCache
+from NetworkSnapshot import NetworkSnapshot
+from ResponseReader import ATResponse
+from SIM7600Cmd import SIM7600Cmd, NetworkType, RegistrationError, REGISTRATION_COMMANDS, \
+    NETWORK_SNAPSHOT_COMMANDS, setup_logging
+from URCDispatcher import URCDispatcher, PendingCommand, command_prefixes
+
+
+class AsyncSerialTransport:
+    """
+    Transport série non bloquant pour asyncio.
+
+    Sous POSIX, le descripteur du port est surveillé avec loop.add_reader ; sinon
+    (ports COM sous Windows) un thread de l'exécuteur lit le port et transmet les
+    octets à la boucle d'événements. Les lignes reçues sont routées par un URCDispatcher :
+    les abonnés aux URC sont appelés dans la boucle et ne doivent pas bloquer.
+    """
+
+    def __init__(self, port, baudrate=115200, poll_interval=0.05):
+        self.port = port
+        self.baudrate = baudrate
+        self.poll_interval = poll_interval
+        self.serial_conn = None
+        self.dispatcher = URCDispatcher()
+        self._loop = None
+        self._uses_fd = False
+        self._poll_task = None
+
+    @property
+    def is_open(self):
+        return self.serial_conn is not None and self.serial_conn.is_open
+
+    async def open(self):
+        """Ouvre le port série et commence à surveiller les octets entrants."""
+        self._loop = asyncio.get_running_loop()
+        self.dispatcher.reset()
+        if self.serial_conn is None:
+            self.serial_conn = await self._loop.run_in_executor(None, self._open_serial)
+
+        fileno = getattr(self.serial_conn, "fileno", None)
+        self._uses_fd = os.name == "posix" and fileno is not None
+        if self._uses_fd:
+            self.serial_conn.timeout = 0
+            self._loop.add_reader(fileno(), self._on_readable)
+        else:
+            self._poll_task = self._loop.create_task(self._poll_serial())
+
+    def _open_serial(self):
+        return serial.Serial(port=self.port, baudrate=self.baudrate, timeout=self.poll_interval)
+
+    async def close(self):
+        """Arrête la surveillance du port et le ferme."""
+        if self.serial_conn is None:
+            return
+        if self._uses_fd:
+            self._loop.remove_reader(self.serial_conn.fileno())
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        self.serial_conn.close()
+        self.serial_conn = None
+
+    def _on_readable(self):
+        try:
+            data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+        except SerialException as e:
+            logging.error(f"Erreur de lecture sur le port {self.port}: {e}")
+            self._loop.remove_reader(self.serial_conn.fileno())
+            return
+        self._deliver(data)
+
+    async def _poll_serial(self):
+        while True:
+            data = await self._loop.run_in_executor(None, self._blocking_read)
+            self._deliver(data)
+
+    def _blocking_read(self):
+        return self.serial_conn.read(self.serial_conn.in_waiting or 1)
+
+    def _deliver(self, data):
+        if data:
+            self.dispatcher.feed(data)
+
+    async def transact(self, data: bytes, command, timeout: float, expect_prompt: bool = False) -> ATResponse:
+        """Écrit data et attend la réponse sans bloquer la boucle d'événements."""
+        future = self._loop.create_future()
+
+        def on_complete(pending):
+            if not future.done():
+                future.set_result(pending.result)
+
+        pending = PendingCommand(command, expect_prompt, on_complete=on_complete)
+        self.dispatcher.begin(pending)
+        self.serial_conn.write(data)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return self.dispatcher.abort(pending)
+
+    async def stream(self, data: bytes, command, timeout: float, parser) -> AsyncIterator:
+        """Écrit data et produit les entrées de parser au fil de la réponse (voir URCReaderThread.stream)."""
+        pending = PendingCommand(command, parser=parser)
+        deadline = time.monotonic() + timeout
+        self.dispatcher.begin(pending)
+        self.serial_conn.write(data)
+        try:
+            while True:
+                try:
+                    yield pending.entries.get_nowait()
+                    continue
+                except queue.Empty:
+                    pass
+                if pending.done.is_set() or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+        finally:
+            while not pending.done.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            if not pending.done.is_set():
+                self.dispatcher.abort(pending)
+
+
+class AsyncSIM7600Cmd:
+    """
+    Équivalent asyncio de SIM7600Cmd. Les commandes envoyées par des coroutines
+    concurrentes sont mises en file d'attente (un seul échange AT à la fois sur le port).
+    """
+
+    def __init__(self, port, baudrate=115200, timeout=2):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.transport = AsyncSerialTransport(port, baudrate)
+        self.echo = True
+        self.last_result: Optional[ATResponse] = None
+        self.cache: Optional[ResponseCache] = None
+        self.metrics: Optional[CommandMetrics] = None
+        self.timeouts = CommandTimeouts()
+        self._lock = asyncio.Lock()
+        logging.info(f"Initialisation de SIM7600 (asyncio) sur le port {port}.")
+
+    def set_echo_command(self, b_echo):
+        self.echo = b_echo
+
+    def enable_cache(self, ttls: Optional[Dict[str, float]] = None) -> ResponseCache:
+        """Active le cache des réponses (voir SIM7600Cmd.enable_cache)."""
+        self.cache = ResponseCache(ttls)
+        self.subscribe_urc("RDY", self._on_module_restart)
+        return self.cache
+
+    def disable_cache(self):
+        self.unsubscribe_urc("RDY", self._on_module_restart)
+        self.cache = None
+
+    def enable_metrics(self, metrics: Optional[CommandMetrics] = None) -> CommandMetrics:
+        """Active la mesure des échanges AT (voir SIM7600Cmd.enable_metrics)."""
+        self.metrics = metrics if metrics is not None else CommandMetrics()
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
+
+    def _on_module_restart(self, line):
+        if self.cache is not None:
+            logging.info("Redémarrage du module détecté, cache des réponses vidé.")
+            self.cache.clear()
+
+    async def open(self):
+        """Ouvre la connexion série."""
+        try:
+            if self.cache is not None:
+                self.cache.clear()
+            await self.transport.open()
+            logging.info(f"Connexion établie sur le port {self.port}.")
+        except SerialException:
+            logging.error(f"Erreur lors de l'ouverture du port {self.port}")
+            raise SerialException(f"Erreur d'ouverture du port {self.port}")
+
+    async def close(self):
+        """Ferme la connexion série."""
+        if self.transport.is_open:
+            await self.transport.close()
+            logging.info(f"Connexion fermée sur le port {self.port}.")
+
+    open_connection = open
+    close_connection = close
+
+    def is_open(self):
+        return self.transport.is_open
+
+    def subscribe_urc(self, prefix, callback):
+        """Abonne callback(line) aux codes non sollicités ; appelé dans la boucle d'événements."""
+        self.transport.dispatcher.subscribe(prefix, callback)
+
+    def unsubscribe_urc(self, prefix, callback):
+        self.transport.dispatcher.unsubscribe(prefix, callback)
+
+    async def execute_command(self, command, expect_prompt=False, deadline=None) -> ATResponse:
+        """Envoie une commande AT et retourne la réponse structurée (délai : voir SIM7600Cmd.execute_command)."""
+        if not self.transport.is_open:
+            raise SerialException("Le port série n'est pas ouvert.")
+
+        if self.cache is not None:
+            cached = self.cache.get(command)
+            if cached is not None:
+                self.last_result = cached
+                return cached
+            self.cache.observe(command)
+
+        async with self._lock:
+            result = await self._exchange(command, expect_prompt, deadline=deadline)
+        if self.cache is not None:
+            self.cache.store(command, result)
+        return result
+
+    async def _exchange(self, command, expect_prompt=False, terminator='\r\n', deadline=None) -> ATResponse:
+        """Écrit la commande et lit sa réponse ; l'appelant doit détenir le verrou du port."""
+        timeout = self.timeouts.timeout_for(command, self.timeout, deadline)
+        if self.echo:
+            logging.info(f"Envoi de la commande: {command}")
+        data = (command + terminator).encode('utf-8', errors='ignore')
+        received = self.transport.dispatcher.bytes_received
+        result = await self.transport.transact(data, command, timeout, expect_prompt)
+        self.timeouts.observe(command, result.elapsed, result.timed_out)
+        if self.metrics is not None:
+            self.metrics.record(self.port, command, result, len(data),
+                                self.transport.dispatcher.bytes_received - received)
+        if result.timed_out:
+            logging.warning(f"Aucun code de résultat final reçu après {timeout}s.")
+        self.last_result = result
+        return result
+
+    async def send_command(self, command, show=False, raw=False, expect_prompt=False, deadline=None):
+        """Envoie une commande AT et attend la réponse."""
+        result = await self.execute_command(command, expect_prompt=expect_prompt, deadline=deadline)
+        return self.format_response(result, show=show, raw=raw)
+
+    format_response = staticmethod(SIM7600Cmd.format_response)
+
+    async def execute_batch(self, commands: List[str]) -> Dict[str, Optional[ATResponse]]:
+        """Envoie plusieurs commandes étendues en une seule ligne AT (voir SIM7600Cmd.execute_batch)."""
+        responses: Dict[str, Optional[ATResponse]] = {}
+        pending = []
+        for command in commands:
+            cached = self.cache.get(command) if self.cache is not None else None
+            if cached is not None:
+                responses[command] = cached
+            else:
+                pending.append(command)
+
+        for chunk in SIM7600Cmd._batch_chunks(pending):
+            result = await self.execute_command(SIM7600Cmd.join_batch(chunk))
+            chunk_responses = SIM7600Cmd.split_batch_result(chunk, result)
+            if self.cache is not None:
+                for command, response in chunk_responses.items():
+                    if response is not None:
+                        self.cache.store(command, response)
+            responses.update(chunk_responses)
+        return responses
+
+    async def send_batch(self, commands: List[str]) -> Dict[str, Optional[str]]:
+        """Comme execute_batch, avec la réponse de chaque commande au format de send_command."""
+        return {command: response.joined() if response is not None else None
+                for command, response in (await self.execute_batch(commands)).items()}
+
+    async def check_sim_card(self):
+        """Vérifie si une carte SIM est présente et prête."""
+        response = await self.send_command('AT+CPIN?')
+        if "READY" in response:
+            logging.info("Carte SIM détectée et prête.")
+            return True
+        elif "SIM PIN" in response:
+            logging.warning("La carte SIM demande un code PIN.")
+            return False
+        else:
+            logging.error(f"Erreur lors de la vérification de la carte SIM : {response}")
+            return False
+
+    async def get_signal_quality(self):
+        """Récupère la qualité du signal en dBm et l'interprète."""
+        return SIM7600Cmd.parse_signal_quality(await self.execute_command('AT+CSQ'))
+
+    async def query(self, command: str, prefix: Optional[str] = None):
+        """Envoie une requête et retourne l'enregistrement typé de sa réponse (voir SIM7600Cmd.query)."""
+        prefix = prefix or command_prefixes(command)[0]
+        return ResponseParsers.parse_response(await self.execute_command(command), prefix)
+
+    async def get_operator_info(self):
+        """Récupère des informations sur l'opérateur."""
+        return await self.send_command('AT+COPS?')
+
+    async def get_lte_cell_id(self):
+        """Récupère le Cell ID pour les réseaux LTE."""
+        return await self.send_command('AT+CEREG?')
+
+    async def set_network_mode(self, network_type: NetworkType):
+        if not isinstance(network_type, NetworkType):
+            raise ValueError("Le type de réseau doit être une valeur de l'énumération NetworkType")
+
+        result = await self.execute_command(f'AT+CNMP={network_type.value}')
+        if result.success:
+            logging.info(f"Mode réseau configuré sur {network_type.name}")
+        else:
+            logging.warning(f"Erreur lors de la configuration du mode réseau {network_type.name}")
+
+    async def get_current_network_mode(self):
+        return SIM7600Cmd.parse_network_mode(await self.send_command('AT+CNMP?'))
+
+    async def get_network_type_str(self):
+        return SIM7600Cmd.network_mode_str(await self.get_current_network_mode())
+
+    @traced("check_network_registration")
+    async def check_network_registration(self) -> Dict[str, Any]:
+        """
+        Vérifie l'état d'enregistrement du réseau de manière détaillée.
+
+        Raises:
+            RegistrationError: Si une erreur se produit lors de la vérification de l'enregistrement.
+        """
+        return SIM7600Cmd.registration_from_batch(await self.execute_batch(REGISTRATION_COMMANDS))
+
+    @traced("get_network_snapshot")
+    async def get_network_snapshot(self, with_signal: bool = True) -> NetworkSnapshot:
+        """État du réseau lu dans AT+CPSI? (et AT+CSQ), en un seul aller-retour (voir SIM7600Cmd)."""
+        commands = NETWORK_SNAPSHOT_COMMANDS if with_signal else NETWORK_SNAPSHOT_COMMANDS[:1]
+        result = await self.execute_command(SIM7600Cmd.join_batch(commands))
+        return SIM7600Cmd.snapshot_from_response(result)
+
+    @traced("print_network_status")
+    async def print_network_status(self) -> None:
+        """Affiche un résumé détaillé du statut réseau (un seul aller-retour série)."""
+        try:
+            SIM7600Cmd.log_network_snapshot(await self.get_network_snapshot())
+        except RegistrationError as e:
+            logging.error(f"Erreur lors de la vérification du statut réseau: {e}")
+
+    async def enable_gps(self):
+        """Active le module GPS."""
+        response = await self.send_command("AT+CGPS=1")
+        if "CGPS" in response:
+            logging.info("GPS activé avec succès.")
+        else:
+            logging.error("Erreur lors de l'activation du GPS.")
+
+        await self.close()
+
+    async def reset_module(self):
+        response = await self.send_command("AT+CRESET")
+        if "CRESET" in response:
+            logging.info("Configurations du modem reset avec succès.")
+        else:
+            logging.error("Erreur lors du reset des configurations du modem.")
+
+
+async def main():
+    sim7600 = AsyncSIM7600Cmd("COM17")
+    await sim7600.open()
+    try:
+        # Les trois requêtes partagent le port : elles sont sérialisées par le verrou
+        quality, operator, sim_ready = await asyncio.gather(
+            sim7600.get_signal_quality(),
+            sim7600.get_operator_info(),
+            sim7600.check_sim_card(),
+        )
+        logging.info(f"Signal: {quality}, opérateur: {operator}, SIM prête: {sim_ready}")
+        await sim7600.print_network_status()
+    finally:
+        await sim7600.close()
+
+
+if __name__ == '__main__':
+    setup_logging()
+    asyncio.run(main())
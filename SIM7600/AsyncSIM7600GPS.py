@@ -0,0 +1,27 @@
+import logging
+
+from AsyncSIM7600Cmd import AsyncSIM7600Cmd
+from CommandMetrics import traced
+from SIM7600GPS import SIM7600GPS
+
+
+class AsyncSIM7600GPS(AsyncSIM7600Cmd):
+    def __init__(self, port, baudrate=115200, timeout=2):
+        super().__init__(port, baudrate, timeout)
+        self.fixed = False
+        logging.info("Module GPS (asyncio) en cours de démarrage.")
+
+    @traced("get_gps_data")
+    async def get_gps_data(self):
+        """Récupère les données GPS."""
+        response = await self.send_command("AT+CGPSINFO", raw=True)
+        data = SIM7600GPS.parse_gps_data(response)
+        self.fixed = data is not None
+        return data
+
+    def disable_gps(self):
+        """Désactive le module GPS."""
+        self.fixed = False
+
+    def is_ready(self):
+        return self.fixed
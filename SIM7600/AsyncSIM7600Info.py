@@ -0,0 +1,34 @@
+from AsyncSIM7600Cmd import AsyncSIM7600Cmd
+from CommandMetrics import traced
+from SIM7600Info import SIM7600Info
+
+
+class AsyncSIM7600Info(AsyncSIM7600Cmd):
+    def __init__(self, port, baudrate=115200, timeout=2, use_cache=True):
+        super().__init__(port, baudrate, timeout)
+        if use_cache:
+            self.enable_cache()
+
+    async def get_firmware_version(self):
+        return SIM7600Info.parse_firmware_version(await self.send_command("AT+CGMR"))
+
+    async def get_manufacturer(self):
+        return SIM7600Info.parse_manufacturer(await self.send_command("AT+CGMI"))
+
+    async def get_serial_number(self):
+        return SIM7600Info.parse_serial_number(await self.send_command("AT+CGSN"))
+
+    async def get_module_version(self):
+        return SIM7600Info.parse_module_version(await self.send_command("AT+CGMM"))
+
+    async def get_chip_info(self):
+        return SIM7600Info.parse_chip_info(await self.send_command("AT+CSUB"))
+
+    async def get_full_info(self):
+        return SIM7600Info.parse_full_info(await self.send_command("ATI"))
+
+    @traced("print_all_info")
+    async def print_all_info(self):
+        SIM7600Info.log_all_info(await self.get_firmware_version(), await self.get_manufacturer(),
+                                 await self.get_serial_number(), await self.get_module_version(),
+                                 await self.get_chip_info(), await self.get_full_info())
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+
+from serial.serialutil import SerialException
+
+from AsyncSIM7600Cmd import AsyncSIM7600Cmd
+from CommandMetrics import traced
+from ResponseReader import ResultCode
+from SIM7600SMS import SIM7600SMS
+import ResponseParsers
+import SMSPdu
+from SmsCodec import CHARSET_UCS2, SmsCodec
+from SmsListing import SmsListingParser
+
+
+class AsyncSIM7600SMS(AsyncSIM7600Cmd):
+    def __init__(self, port, baudrate=115200, timeout=2):
+        """Initialise le module SMS (asyncio) sur le port spécifié."""
+        super().__init__(port, baudrate, timeout)
+        self.sms_instances = []
+        self.card_is_ready = False
+        self.codec = SmsCodec()
+        self.read_charset = CHARSET_UCS2
+        self._listing_tasks = set()
+
+    async def check_sim_card(self):
+        """Vérifie si une carte SIM est présente et prête."""
+        self.card_is_ready = await super().check_sim_card()
+        return self.card_is_ready
+
+    async def load_codec(self):
+        """Lit la configuration du mode texte (voir SIM7600SMS.load_codec)."""
+        result = await self.execute_command('AT+CSCS?;+CSMP?')
+        if result.success:
+            self.codec = SmsCodec.from_response(result)
+        else:
+            logging.warning(f"Configuration du mode texte illisible : {result.final_line or 'délai dépassé'}")
+        return self.codec
+
+    async def set_charset(self, charset):
+        """Sélectionne le jeu de caractères de l'interface (AT+CSCS)."""
+        result = await self.execute_command(f'AT+CSCS="{charset}"')
+        if result.success:
+            self.codec = SmsCodec(charset, self.codec.dcs)
+        else:
+            logging.error(f"Jeu de caractères {charset} refusé : {result.final_line or 'délai dépassé'}")
+        return result.success
+
+    @traced("send_sms")
+    async def send_sms(self, phone_number, message):
+        """Envoie un SMS au numéro spécifié avec le message donné."""
+        if not self.card_is_ready:
+            logging.error("Impossible d'envoyer un SMS : aucune carte SIM prête.")
+            return None
+
+        # Le verrou est conservé de AT+CMGF jusqu'au Ctrl-Z : aucune autre commande
+        # ne doit s'intercaler pendant la saisie du message.
+        async with self._lock:
+            await self._exchange('AT+CMGF=1')
+            result = await self._exchange(f'AT+CMGS="{self.codec.encode_address(phone_number)}"',
+                                          expect_prompt=True)
+            if result.result_code is not ResultCode.PROMPT:
+                logging.error(f"Invite de saisie SMS non reçue : {result.final_line or 'délai dépassé'}")
+                return self.format_response(result)
+
+            result = await self._exchange(self.codec.encode(message) + chr(26), terminator='',
+                                          deadline=self.timeouts.deadline_for('AT+CMGS=', self.timeout))
+        return self.format_response(result)
+
+    @traced("send_sms_pdu")
+    async def send_sms_pdu(self, phone_number, message, encoding=None, status_report=False):
+        """Envoie un SMS en mode PDU, découpé si nécessaire ; retourne les références (mr) des parties."""
+        if not self.card_is_ready:
+            logging.error("Impossible d'envoyer un SMS : aucune carte SIM prête.")
+            return None
+
+        parts = SMSPdu.encode_submit(phone_number, message, encoding=encoding, status_report=status_report)
+        references = []
+        async with self._lock:
+            await self._exchange('AT+CMGF=0')
+            for part in parts:
+                result = await self._exchange(f'AT+CMGS={part.length}', expect_prompt=True)
+                if result.result_code is not ResultCode.PROMPT:
+                    logging.error(f"Invite de saisie SMS non reçue : {result.final_line or 'délai dépassé'}")
+                    break
+                result = await self._exchange(part.pdu + chr(26), terminator='',
+                                              deadline=self.timeouts.deadline_for('AT+CMGS=', self.timeout))
+                submitted = ResponseParsers.parse_response(result, '+CMGS')
+                if not result.success or submitted is None:
+                    logging.error(f"Échec de l'envoi de la partie {len(references) + 1}/{len(parts)} : "
+                                  f"{result.final_line or 'délai dépassé'}")
+                    break
+                references.append(submitted.mr)
+        return references
+
+    @traced("read_sms_pdu")
+    async def read_sms_pdu(self, status=4, delete_action=False):
+        """Lit les SMS en mode PDU et réassemble les messages concaténés (voir SIM7600SMS.read_sms_pdu)."""
+        if not self.card_is_ready:
+            logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
+            return None
+
+        async with self._lock:
+            if not (await self._exchange('AT+CMGF=0')).success:
+                logging.error("Erreur lors de la configuration du mode SMS.")
+                return None
+            result = await self._exchange(f'AT+CMGL={status}')
+        messages = SIM7600SMS.parse_pdu_listing(result.lines)
+
+        if delete_action:
+            # Les parties d'un message incomplet restent en mémoire jusqu'à l'arrivée des autres
+            for message in messages:
+                if not message.complete:
+                    continue
+                for index in message.indices:
+                    await self.delete_sms(index)
+        return messages
+
+    async def command_read_sms(self):
+        if not self.is_open():
+            raise SerialException("Le port série n'est pas ouvert.")
+        return await self.send_command('AT+CMGL="ALL"')
+
+    @traced("read_sms")
+    async def read_sms(self, delete_action=False):
+        if not self.card_is_ready:
+            logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
+            return None
+
+        codec = self._read_codec()
+        entries = [entry async for entry in self._listing_entries("ALL", codec)]
+        contents = codec.decode_many(entry.body for entry in entries)
+        self.sms_instances = [SIM7600SMS.sms_from_entry(entry, codec, content)
+                              for entry, content in zip(entries, contents)]
+
+        if delete_action:
+            for instance in self.sms_instances:
+                await self.delete_sms(instance['index'])
+
+        return self.sms_instances
+
+    async def stream_sms(self, status="ALL"):
+        """
+        Produit chaque SMS en mode texte dès que son corps est reçu (voir SIM7600SMS.stream_sms).
+        La liste est lue par une tâche distincte qui libère le port dès le code final, même
+        si l'itération est interrompue (break) : le verrou n'est pas détenu entre deux SMS produits.
+        """
+        if not self.card_is_ready:
+            logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
+            return
+
+        codec = self._read_codec()
+        entries = asyncio.Queue()
+
+        async def drain():
+            try:
+                async for entry in self._listing_entries(status, codec):
+                    entries.put_nowait(entry)
+            except Exception as e:
+                entries.put_nowait(e)
+            finally:
+                entries.put_nowait(None)
+
+        # Référence forte : la boucle ne garde qu'une référence faible vers ses tâches
+        task = asyncio.get_running_loop().create_task(drain())
+        self._listing_tasks.add(task)
+        task.add_done_callback(self._listing_tasks.discard)
+        while True:
+            entry = await entries.get()
+            if entry is None:
+                return
+            if isinstance(entry, Exception):
+                raise entry
+            yield SIM7600SMS.sms_from_entry(entry, codec)
+
+    def _read_codec(self):
+        return SmsCodec(self.read_charset, self.codec.dcs) if self.read_charset else self.codec
+
+    async def _listing_entries(self, status, codec):
+        switch = codec.charset != self.codec.charset
+        async with self._lock:
+            setup = 'AT+CMGF=1;+CSDH=1' + (f';+CSCS="{codec.charset}"' if switch else '')
+            if not (await self._exchange(setup)).success:
+                logging.error("Erreur lors de la configuration du mode SMS.")
+                return
+            command = f'AT+CMGL="{status}"'
+            if self.echo:
+                logging.info(f"Envoi de la commande: {command}")
+            parser = SmsListingParser()
+            started = time.monotonic()
+            try:
+                async for entry in self.transport.stream((command + '\r\n').encode('utf-8', errors='ignore'),
+                                                         command, self.timeouts.timeout_for(command, self.timeout),
+                                                         parser):
+                    yield entry
+                if not parser.done:
+                    entry = parser.close()
+                    if entry is not None:
+                        yield entry
+            finally:
+                timed_out = parser.result_code is None
+                if timed_out:
+                    logging.warning(f"Liste des SMS incomplète : aucun code final reçu pour {command}.")
+                self.timeouts.observe(command, time.monotonic() - started, timed_out)
+                await self._exchange('AT+CSDH=0' + (f';+CSCS="{self.codec.charset}"' if switch else ''))
+
+    def get_sms(self):
+        return self.sms_instances
+
+    async def delete_sms(self, index):
+        """Supprime le SMS à l'index spécifié."""
+        response = await self.send_command(f'AT+CMGD={index}')
+        logging.info(f"Supprimé SMS à l'index {index}. Réponse : {response}")
@@ -0,0 +1,275 @@
+import logging
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import ResponseParsers
+import SMSPdu
+from ResponseReader import ATResponse, ResultCode
+
+
+class ErrorClass(Enum):
+    """Conduite à tenir après l'échec d'un envoi."""
+    TRANSIENT = "transient"   # nouvel essai après une pause
+    MODE = "mode"             # mode SMS modifié entre-temps : reconfigurer puis réessayer
+    PERMANENT = "permanent"   # destinataire ou message refusé : passer au suivant
+    FATAL = "fatal"           # SIM ou centre SMS indisponible : arrêter la campagne
+
+
+# Codes +CMS ERROR (3GPP TS 27.005 §3.2.5 et TS 24.011 annexe E) -> classe d'erreur
+CMS_ERROR_CLASSES = {
+    # Causes réseau temporaires
+    27: ErrorClass.TRANSIENT,    # destination hors service
+    38: ErrorClass.TRANSIENT,    # réseau hors service
+    41: ErrorClass.TRANSIENT,    # échec temporaire
+    42: ErrorClass.TRANSIENT,    # congestion
+    47: ErrorClass.TRANSIENT,    # ressources indisponibles
+    98: ErrorClass.TRANSIENT,
+    111: ErrorClass.TRANSIENT,   # erreur de protocole
+    127: ErrorClass.TRANSIENT,
+    331: ErrorClass.TRANSIENT,   # pas de service réseau
+    332: ErrorClass.TRANSIENT,   # délai réseau dépassé
+    500: ErrorClass.TRANSIENT,   # erreur inconnue
+    # Paramètres du mode texte ou PDU refusés
+    302: ErrorClass.MODE,
+    303: ErrorClass.MODE,
+    304: ErrorClass.MODE,
+    305: ErrorClass.MODE,
+    # SIM, mémoire ou centre SMS
+    310: ErrorClass.FATAL,
+    311: ErrorClass.FATAL,
+    312: ErrorClass.FATAL,
+    313: ErrorClass.FATAL,
+    316: ErrorClass.FATAL,
+    317: ErrorClass.FATAL,
+    318: ErrorClass.FATAL,
+    330: ErrorClass.FATAL,       # adresse du centre SMS inconnue
+}
+
+
+def classify_error(result: ATResponse) -> ErrorClass:
+    """Classe l'échec d'un échange CMGS ; un code inconnu est considéré permanent, un délai dépassé temporaire."""
+    if result.timed_out:
+        return ErrorClass.TRANSIENT
+    if result.result_code is ResultCode.CMS_ERROR and result.error_code is not None:
+        return CMS_ERROR_CLASSES.get(result.error_code, ErrorClass.PERMANENT)
+    if result.result_code is ResultCode.ERROR:
+        # ERROR sans code : le plus souvent une commande refusée dans le mode courant
+        return ErrorClass.MODE
+    return ErrorClass.PERMANENT
+
+
+class SendResult(NamedTuple):
+    """Résultat de l'envoi à un destinataire : références (mr) de chaque partie, ou erreur."""
+    recipient: str
+    references: Tuple[int, ...]
+    attempts: int              # nombre total d'échanges AT+CMGS, toutes parties confondues
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def retries(self) -> int:
+        return self.attempts - len(self.references) - (0 if self.ok else 1)
+
+
+class BulkReport:
+    """Bilan d'une campagne d'envoi."""
+
+    def __init__(self):
+        self.results: List[SendResult] = []
+        self.sent = 0
+        self.failed = 0
+        self.parts = 0
+        self.retries = 0
+        self.aborted: Optional[str] = None
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.finished if self.finished is not None else time.monotonic()) - self.started
+
+    @property
+    def messages_per_minute(self) -> float:
+        return self.sent * 60.0 / self.duration if self.duration > 0 else 0.0
+
+    def add(self, result: SendResult, keep: bool = True):
+        if keep:
+            self.results.append(result)
+        if result.ok:
+            self.sent += 1
+            self.parts += len(result.references)
+        else:
+            self.failed += 1
+        self.retries += result.retries
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'parts': self.parts,
+            'retries': self.retries,
+            'aborted': self.aborted,
+            'duration_s': self.duration,
+            'messages_per_minute': self.messages_per_minute,
+        }
+
+
+Recipient = Union[str, Tuple[str, Union[str, bytes]]]
+ResultCallback = Callable[[SendResult], None]
+
+
+class _Aborted(Exception):
+    def __init__(self, reason: str, result: SendResult):
+        super().__init__(reason)
+        self.result = result
+
+
+class BulkSmsSender:
+    """
+    Envoi de SMS en nombre sur un SIM7600SMS. Le mode SMS (AT+CMGF) n'est configuré qu'une
+    fois, et AT+CMMS=2 garde la liaison radio ouverte entre deux messages. Les destinataires
+    sont lus au fil de l'itérateur (mémoire bornée) ; chaque échec +CMS ERROR est classé :
+    nouvel essai, reconfiguration du mode, destinataire suivant ou arrêt de la campagne.
+
+    Le verrou du modem n'est tenu que pendant un envoi : les autres commandes peuvent
+    s'intercaler entre deux messages, et pendant les pauses de cadence.
+    """
+
+    def __init__(self, modem, pdu: bool = True, min_interval: float = 0.0, max_attempts: int = 3,
+                 retry_delay: float = 1.0, status_report: bool = False, keep_results: bool = True):
+        """
+        Args:
+            modem: Instance SIM7600SMS ouverte.
+            pdu: Mode PDU (messages longs et UCS2) ; sinon mode texte, comme send_sms.
+            min_interval: Intervalle minimal entre deux débuts d'envoi (secondes).
+            max_attempts: Nombre maximal d'essais par destinataire.
+            retry_delay: Pause avant le premier nouvel essai, doublée à chaque essai.
+            status_report: Demande un rapport de remise (mode PDU).
+            keep_results: Conserve le résultat de chaque envoi dans le bilan.
+        """
+        self.modem = modem
+        self.pdu = pdu
+        self.min_interval = min_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.status_report = status_report
+        self.keep_results = keep_results
+        self._last_submit = 0.0
+
+    def configure(self) -> bool:
+        """Sélectionne le mode SMS et garde la liaison ouverte entre les messages (AT+CMMS=2)."""
+        with self.modem.lock:
+            result = self.modem.execute_command(f'AT+CMGF={0 if self.pdu else 1};+CMMS=2')
+            if not result.success:
+                # AT+CMMS n'est pas indispensable : le mode seul suffit
+                result = self.modem.execute_command(f'AT+CMGF={0 if self.pdu else 1}')
+        if not result.success:
+            logging.error(f"Configuration du mode SMS impossible : {result.final_line or 'délai dépassé'}")
+        return result.success
+
+    def send(self, recipients: Iterable[Recipient], message: Union[str, bytes, None] = None,
+             on_result: Optional[ResultCallback] = None) -> BulkReport:
+        """
+        Envoie message à chaque destinataire, ou (numéro, message) pour un texte propre à chacun.
+        on_result(SendResult) est appelé après chaque destinataire.
+        """
+        report = BulkReport()
+        if not self.configure():
+            report.aborted = "configuration du mode SMS"
+            report.finished = time.monotonic()
+            return report
+        try:
+            for recipient in recipients:
+                number, text = (recipient, message) if isinstance(recipient, str) else recipient
+                if text is None:
+                    raise ValueError(f"Aucun message pour {number}")
+                result = self._send_one(number, text)
+                report.add(result, keep=self.keep_results)
+                if on_result is not None:
+                    on_result(result)
+        except _Aborted as e:
+            report.add(e.result, keep=self.keep_results)
+            if on_result is not None:
+                on_result(e.result)
+            report.aborted = str(e)
+            logging.error(f"Campagne SMS interrompue : {e}")
+        finally:
+            self._close_link()
+            report.finished = time.monotonic()
+        logging.info(f"Campagne SMS : {report.sent} envoyés, {report.failed} en échec, "
+                     f"{report.messages_per_minute:.1f} messages/min.")
+        return report
+
+    def _send_one(self, number: str, text: Union[str, bytes]) -> SendResult:
+        started = time.monotonic()
+        try:
+            parts = self._encode(number, text)
+        except ValueError as e:
+            return SendResult(number, (), 1, str(e), 0.0)
+        references: List[int] = []
+        attempts = 0
+        part_attempts = 0
+        error = None
+        while len(references) < len(parts):
+            attempts += 1
+            part_attempts += 1
+            self._pace()
+            result = self._submit(number, parts[len(references)])
+            submitted = ResponseParsers.parse_response(result, '+CMGS') if result.success else None
+            if submitted is not None:
+                references.append(submitted.mr)
+                part_attempts = 0
+                continue
+            error = result.final_line or "délai dépassé"
+            error_class = classify_error(result)
+            if error_class is ErrorClass.FATAL:
+                failed = SendResult(number, tuple(references), attempts, error, time.monotonic() - started)
+                raise _Aborted(f"{error} (destinataire {number})", failed)
+            if error_class is ErrorClass.PERMANENT or part_attempts >= self.max_attempts:
+                logging.warning(f"SMS vers {number} abandonné : {error}")
+                break
+            if error_class is ErrorClass.MODE:
+                self.configure()
+            else:
+                time.sleep(self.retry_delay * 2 ** (part_attempts - 1))
+        if len(references) == len(parts):
+            error = None
+            self.modem.archive_sent(number, text, references)
+        return SendResult(number, tuple(references), attempts, error, time.monotonic() - started)
+
+    def _encode(self, number: str, text: Union[str, bytes]) -> List[Union[SMSPdu.SubmitPdu, str]]:
+        if self.pdu:
+            return SMSPdu.encode_submit(number, text, status_report=self.status_report)
+        # Mode texte : saisie dans le jeu de caractères de l'interface (AT+CSCS)
+        return [self.modem.codec.encode(text)]
+
+    def _submit(self, number: str, part: Union[SMSPdu.SubmitPdu, str]) -> ATResponse:
+        """Envoie une partie : commande AT+CMGS, invite, puis corps terminé par Ctrl-Z."""
+        modem = self.modem
+        if self.pdu:
+            command, body = f'AT+CMGS={part.length}', part.pdu
+        else:
+            command, body = f'AT+CMGS="{modem.codec.encode_address(number)}"', part
+        with modem.lock:
+            self._last_submit = time.monotonic()
+            result = modem.execute_command(command, expect_prompt=True)
+            if result.result_code is not ResultCode.PROMPT:
+                return result
+            return modem.execute_command(body + chr(26), terminator='',
+                                         deadline=modem.timeouts.deadline_for('AT+CMGS=', modem.timeout))
+
+    def _pace(self):
+        wait = self._last_submit + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _close_link(self):
+        try:
+            self.modem.execute_command('AT+CMMS=0')
+        except Exception as e:
+            logging.debug(f"AT+CMMS=0 non envoyée : {e}")
@@ -0,0 +1,377 @@
+import contextvars
+import functools
+import logging
+import math
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ResponseReader import ATResponse
+
+# Bornes (en secondes) des histogrammes de latence
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+_VERB_RE = re.compile(r'([+$^][A-Z0-9]+|&[A-Z]|[A-Z])(=\?|\?|=)?')
+
+# Drapeau des fonctions 'async def' (inspect.CO_COROUTINE), sans importer asyncio ni inspect
+_CO_COROUTINE = 0x80
+
+# Opération de haut niveau en cours dans le contexte (thread ou tâche asyncio)
+_current_span: contextvars.ContextVar = contextvars.ContextVar('sim7600_span', default=None)
+
+
+def command_verb(command: str) -> str:
+    """
+    Retourne le libellé d'une commande sans ses paramètres, utilisé comme étiquette
+    des mesures : 'AT+CMGS="+336..."' -> 'AT+CMGS=', 'AT+CSQ;+COPS?' -> 'AT+CSQ;+COPS?',
+    'ATD0612345678;' -> 'ATD'. Les données sans préfixe AT (texte d'un SMS) valent 'DATA'.
+    """
+    upper = command.strip().upper()
+    if not upper.startswith("AT"):
+        return "DATA"
+    verbs = []
+    for part in upper[2:].split(";"):
+        match = _VERB_RE.match(part)
+        if match:
+            verbs.append(match.group(1) + (match.group(2) or ""))
+    return "AT" + ";".join(verbs)
+
+
+class CommandSample:
+    """Mesure d'un échange AT."""
+
+    def __init__(self, port, command: str, result: ATResponse, bytes_sent: int, bytes_received: int):
+        self.port = port
+        self.command = command
+        self.verb = command_verb(command)
+        self.elapsed = result.elapsed
+        self.result_code = result.result_code
+        self.timed_out = result.timed_out
+        self.error = not result.success and not result.timed_out
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+
+    def __repr__(self):
+        return f"CommandSample({self.verb}, {self.result_code.name}, {self.elapsed * 1000:.1f}ms)"
+
+
+class Span:
+    """Opération de haut niveau (send_sms, check_network_registration...) et ses commandes."""
+
+    def __init__(self, name: str, port=None, parent: Optional['Span'] = None):
+        self.name = name
+        self.port = port
+        self.parent = parent
+        self.children: List[object] = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self.error: Optional[BaseException] = None
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+
+    def command_time(self) -> float:
+        """Temps passé dans les échanges AT (y compris dans les sous-opérations)."""
+        return sum(child.command_time() if isinstance(child, Span) else child.elapsed for child in self.children)
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'port': self.port,
+            'elapsed': self.elapsed,
+            'error': repr(self.error) if self.error else None,
+            'children': [child.as_dict() if isinstance(child, Span) else
+                         {'command': child.verb, 'elapsed': child.elapsed, 'result': child.result_code.name}
+                         for child in self.children],
+        }
+
+    def __repr__(self):
+        return f"Span({self.name}, {self.elapsed * 1000:.1f}ms, {len(self.children)} enfants)"
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes, au format Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimation d'un quantile (borne supérieure du seau qui le contient)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, cumulative in zip(self.buckets, self.cumulative()):
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class CommandStats:
+    """Compteurs d'une commande (verbe) sur un port."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.latency = Histogram(buckets)
+        self.timeouts = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.latency.count,
+            'total_seconds': self.latency.sum,
+            'mean_seconds': self.latency.sum / self.latency.count if self.latency.count else 0.0,
+            'p50_seconds': self.latency.quantile(0.5),
+            'p99_seconds': self.latency.quantile(0.99),
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+        }
+
+
+class CommandMetrics:
+    """
+    Mesures des échanges AT par port et par verbe : histogramme de latence, nombre
+    d'expirations et d'erreurs, octets émis et reçus. Les mesures sont consultables par
+    snapshot(), exposées au format texte Prometheus (prometheus_text, serve_prometheus)
+    et transmises aux fonctions enregistrées avec add_sink().
+
+    Une instance peut être partagée par plusieurs modems : le port fait partie des étiquettes.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._commands: Dict[tuple, CommandStats] = {}
+        self._operations: Dict[tuple, Histogram] = {}
+        self._sinks: List[Callable[[object], None]] = []
+        self._lock = threading.Lock()
+
+    def add_sink(self, callback: Callable[[object], None]):
+        """Abonne callback à chaque CommandSample et à chaque Span terminé."""
+        self._sinks.append(callback)
+
+    def remove_sink(self, callback: Callable[[object], None]):
+        if callback in self._sinks:
+            self._sinks.remove(callback)
+
+    def _emit(self, event):
+        for callback in list(self._sinks):
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"Erreur dans le puits de mesures: {e}")
+
+    def record(self, port, command: str, result: ATResponse, bytes_sent: int = 0, bytes_received: int = 0):
+        """Enregistre un échange AT terminé."""
+        sample = CommandSample(port, command, result, bytes_sent, bytes_received)
+        with self._lock:
+            stats = self._commands.get((port, sample.verb))
+            if stats is None:
+                stats = self._commands[(port, sample.verb)] = CommandStats(self.buckets)
+            stats.latency.observe(sample.elapsed)
+            stats.timeouts += sample.timed_out
+            stats.errors += sample.error
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+
+        span = _current_span.get()
+        if span is not None:
+            span.children.append(sample)
+        self._emit(sample)
+        return sample
+
+    def start_span(self, name: str, port=None) -> tuple:
+        span = Span(name, port, _current_span.get())
+        return span, _current_span.set(span)
+
+    def end_span(self, span: Span, token):
+        span.finish()
+        _current_span.reset(token)
+        if span.parent is not None:
+            span.parent.children.append(span)
+        with self._lock:
+            histogram = self._operations.get((span.port, span.name))
+            if histogram is None:
+                histogram = self._operations[(span.port, span.name)] = Histogram(self.buckets)
+            histogram.observe(span.elapsed)
+        self._emit(span)
+
+    def span(self, name: str, port=None):
+        """Gestionnaire de contexte mesurant une opération de haut niveau et ses commandes."""
+        return _SpanContext(self, name, port)
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+            self._operations.clear()
+
+    def snapshot(self) -> dict:
+        """Copie des compteurs : {'commands': {port: {verbe: {...}}}, 'operations': {port: {nom: {...}}}}."""
+        with self._lock:
+            commands, operations = {}, {}
+            for (port, verb), stats in self._commands.items():
+                commands.setdefault(port, {})[verb] = stats.as_dict()
+            for (port, name), histogram in self._operations.items():
+                operations.setdefault(port, {})[name] = {
+                    'count': histogram.count,
+                    'total_seconds': histogram.sum,
+                    'p50_seconds': histogram.quantile(0.5),
+                    'p99_seconds': histogram.quantile(0.99),
+                }
+        return {'commands': commands, 'operations': operations}
+
+    def prometheus_text(self) -> str:
+        """Rend les mesures au format d'exposition texte de Prometheus."""
+        lines = []
+        with self._lock:
+            commands = sorted(self._commands.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+            operations = sorted(self._operations.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+
+            lines.append("# HELP sim7600_command_duration_seconds Durée des échanges AT.")
+            lines.append("# TYPE sim7600_command_duration_seconds histogram")
+            for (port, verb), stats in commands:
+                self._histogram_lines(lines, "sim7600_command_duration_seconds",
+                                      f'port="{_escape(port)}",verb="{_escape(verb)}"', stats.latency)
+
+            for name, attribute, help_text in (
+                    ("sim7600_command_timeouts_total", "timeouts", "Commandes sans code final avant le délai."),
+                    ("sim7600_command_errors_total", "errors", "Commandes terminées par un code d'erreur."),
+                    ("sim7600_command_bytes_sent_total", "bytes_sent", "Octets écrits sur le port."),
+                    ("sim7600_command_bytes_received_total", "bytes_received", "Octets lus sur le port.")):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (port, verb), stats in commands:
+                    lines.append(f'{name}{{port="{_escape(port)}",verb="{_escape(verb)}"}} '
+                                 f'{getattr(stats, attribute)}')
+
+            lines.append("# HELP sim7600_operation_duration_seconds Durée des opérations de haut niveau.")
+            lines.append("# TYPE sim7600_operation_duration_seconds histogram")
+            for (port, name), histogram in operations:
+                self._histogram_lines(lines, "sim7600_operation_duration_seconds",
+                                      f'port="{_escape(port)}",operation="{_escape(name)}"', histogram)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(lines, name, labels, histogram: Histogram):
+        for bound, cumulative in zip(histogram.buckets, histogram.cumulative()):
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+    def serve_prometheus(self, port=9600, host='127.0.0.1') -> 'PrometheusExporter':
+        """Démarre un serveur HTTP local exposant prometheus_text() sur /metrics."""
+        exporter = PrometheusExporter(self, port, host)
+        exporter.start()
+        return exporter
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _SpanContext:
+    def __init__(self, metrics: CommandMetrics, name: str, port):
+        self.metrics = metrics
+        self.name = name
+        self.port = port
+        self.span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self.span, self._token = self.metrics.start_span(self.name, self.port)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.error = exc
+        self.metrics.end_span(self.span, self._token)
+        return False
+
+
+def traced(name: str):
+    """
+    Décorateur de méthode de modem : mesure l'appel comme une opération nommée si des
+    mesures sont activées (attribut metrics), avec le détail des commandes envoyées.
+    Fonctionne avec les méthodes synchrones et les coroutines.
+    """
+    def decorator(method):
+        if method.__code__.co_flags & _CO_COROUTINE:
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if self.metrics is None:
+                    return await method(self, *args, **kwargs)
+                with self.metrics.span(name, self.port):
+                    return await method(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return method(self, *args, **kwargs)
+            with self.metrics.span(name, self.port):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class PrometheusExporter:
+    """Serveur HTTP local (thread démon) exposant les mesures au format Prometheus."""
+
+    def __init__(self, metrics: CommandMetrics, port=9600, host='127.0.0.1'):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Prometheus: {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="PrometheusExporter", daemon=True)
+        self._thread.start()
+        logging.info(f"Mesures Prometheus exposées sur http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
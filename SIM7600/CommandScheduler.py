@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from CommandMetrics import command_verb
+from ResponseReader import ATResponse
+
+
+class Priority(IntEnum):
+    """Classes de priorité, de la plus urgente à la moins urgente."""
+    CALL = 0
+    SMS = 1
+    TELEMETRY = 2
+    INVENTORY = 3
+
+
+# Famille de commandes (clé de command_verb, éventuellement sans suffixe) -> priorité
+COMMAND_PRIORITIES = {
+    # Contrôle d'appel
+    'ATA': Priority.CALL,
+    'ATD': Priority.CALL,
+    'ATH': Priority.CALL,
+    'AT+CHUP': Priority.CALL,
+    'AT+CLCC': Priority.CALL,
+    'AT+VTS': Priority.CALL,
+    # SMS
+    'AT+CMGS': Priority.SMS,
+    'AT+CMGW': Priority.SMS,
+    'AT+CMSS': Priority.SMS,
+    'AT+CMGR': Priority.SMS,
+    'AT+CMGL': Priority.SMS,
+    'AT+CMGD': Priority.SMS,
+    'AT+CMGF': Priority.SMS,
+    'AT+CNMI': Priority.SMS,
+    'AT+CSMP': Priority.SMS,
+    'AT+CSCS': Priority.SMS,
+    'AT+CPMS': Priority.SMS,
+    'AT+CMMS': Priority.SMS,
+    # Inventaire : identité du module et recherche d'opérateurs
+    'AT+COPS=?': Priority.INVENTORY,
+    'ATI': Priority.INVENTORY,
+    'AT+CGMR': Priority.INVENTORY,
+    'AT+CGMI': Priority.INVENTORY,
+    'AT+CGMM': Priority.INVENTORY,
+    'AT+CGSN': Priority.INVENTORY,
+    'AT+CSUB': Priority.INVENTORY,
+    'AT+SIMCOMATI': Priority.INVENTORY,
+    'AT+CIMI': Priority.INVENTORY,
+    'AT+CICCID': Priority.INVENTORY,
+}
+
+
+def classify(command: str) -> Priority:
+    """Priorité d'une commande ; une ligne concaténée prend celle de sa commande la plus urgente."""
+    verb = command_verb(command)
+    if verb == 'DATA':
+        return Priority.TELEMETRY
+    priority = Priority.INVENTORY
+    for part in verb[2:].split(';'):
+        family = "AT" + part
+        found = COMMAND_PRIORITIES.get(family)
+        if found is None:
+            found = COMMAND_PRIORITIES.get(family.rstrip('=?'), Priority.TELEMETRY)
+        priority = min(priority, found)
+    return priority
+
+
+class _Job:
+    __slots__ = ('future', 'task', 'args', 'kwargs', 'priority', 'client', 'submitted')
+
+    def __init__(self, task, args, kwargs, priority, client):
+        self.future = Future()
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.client = client
+        self.submitted = time.monotonic()
+
+
+class PriorityStats:
+    """Profondeur de file et temps d'attente d'une classe de priorité."""
+
+    __slots__ = ('depth', 'max_depth', 'executed', 'cancelled', 'failed', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.depth = 0
+        self.max_depth = 0
+        self.executed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'executed': self.executed,
+            'cancelled': self.cancelled,
+            'failed': self.failed,
+            'wait_mean_s': self.wait_total / self.executed if self.executed else 0.0,
+            'wait_max_s': self.wait_max,
+        }
+
+
+class CommandScheduler:
+    """
+    Ordonnanceur placé devant le port AT d'un modem : un thread unique exécute les
+    travaux soumis par plusieurs clients, toujours en commençant par la classe la plus
+    urgente (appel > SMS > télémesure > inventaire). Au sein d'une classe, les clients
+    sont servis à tour de rôle ; un travail qui attend plus de starvation_limit secondes
+    passe devant les classes plus urgentes. Une commande en cours n'est pas interrompue :
+    l'ordonnancement porte sur les travaux en file, qui peuvent être annulés.
+    """
+
+    def __init__(self, modem, starvation_limit: float = 30.0):
+        self.modem = modem
+        self.starvation_limit = starvation_limit
+        self._queues: Dict[Priority, 'OrderedDict[Hashable, Deque[_Job]]'] = {
+            priority: OrderedDict() for priority in Priority}
+        self._stats = {priority: PriorityStats() for priority in Priority}
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"CommandScheduler-{self.modem.port}", daemon=True)
+        self._thread.start()
+
+    def stop(self, cancel_pending: bool = True):
+        """Arrête le thread après le travail en cours ; les travaux en file sont annulés (ou exécutés)."""
+        if cancel_pending:
+            self.cancel()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def submit(self, task: Callable[..., Any], *args, priority: Priority = Priority.TELEMETRY,
+               client: Hashable = None, **kwargs) -> Future:
+        """
+        Ajoute task(modem, *args, **kwargs) à la file de sa priorité. La tâche s'exécute
+        avec le verrou du modem : une séquence de commandes (invite CMGS + texte) n'est
+        pas interrompue.
+        """
+        job = _Job(task, args, kwargs, Priority(priority), client)
+        with self._condition:
+            self._queues[job.priority].setdefault(client, deque()).append(job)
+            stats = self._stats[job.priority]
+            stats.depth += 1
+            stats.max_depth = max(stats.max_depth, stats.depth)
+            self._condition.notify()
+        self.start()
+        return job.future
+
+    def submit_command(self, command: str, priority: Optional[Priority] = None, client: Hashable = None,
+                       expect_prompt: bool = False, deadline: Optional[float] = None) -> Future:
+        """Planifie une commande AT ; le Future donne son ATResponse. Priorité déduite de la commande par défaut."""
+        return self.submit(_execute, command, expect_prompt, deadline,
+                           priority=classify(command) if priority is None else priority, client=client)
+
+    def execute_command(self, command: str, priority: Optional[Priority] = None, client: Hashable = None,
+                        expect_prompt: bool = False, deadline: Optional[float] = None,
+                        timeout: Optional[float] = None) -> ATResponse:
+        """Équivalent planifié de SIM7600Cmd.execute_command (bloque jusqu'à la réponse)."""
+        return self.submit_command(command, priority, client, expect_prompt, deadline).result(timeout)
+
+    def send_command(self, command: str, show=False, raw=False, priority: Optional[Priority] = None,
+                     client: Hashable = None, expect_prompt: bool = False, deadline: Optional[float] = None):
+        """Équivalent planifié de SIM7600Cmd.send_command."""
+        result = self.execute_command(command, priority, client, expect_prompt, deadline)
+        return self.modem.format_response(result, show=show, raw=raw)
+
+    def cancel(self, client: Hashable = None, priority: Optional[Priority] = None) -> int:
+        """
+        Annule les travaux en file (tous, ceux d'un client et/ou d'une priorité).
+        Le travail en cours d'exécution n'est pas concerné. Retourne le nombre annulé.
+        """
+        cancelled = 0
+        with self._condition:
+            for level in ([Priority(priority)] if priority is not None else list(Priority)):
+                queues = self._queues[level]
+                for owner in list(queues):
+                    if client is not None and owner != client:
+                        continue
+                    for job in queues.pop(owner):
+                        if job.future.cancel():
+                            cancelled += 1
+                        self._stats[level].depth -= 1
+                        self._stats[level].cancelled += 1
+        return cancelled
+
+    def depth(self, priority: Optional[Priority] = None) -> int:
+        """Nombre de travaux en file (pour une priorité ou au total)."""
+        with self._condition:
+            if priority is not None:
+                return self._stats[Priority(priority)].depth
+            return sum(stats.depth for stats in self._stats.values())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._condition:
+            return {priority.name: stats.as_dict() for priority, stats in self._stats.items()}
+
+    def _pop_next(self) -> Optional[_Job]:
+        """Choisit le prochain travail ; l'appelant détient la condition."""
+        chosen = None
+        now = time.monotonic()
+        for priority in Priority:
+            queues = self._queues[priority]
+            if not queues:
+                continue
+            if chosen is None:
+                chosen = priority
+            elif now - next(iter(queues.values()))[0].submitted > self.starvation_limit:
+                # Travail affamé : il passe devant la classe plus urgente
+                chosen = priority
+                break
+        if chosen is None:
+            return None
+        queues = self._queues[chosen]
+        client, jobs = next(iter(queues.items()))
+        job = jobs.popleft()
+        if jobs:
+            queues.move_to_end(client)  # tour de rôle entre clients
+        else:
+            del queues[client]
+        self._stats[chosen].depth -= 1
+        return job
+
+    def _run(self):
+        while True:
+            with self._condition:
+                job = self._pop_next()
+                while job is None:
+                    if not self._running:
+                        return
+                    self._condition.wait()
+                    job = self._pop_next()
+            stats = self._stats[job.priority]
+            if not job.future.set_running_or_notify_cancel():
+                with self._condition:
+                    stats.cancelled += 1
+                continue
+            waited = time.monotonic() - job.submitted
+            try:
+                with self.modem.lock:
+                    result = job.task(self.modem, *job.args, **job.kwargs)
+            except Exception as e:
+                logging.debug(f"Travail planifié en échec ({job.priority.name}) : {e}")
+                with self._condition:
+                    stats.failed += 1
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            with self._condition:
+                stats.executed += 1
+                stats.wait_total += waited
+                stats.wait_max = max(stats.wait_max, waited)
+
+
+def _execute(modem, command, expect_prompt, deadline) -> ATResponse:
+    return modem.execute_command(command, expect_prompt=expect_prompt, deadline=deadline)
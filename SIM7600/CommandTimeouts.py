@@ -0,0 +1,202 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from serial import SerialTimeoutException
+
+from CommandMetrics import command_verb
+
+# Durée maximale attendue (en secondes) par famille de commandes, d'après les temps de
+# réponse maximaux du manuel AT SIMCom. Les clés sont celles de command_verb ; une
+# famille absente est cherchée sans son suffixe (AT+CSQ=? -> AT+CSQ).
+DEFAULT_DEADLINES = {
+    # Requêtes locales : réponse en quelques millisecondes, un échec doit être rapide
+    'AT': 1,
+    'ATE': 1,
+    'ATI': 1,
+    'AT+CGMR': 1,
+    'AT+CGMI': 1,
+    'AT+CGMM': 1,
+    'AT+CGSN': 1,
+    'AT+CSUB': 1,
+    'AT+CSQ': 1,
+    'AT+CREG': 1,
+    'AT+CEREG': 1,
+    'AT+CGREG': 1,
+    'AT+CPSI?': 1,
+    'AT+CNMP?': 1,
+    'AT+IPR': 1,
+    'AT+CMGF': 1,
+    'AT+AUTOCSQ': 1,
+    'AT+CGPSINFO': 2,
+    # SIM et stockage des SMS
+    'AT+CPIN?': 5,
+    'AT+COPS?': 5,
+    'AT+CGPS': 5,
+    'AT+CMGR': 5,
+    'AT+CMGL': 20,
+    'AT+CMGD': 25,
+    # Radio et redémarrage
+    'AT+CNMP=': 10,
+    'AT+CFUN': 10,
+    'AT+CRESET': 10,
+    # Échanges avec le réseau
+    'AT+CMGS': 60,
+    'ATD': 20,
+    'ATA': 20,
+    'ATH': 20,
+    'AT+CHUP': 20,
+    'AT+CUSD': 30,
+    'AT+CGATT': 75,
+    'AT+CGACT': 150,
+    'AT+CIICR': 85,
+    'AT+CIFSR': 5,
+    'AT+NETOPEN': 120,
+    'AT+NETCLOSE': 60,
+    'AT+CIPOPEN': 120,
+    'AT+CIPCLOSE': 30,
+    'AT+COPS=': 120,
+    'AT+COPS=?': 180,
+}
+
+# Échéance globale de l'opération en cours (horloge monotone), propre au thread ou à la tâche asyncio
+_operation_deadline: ContextVar[Optional[float]] = ContextVar('sim7600_operation_deadline', default=None)
+
+
+class DeadlineExceeded(SerialTimeoutException):
+    """L'échéance globale d'une opération composée est dépassée avant la commande suivante."""
+
+
+class DurationStats:
+    """Durées observées d'une famille de commandes."""
+
+    __slots__ = ('count', 'timeouts', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'timeouts': self.timeouts,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'max_s': self.max,
+        }
+
+
+class CommandTimeouts:
+    """
+    Table des durées maximales par famille de commandes, avec enregistrement des
+    durées observées pour l'ajuster à partir de mesures réelles (voir suggest).
+    """
+
+    def __init__(self, deadlines: Optional[Dict[str, float]] = None):
+        self.deadlines = {k.upper(): v for k, v in (deadlines if deadlines is not None else DEFAULT_DEADLINES).items()}
+        self.observed: Dict[str, DurationStats] = {}
+        self._lock = threading.Lock()
+
+    def set_deadline(self, family: str, seconds: float):
+        """Modifie la durée maximale d'une famille (ex. 'AT+CMGS', 'AT+COPS=?')."""
+        self.deadlines[family.upper()] = seconds
+
+    def _lookup(self, verb: str) -> Optional[float]:
+        deadline = self.deadlines.get(verb)
+        if deadline is None:
+            deadline = self.deadlines.get(verb.rstrip('=?'))
+        return deadline
+
+    def deadline_for(self, command: str, default: float) -> float:
+        """Durée maximale attendue pour la commande ; une ligne concaténée cumule celles de ses commandes."""
+        verb = command_verb(command)
+        if ';' not in verb:
+            deadline = self._lookup(verb)
+            return deadline if deadline is not None else default
+        total = 0.0
+        for part in verb[2:].split(';'):
+            deadline = self._lookup("AT" + part)
+            total += deadline if deadline is not None else default
+        return total
+
+    def timeout_for(self, command: str, default: float, deadline: Optional[float] = None) -> float:
+        """
+        Délai à appliquer à la commande : deadline s'il est fourni, sinon la table,
+        limité au temps restant de l'opération en cours (operation_deadline).
+
+        Raises:
+            DeadlineExceeded: Si l'échéance de l'opération en cours est déjà dépassée.
+        """
+        timeout = deadline if deadline is not None else self.deadline_for(command, default)
+        remaining = remaining_time()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Échéance de l'opération dépassée avant {command_verb(command)}")
+        return min(timeout, remaining)
+
+    def observe(self, command: str, elapsed: float, timed_out: bool = False):
+        """Enregistre la durée d'un échange pour sa famille."""
+        verb = command_verb(command)
+        with self._lock:
+            stats = self.observed.get(verb)
+            if stats is None:
+                stats = self.observed[verb] = DurationStats()
+            stats.count += 1
+            stats.total += elapsed
+            if timed_out:
+                stats.timeouts += 1
+            elif elapsed > stats.max:
+                stats.max = elapsed
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {verb: stats.as_dict() for verb, stats in self.observed.items()}
+
+    def suggest(self, default: float, margin: float = 3.0, floor: float = 0.5) -> Dict[str, float]:
+        """
+        Propose une table ajustée : margin fois la durée maximale observée (au moins floor),
+        ou le double de la valeur courante pour les familles ayant expiré.
+        """
+        suggestions = {}
+        with self._lock:
+            for verb, stats in self.observed.items():
+                if ';' in verb or verb == 'DATA':
+                    continue
+                current = self._lookup(verb)
+                current = current if current is not None else default
+                if stats.timeouts:
+                    suggestions[verb] = current * 2
+                else:
+                    suggestions[verb] = max(floor, round(stats.max * margin, 1))
+        return suggestions
+
+    def reset(self):
+        with self._lock:
+            self.observed.clear()
+
+
+def remaining_time() -> Optional[float]:
+    """Temps restant avant l'échéance de l'opération en cours, ou None hors opération."""
+    deadline = _operation_deadline.get()
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+@contextmanager
+def operation_deadline(seconds: float) -> Iterator[float]:
+    """
+    Borne la durée totale d'une opération composée : chaque commande envoyée dans le bloc
+    voit son délai limité au temps restant. Une échéance englobante plus proche est conservée.
+    """
+    deadline = time.monotonic() + seconds
+    current = _operation_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _operation_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _operation_deadline.reset(token)
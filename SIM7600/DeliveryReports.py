@@ -0,0 +1,390 @@
+"""
+Suivi des rapports de remise des SMS envoyés (SMS-STATUS-REPORT).
+
+Le bit TP-SRR de AT+CSMP (mode texte) ou du PDU (mode PDU) demande un rapport pour chaque
+partie envoyée ; la référence retournée par +CMGS: <mr> l'identifie. AT+CNMI fait transmettre
+les rapports par un URC : +CDS (rapport direct, une ligne en mode texte, en-tête et PDU en
+mode PDU) ou +CDSI (rapport stocké, lu puis supprimé). Aucune interrogation périodique :
+chaque rapport est rapproché de son envoi par un index en mémoire des références en attente.
+
+Les références ne tiennent que sur un octet : une entrée de l'index expire après ttl secondes
+(sa future est alors résolue avec expired=True), et une référence réutilisée remplace l'ancienne.
+"""
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import ResponseParsers
+import SMSPdu
+from ResponseParsers import NewMessage, StatusReport
+from SmsListing import iter_sms_listing
+
+# Routage : SMS reçus signalés par +CMTI (compatible avec InboxSync), rapports directs (+CDS)
+DELIVERY_CNMI = 'AT+CNMI=2,1,0,1,0'
+# ... ou rapports stockés puis signalés par +CDSI
+STORED_DELIVERY_CNMI = 'AT+CNMI=2,1,0,2,0'
+
+# TP-SRR, premier octet d'un SMS-SUBMIT (AT+CSMP=<fo>,...)
+STATUS_REPORT_REQUEST = 0x20
+
+# Paramètres par défaut du mode texte du SIM7600 (AT+CSMP)
+_DEFAULT_CSMP = ResponseParsers.TextModeParameters(17, 167, 0, 0)
+
+
+class DeliveryReport(NamedTuple):
+    """Rapport de remise d'une partie : référence, destinataire, état TP-ST et date de remise."""
+    mr: int
+    recipient: str
+    status: int
+    discharge_time: Optional[datetime] = None
+
+    @property
+    def delivered(self) -> bool:
+        """Vrai si le SMS a été remis (TP-ST 0x00 à 0x1F)."""
+        return self.status < 0x20
+
+    @property
+    def final(self) -> bool:
+        """Faux pour une erreur temporaire que le centre SMS tente encore de résoudre (0x20 à 0x3F)."""
+        return not 0x20 <= self.status < 0x40
+
+
+class DeliveryOutcome(NamedTuple):
+    """
+    Issue d'un envoi suivi : rapports reçus, dans l'ordre des parties. expired est vrai si
+    tous les rapports définitifs ne sont pas arrivés avant l'expiration du suivi.
+    """
+    phone: str
+    references: Tuple[int, ...]
+    reports: Tuple[DeliveryReport, ...]
+    expired: bool = False
+
+    @property
+    def delivered(self) -> bool:
+        """Vrai si chaque partie a été remise."""
+        return (bool(self.references) and len(self.reports) == len(self.references)
+                and all(report.delivered for report in self.reports))
+
+    @property
+    def failed(self) -> bool:
+        """Vrai si une partie a été définitivement refusée (ou si rien n'a été envoyé)."""
+        return not self.references or any(report.final and not report.delivered for report in self.reports)
+
+
+OutcomeCallback = Callable[[DeliveryOutcome], None]
+
+
+def parse_report(line: str, codec=None) -> Optional[DeliveryReport]:
+    """
+    Rapport d'un URC +CDS : ligne du mode texte, ou « +CDS: <length>\\n<pdu> » en mode PDU.
+    codec (SmsCodec) décode le numéro affiché avec AT+CSCS="UCS2".
+    """
+    header, _, pdu = line.partition("\n")
+    if pdu:
+        return report_from_pdu(pdu)
+    notice = ResponseParsers.parse_line(header)
+    if not isinstance(notice, StatusReport):
+        return None
+    recipient = codec.decode_address(notice.recipient) if codec is not None else notice.recipient
+    return DeliveryReport(notice.mr, recipient, notice.status,
+                          SMSPdu.parse_text_timestamp(*notice.discharge.split(",", 1)))
+
+
+def report_from_pdu(pdu: str) -> Optional[DeliveryReport]:
+    """Rapport d'un PDU SMS-STATUS-REPORT (hexadécimal, avec SMSC), None pour un autre PDU."""
+    try:
+        decoded = SMSPdu.decode_pdu(pdu.strip())
+    except ValueError as e:
+        logging.warning(f"Rapport de remise illisible : {e}")
+        return None
+    if decoded.kind != 'STATUS-REPORT':
+        return None
+    return DeliveryReport(decoded.message_reference, decoded.address, decoded.status, decoded.discharge_time)
+
+
+class _Tracked:
+    """Envoi en attente de ses rapports."""
+
+    def __init__(self, phone: str, references: Tuple[int, ...], future: Future, expires: float):
+        self.phone = phone
+        self.references = references
+        self.future = future
+        self.expires = expires
+        self.pending = set(references)
+        self.reports: Dict[int, DeliveryReport] = {}
+        self.finished = False
+
+    def outcome(self, expired: bool) -> DeliveryOutcome:
+        reports = tuple(self.reports[mr] for mr in self.references if mr in self.reports)
+        return DeliveryOutcome(self.phone, self.references, reports, expired)
+
+
+class DeliveryTracker:
+    """
+    Rapprochement des rapports de remise et des envois d'un SIM7600SMS.
+
+    send() envoie un SMS avec demande de rapport et retourne une concurrent.futures.Future
+    résolue par un DeliveryOutcome dès que chaque partie a un rapport définitif, ou à
+    l'expiration du suivi (ttl secondes). Les rappels (add_done_callback, subscribe) sont
+    appelés depuis le thread de notification des URC, ou depuis celui de l'expiration.
+    Avec asyncio, asyncio.wrap_future(future) permet d'attendre l'issue.
+    """
+
+    def __init__(self, modem, ttl: float = 3600.0, cnmi: str = DELIVERY_CNMI):
+        """
+        Args:
+            modem: Instance SIM7600SMS ouverte.
+            ttl: Durée de suivi d'un envoi (secondes) ; aussi celle d'un rapport arrivé avant son envoi.
+            cnmi: Commande de routage (DELIVERY_CNMI : +CDS, STORED_DELIVERY_CNMI : +CDSI).
+        """
+        self.modem = modem
+        self.ttl = ttl
+        self.cnmi = cnmi
+        self.reports = 0
+        self.unmatched = 0
+        self.expired = 0
+        self._index: Dict[int, _Tracked] = {}
+        self._deadlines: Deque[_Tracked] = collections.deque()
+        # Rapports reçus avant l'enregistrement de leur envoi : référence -> (expiration, rapport)
+        self._early: 'collections.OrderedDict[int, Tuple[float, DeliveryReport]]' = collections.OrderedDict()
+        self._subscribers: List[OutcomeCallback] = []
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._csmp = _DEFAULT_CSMP
+        self._running = False
+
+    def __len__(self) -> int:
+        """Nombre d'envois en attente de rapports."""
+        with self._lock:
+            return sum(1 for tracked in self._deadlines if not tracked.finished)
+
+    def subscribe(self, callback: OutcomeCallback):
+        """Abonne callback(outcome) à l'issue de tous les envois suivis."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: OutcomeCallback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self) -> bool:
+        """Active la demande de rapports (AT+CSMP) et leur routage (AT+CNMI)."""
+        if self._running:
+            return True
+        self.modem.start_urc_reader()
+        self.modem.subscribe_urc("+CDS:", self._on_report)
+        self.modem.subscribe_urc("+CDSI:", self._on_stored_report)
+        self.modem.subscribe_urc("RDY", self._on_module_restart)
+        self._running = True
+        return self.configure()
+
+    def stop(self):
+        """Rétablit AT+CSMP et cesse de suivre les rapports ; les envois en attente expirent normalement."""
+        if not self._running:
+            return
+        self._running = False
+        self.modem.unsubscribe_urc("+CDS:", self._on_report)
+        self.modem.unsubscribe_urc("+CDSI:", self._on_stored_report)
+        self.modem.unsubscribe_urc("RDY", self._on_module_restart)
+        self.modem.execute_command(self._csmp_command(self._csmp.fo))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def configure(self) -> bool:
+        result = self.modem.execute_command('AT+CSMP?')
+        parameters = ResponseParsers.parse_response(result, '+CSMP') if result.success else None
+        if parameters is not None:
+            self._csmp = parameters._replace(fo=parameters.fo & ~STATUS_REPORT_REQUEST)
+        result = self.modem.execute_command(
+            f"{self._csmp_command(self._csmp.fo | STATUS_REPORT_REQUEST)};{self.cnmi[2:]}")
+        if not result.success:
+            logging.error(f"Rapports de remise refusés ({result.final_line or 'délai dépassé'}).")
+        return result.success
+
+    def _csmp_command(self, fo: int) -> str:
+        vp = "" if self._csmp.vp is None else self._csmp.vp
+        return f"AT+CSMP={fo},{vp},{self._csmp.pid},{self._csmp.dcs}"
+
+    # --- Envois ---
+
+    def send(self, phone_number: str, message: Union[str, bytes], pdu: bool = False, encoding: Optional[str] = None,
+             callback: Optional[OutcomeCallback] = None) -> Future:
+        """
+        Envoie un SMS avec demande de rapport (mode texte, ou PDU avec pdu=True) et retourne
+        la future de son issue ; résolue immédiatement (failed) si l'envoi échoue.
+        """
+        if pdu:
+            references = self.modem.send_sms_pdu(phone_number, message, encoding=encoding, status_report=True) or []
+        else:
+            submitted = ResponseParsers.parse_response(self.modem.send_sms(phone_number, message), '+CMGS')
+            references = [submitted.mr] if submitted is not None else []
+        return self.track(phone_number, references, callback)
+
+    def track(self, phone_number: str, references: Iterable[int],
+              callback: Optional[OutcomeCallback] = None) -> Future:
+        """
+        Suit un envoi déjà effectué avec demande de rapport (ex. SendResult.references de
+        BulkSmsSender) et retourne la future de son issue.
+        """
+        future: Future = Future()
+        if callback is not None:
+            future.add_done_callback(lambda done: callback(done.result()))
+        tracked = _Tracked(phone_number, tuple(references), future, time.monotonic() + self.ttl)
+        if not tracked.references:
+            self._finish(tracked, expired=False)
+            return future
+        early = []
+        with self._lock:
+            self._evict_early(time.monotonic())
+            for mr in tracked.references:
+                previous = self._index.get(mr)
+                if previous is not None and previous is not tracked:
+                    # Référence réutilisée après 256 envois : l'ancien envoi ne recevra plus ce rapport
+                    logging.debug(f"Référence {mr} réutilisée avant le rapport de l'envoi vers {previous.phone}.")
+                self._index[mr] = tracked
+                if mr in self._early:
+                    early.append(self._early.pop(mr)[1])
+            self._deadlines.append(tracked)
+            self._schedule()
+        for report in early:
+            self._match(report)
+        return future
+
+    # --- Rapports ---
+
+    def _on_report(self, line: str):
+        report = parse_report(line, getattr(self.modem, 'codec', None))
+        if report is not None:
+            self._apply(report)
+
+    def _on_stored_report(self, line: str):
+        notice = ResponseParsers.parse_line(line)
+        if not isinstance(notice, NewMessage):
+            return
+        with self.modem.lock:
+            # Lecture en mode PDU (rapport complet), suppression puis retour au mode SMS courant
+            # dans la même ligne : les autres utilisateurs du modem ne voient pas le changement
+            mode = self._sms_mode()
+            result = self.modem.execute_command(
+                f"AT+CMGF=0;+CMGR={notice.index};+CMGD={notice.index};+CMGF={mode}")
+        if not result.success:
+            logging.warning(f"Lecture du rapport {notice.index} impossible ({result.final_line or 'délai dépassé'}).")
+            return
+        for entry in iter_sms_listing(result.lines, "+CMGR"):
+            report = report_from_pdu(entry.body)
+            if report is not None:
+                self._apply(report)
+
+    def _sms_mode(self) -> int:
+        """Mode SMS courant (AT+CMGF? : 0 PDU, 1 texte) ; texte s'il est illisible."""
+        result = self.modem.execute_command('AT+CMGF?')
+        for line in result.lines:
+            if line.startswith("+CMGF:") and line[6:].strip().isdigit():
+                return int(line[6:].strip())
+        return 1
+
+    def _apply(self, report: DeliveryReport):
+        now = time.monotonic()
+        with self._lock:
+            self.reports += 1
+            if report.mr not in self._index:
+                # Rapport plus rapide que l'enregistrement de son envoi, ou envoi non suivi
+                self.unmatched += 1
+                self._evict_early(now)
+                self._early.pop(report.mr, None)
+                self._early[report.mr] = (now + self.ttl, report)
+                return
+        self._match(report)
+
+    def _match(self, report: DeliveryReport):
+        with self._lock:
+            tracked = self._index.get(report.mr)
+            if tracked is None:
+                return
+            tracked.reports[report.mr] = report
+            if not report.final:
+                return
+            tracked.pending.discard(report.mr)
+            del self._index[report.mr]
+            if tracked.pending:
+                return
+        self._finish(tracked, expired=False)
+
+    def _finish(self, tracked: _Tracked, expired: bool):
+        with self._lock:
+            if tracked.finished:
+                return
+            tracked.finished = True
+            for mr in tracked.pending:
+                if self._index.get(mr) is tracked:
+                    del self._index[mr]
+            if expired:
+                self.expired += 1
+            subscribers = list(self._subscribers)
+        outcome = tracked.outcome(expired)
+        self._archive(outcome)
+        tracked.future.set_result(outcome)
+        for callback in subscribers:
+            try:
+                callback(outcome)
+            except Exception as e:
+                logging.error(f"Erreur dans un abonné des rapports de remise : {e}")
+
+    def _archive(self, outcome: DeliveryOutcome):
+        archive = getattr(self.modem, 'archive', None)
+        if archive is None or not outcome.references:
+            return
+        archived = archive.find_by_reference(outcome.references[0], self.modem.imei)
+        if archived is not None and archived.references == outcome.references:
+            status = "DELIVERED" if outcome.delivered else "EXPIRED" if outcome.expired else "FAILED"
+            archive.set_status(archived.id, status)
+
+    # --- Expiration ---
+
+    def _schedule(self):
+        """Arme une minuterie unique pour la prochaine expiration (appelé avec le verrou)."""
+        while self._deadlines and self._deadlines[0].finished:
+            self._deadlines.popleft()
+        if self._timer is not None or not self._deadlines:
+            return
+        self._timer = threading.Timer(max(0.0, self._deadlines[0].expires - time.monotonic()), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            self._timer = None
+            # Même ttl pour tous les envois : la file est triée par expiration
+            while self._deadlines and self._deadlines[0].expires <= now:
+                tracked = self._deadlines.popleft()
+                if not tracked.finished:
+                    expired.append(tracked)
+            self._evict_early(now)
+        for tracked in expired:
+            logging.info(f"Rapport de remise non reçu pour l'envoi vers {tracked.phone} "
+                         f"(références {', '.join(map(str, sorted(tracked.pending)))}).")
+            self._finish(tracked, expired=True)
+        with self._lock:
+            self._schedule()
+
+    def _evict_early(self, now: float):
+        while self._early and next(iter(self._early.values()))[0] <= now:
+            self._early.popitem(last=False)
+
+    def _on_module_restart(self, line: str):
+        # Le redémarrage rétablit AT+CSMP et AT+CNMI par défaut
+        logging.info("Redémarrage du module détecté, rapports de remise réactivés.")
+        self.configure()
@@ -0,0 +1,231 @@
+import logging
+import queue
+import threading
+from typing import Callable, List, Optional, Set
+
+import ResponseParsers
+import SMSPdu
+from ResponseParsers import PduHeader, SmsHeader
+from SmsCodec import CHARSET_UCS2, SmsCodec
+from SmsListing import ListedSms, iter_sms_listing
+from SMSPdu import SmsMessage
+
+# Routage des SMS reçus : stockage en mémoire puis +CMTI: <mem>,<index> (pas de rapport de remise)
+DEFAULT_CNMI = 'AT+CNMI=2,1,0,0,0'
+
+# Suppressions AT+CMGD=<index> envoyées par ligne de commandes lors d'une purge
+PURGE_BATCH = 32
+
+# En mode texte, les SMS sont lus en UCS2 : contenu et numéro sont décodés exactement
+_TEXT_CODEC = SmsCodec(CHARSET_UCS2)
+
+MessageCallback = Callable[[SmsMessage], None]
+
+
+class InboxSync:
+    """
+    Synchronisation incrémentale de la boîte de réception d'un SIM7600SMS.
+
+    AT+CNMI fait signaler chaque SMS reçu par un +CMTI qui donne son index : seul ce
+    message est lu (AT+CMGR), dans le même aller-retour que la sélection du mode. Les
+    index lus sont mémorisés pour ne pas relivrer un message lors du rattrapage ; un +CMTI
+    annonce toujours un nouveau message (l'emplacement a pu être libéré et réutilisé
+    entre-temps) et il est lu sans condition. Au-delà de purge_threshold, les SMS lus par
+    la synchronisation (et eux seuls) sont supprimés, plusieurs AT+CMGD=<index> par ligne
+    de commandes. Le coût en régime établi dépend donc du nombre de
+    nouveaux messages, pas du remplissage de la mémoire. Une liste des SMS non lus
+    n'est demandée qu'au démarrage et après un redémarrage du module (RDY), pour
+    rattraper les notifications manquées.
+
+    En mode PDU, les messages concaténés sont réassemblés au fil des notifications.
+    Les abonnés sont appelés depuis le thread de notification des URC.
+    """
+
+    def __init__(self, modem, pdu: bool = False, purge_threshold: Optional[int] = 20, cnmi: str = DEFAULT_CNMI):
+        """
+        Args:
+            modem: Instance SIM7600SMS ouverte.
+            pdu: Lecture en mode PDU (alphabet exact, messages concaténés) plutôt qu'en mode texte.
+            purge_threshold: Nombre de SMS lus par la synchronisation au-delà duquel ils sont supprimés
+                (None : jamais).
+            cnmi: Commande de routage des SMS reçus.
+        """
+        self.modem = modem
+        self.pdu = pdu
+        self.purge_threshold = purge_threshold
+        self.cnmi = cnmi
+        self.seen: Set[int] = set()
+        self.messages: 'queue.Queue[SmsMessage]' = queue.Queue()
+        self.notifications = 0
+        self.fetched = 0
+        self.purges = 0
+        self._reassembler = SMSPdu.ConcatenatedMessages()
+        self._subscribers: List[MessageCallback] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def _mode(self) -> str:
+        return f"AT+CMGF={0 if self.pdu else 1}"
+
+    def _read_command(self, command: str) -> str:
+        """Commande de lecture précédée du mode ; en mode texte, jeu de caractères UCS2 le temps de la lecture."""
+        if self.pdu:
+            return f"{self._mode};{command}"
+        return f'{self._mode};+CSCS="{CHARSET_UCS2}";{command};+CSCS="{self.modem.codec.charset}"'
+
+    def subscribe(self, callback: MessageCallback):
+        """Abonne callback(message) aux nouveaux messages complets."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: MessageCallback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[SmsMessage]:
+        """Prochain message reçu, ou None après timeout secondes."""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def start(self) -> List[SmsMessage]:
+        """Active le routage +CMTI, puis lit les SMS non lus déjà en mémoire (retournés)."""
+        if self._running:
+            return []
+        self.modem.start_urc_reader()
+        self.modem.subscribe_urc("+CMTI", self._on_new_message)
+        self.modem.subscribe_urc("RDY", self._on_module_restart)
+        self._running = True
+        self.configure()
+        return self.sync()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self.modem.unsubscribe_urc("+CMTI", self._on_new_message)
+        self.modem.unsubscribe_urc("RDY", self._on_module_restart)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def configure(self) -> bool:
+        result = self.modem.execute_command(f"{self._mode};{self.cnmi[2:]}")
+        if not result.success:
+            logging.error(f"Routage des SMS reçus refusé ({result.final_line or 'délai dépassé'}).")
+        return result.success
+
+    def sync(self) -> List[SmsMessage]:
+        """Lit les SMS non lus (rattrapage des notifications manquées) et retourne les messages complets."""
+        status = '0' if self.pdu else '"REC UNREAD"'
+        result = self.modem.execute_command(self._read_command(f"+CMGL={status}"))
+        if not result.success:
+            logging.warning(f"Lecture des SMS non lus impossible ({result.final_line or 'délai dépassé'}).")
+            return []
+        with self._lock:
+            # Seul le rattrapage écarte les index déjà lus : ils n'ont pas été libérés depuis
+            entries = [entry for entry in iter_sms_listing(result.lines, "+CMGL") if entry.index not in self.seen]
+        messages = []
+        for entry in entries:
+            message = self._accept(entry, entry.index)
+            if message is not None:
+                messages.append(message)
+        self._purge_if_needed()
+        return messages
+
+    def fetch(self, index: int) -> Optional[SmsMessage]:
+        """
+        Lit le SMS index (AT+CMGR) et le livre, même si l'index a déjà été lu : le module
+        l'annonce comme nouveau. Retourne le message s'il est complet.
+        """
+        with self._lock:
+            # Emplacement nouveau ou libre : l'ancien message n'y est plus
+            self.seen.discard(index)
+        result = self.modem.execute_command(self._read_command(f"+CMGR={index}"))
+        if not result.success:
+            logging.warning(f"Lecture du SMS {index} impossible ({result.final_line or 'délai dépassé'}).")
+            return None
+        for entry in iter_sms_listing(result.lines, "+CMGR"):
+            return self._accept(entry, index)
+        return None
+
+    def purge(self) -> bool:
+        """
+        Supprime de la mémoire les SMS lus par la synchronisation (AT+CMGD=<index>) ; les
+        autres messages, lus ou non, sont conservés.
+        """
+        with self._lock:
+            indices = sorted(self.seen)
+        for start in range(0, len(indices), PURGE_BATCH):
+            batch = indices[start:start + PURGE_BATCH]
+            result = self.modem.execute_command("AT" + ";".join(f"+CMGD={index}" for index in batch))
+            if not result.success:
+                logging.warning(f"Purge des SMS lus impossible ({result.final_line or 'délai dépassé'}).")
+                return False
+            with self._lock:
+                self.seen.difference_update(batch)
+        self.purges += 1
+        return True
+
+    def _accept(self, entry: ListedSms, index: int) -> Optional[SmsMessage]:
+        with self._lock:
+            self.seen.add(index)
+        self.fetched += 1
+        message = self._decode(entry, index)
+        if message is not None:
+            self._deliver(message)
+        return message
+
+    def _decode(self, entry: ListedSms, index: int) -> Optional[SmsMessage]:
+        header = entry.header
+        if isinstance(header, PduHeader):
+            try:
+                pdu = SMSPdu.decode_pdu(entry.body.strip())
+            except ValueError as e:
+                logging.warning(f"SMS {index} ignoré : {e}")
+                return None
+            return self._reassembler.add(pdu, index)
+        if isinstance(header, SmsHeader):
+            # Mode texte : le corps est une seule ligne hexadécimale UCS2
+            content = _TEXT_CODEC.decode(entry.body.replace("\n", ""), header.dcs)
+            return SmsMessage(_TEXT_CODEC.decode_address(header.sender),
+                              SMSPdu.parse_text_timestamp(header.date, header.time), 'text', content, b"", (index,))
+        logging.warning(f"En-tête du SMS {index} non reconnu.")
+        return None
+
+    def _deliver(self, message: SmsMessage):
+        self.modem.archive_received((message,))
+        self.messages.put(message)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(message)
+            except Exception as e:
+                logging.error(f"Erreur dans un abonné de la boîte de réception : {e}")
+
+    def _purge_if_needed(self):
+        if self.purge_threshold is not None and len(self.seen) >= self.purge_threshold:
+            self.purge()
+
+    def _on_new_message(self, line: str):
+        notification = ResponseParsers.parse_line(line)
+        if notification is None:
+            return
+        self.notifications += 1
+        self.fetch(notification.index)
+        self._purge_if_needed()
+
+    def _on_module_restart(self, line: str):
+        # Le redémarrage efface le routage ; des SMS ont pu arriver sans notification
+        logging.info("Redémarrage du module détecté, rattrapage de la boîte de réception.")
+        self.configure()
+        self.sync()
@@ -0,0 +1,492 @@
+"""
+Démon propriétaire des ports SIM7600, accessible par socket Unix.
+
+Protocole : chaque trame est un entier de 4 octets (big-endian, longueur) suivi d'un
+objet JSON encodé en UTF-8.
+
+    requête   {"id": 7, "method": "send_command", "params": {"command": "AT+CSQ"}}
+    réponse   {"id": 7, "result": "+CSQ: 20,99"}
+    erreur    {"id": 7, "error": {"type": "SerialException", "message": "..."}}
+    événement {"event": "urc", "prefix": "+CMTI", "line": "+CMTI: \"SM\",3"}
+
+Les requêtes d'une même connexion sont multiplexées : elles sont confiées au
+CommandScheduler du modem (client = connexion) et les réponses reviennent dans
+l'ordre de leur achèvement, identifiées par leur id.
+"""
+import argparse
+import errno
+import itertools
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Set
+
+from CommandScheduler import CommandScheduler, Priority, classify
+from SIM7600Cmd import setup_logging
+
+DEFAULT_SOCKET_PATH = "/tmp/sim7600.sock"
+
+# Taille maximale d'une trame acceptée (protection contre un flux corrompu)
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+_HEADER = struct.Struct(">I")
+
+
+class DaemonError(Exception):
+    """Erreur renvoyée par le démon pour une requête."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+        self.message = message
+
+
+def send_frame(sock: socket.socket, message: Dict[str, Any]):
+    """Écrit un message JSON précédé de sa longueur."""
+    payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    data = stream.read(size)
+    if not data or len(data) < size:
+        return None
+    return data
+
+
+def recv_frame(stream) -> Optional[Dict[str, Any]]:
+    """Lit un message depuis un flux binaire (socket.makefile('rb')) ; None en fin de connexion."""
+    header = _read_exact(stream, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Trame de {size} octets refusée (maximum {MAX_FRAME_SIZE}).")
+    payload = _read_exact(stream, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def response_to_dict(result) -> Dict[str, Any]:
+    """Représentation JSON d'une ATResponse."""
+    return {
+        "lines": result.lines,
+        "result_code": result.result_code.name,
+        "final_line": result.final_line,
+        "error_code": result.error_code,
+        "elapsed": result.elapsed,
+    }
+
+
+# Opérations exécutées par l'ordonnanceur : méthode -> (tâche(modem, **params), priorité)
+def _send_command(modem, command, show=False, raw=False, expect_prompt=False, deadline=None):
+    result = modem.execute_command(command, expect_prompt=expect_prompt, deadline=deadline)
+    return modem.format_response(result, show=show, raw=raw)
+
+
+def _execute_command(modem, command, expect_prompt=False, deadline=None):
+    return response_to_dict(modem.execute_command(command, expect_prompt=expect_prompt, deadline=deadline))
+
+
+def _send_sms(modem, phone_number, message):
+    return modem.send_sms(phone_number, message)
+
+
+def _read_sms(modem, delete=False):
+    return modem.read_sms(delete_action=delete)
+
+
+def _network_snapshot(modem, with_signal=True):
+    snapshot = modem.get_network_snapshot(with_signal)
+    return dict(snapshot._asdict(), generation=snapshot.generation, operator=snapshot.operator,
+                registered=snapshot.registered)
+
+
+def _gps_info(modem):
+    return modem.execute_command("AT+CGPSINFO").line_with("+CGPSINFO:")
+
+
+def _check_sim_card(modem):
+    return modem.check_sim_card()
+
+
+MODEM_METHODS: Dict[str, tuple] = {
+    'send_command': (_send_command, None),
+    'execute_command': (_execute_command, None),
+    'send_sms': (_send_sms, Priority.SMS),
+    'read_sms': (_read_sms, Priority.SMS),
+    'network_snapshot': (_network_snapshot, Priority.TELEMETRY),
+    'gps_info': (_gps_info, Priority.TELEMETRY),
+    'check_sim_card': (_check_sim_card, Priority.TELEMETRY),
+}
+
+
+class _Connection:
+    """Connexion cliente côté démon : écriture des trames sous verrou, abonnements URC."""
+
+    def __init__(self, sock: socket.socket, connection_id: int):
+        self.sock = sock
+        self.id = connection_id
+        self.prefixes: Set[str] = set()
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                send_frame(self.sock, message)
+            except OSError:
+                self.closed = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.daemon_owner.serve_connection(self.request, self.rfile)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ModemDaemon:
+    """
+    Démon propriétaire d'un modem SIM7600 (et éventuellement de son port GPS) qui
+    expose ses opérations aux autres processus par socket Unix. Le port reste ouvert
+    et initialisé entre les requêtes ; les URC sont diffusées aux clients abonnés.
+    """
+
+    def __init__(self, modem, socket_path: str = DEFAULT_SOCKET_PATH, gps=None,
+                 scheduler: Optional[CommandScheduler] = None):
+        self.modem = modem
+        self.gps = gps
+        self.socket_path = socket_path
+        self.scheduler = scheduler or CommandScheduler(modem)
+        self.requests = 0
+        self._connections: Dict[int, _Connection] = {}
+        self._urc_handlers: Dict[str, Callable[[str], None]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Ouvre le socket et sert les clients dans un thread d'arrière-plan."""
+        if self._server is not None:
+            return
+        self._remove_stale_socket()
+        if not self.modem.is_open():
+            self.modem.open_connection()
+        self.modem.start_urc_reader()
+        self.scheduler.start()
+        self._server = _UnixServer(self.socket_path, _RequestHandler)
+        # Socket réservé au propriétaire : il donne accès au modem (SMS, commandes AT)
+        os.chmod(self.socket_path, 0o600)
+        self._server.daemon_owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ModemDaemon", daemon=True)
+        self._thread.start()
+        logging.info(f"Démon SIM7600 à l'écoute sur {self.socket_path} (port {self.modem.port}).")
+
+    def _remove_stale_socket(self):
+        """
+        Supprime le socket laissé par un démon arrêté sans nettoyage. Refuse de démarrer
+        si un démon répond encore sur ce chemin : il garde ses clients et son port.
+        """
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            # Personne n'écoute : socket orphelin
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, f"Un démon SIM7600 écoute déjà sur {self.socket_path}.")
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self.scheduler.stop()
+        with self._lock:
+            for prefix, handler in self._urc_handlers.items():
+                self.modem.unsubscribe_urc(prefix, handler)
+            self._urc_handlers.clear()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        logging.info("Démon SIM7600 arrêté.")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def serve_connection(self, sock: socket.socket, stream):
+        """Boucle de lecture d'une connexion : chaque requête est traitée sans attendre les précédentes."""
+        connection = _Connection(sock, next(self._ids))
+        with self._lock:
+            self._connections[connection.id] = connection
+        try:
+            while True:
+                try:
+                    request = recv_frame(stream)
+                except (ValueError, OSError) as e:
+                    logging.warning(f"Connexion {connection.id} interrompue : {e}")
+                    break
+                if request is None:
+                    break
+                self._handle(connection, request)
+        finally:
+            connection.closed = True
+            self.scheduler.cancel(client=connection.id)
+            with self._lock:
+                self._connections.pop(connection.id, None)
+
+    def _handle(self, connection: _Connection, request: Dict[str, Any]):
+        self.requests += 1
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+        try:
+            if method == "ping":
+                connection.send({"id": request_id, "result": "pong"})
+            elif method == "subscribe":
+                self._subscribe(connection, params["prefix"])
+                connection.send({"id": request_id, "result": True})
+            elif method == "unsubscribe":
+                connection.prefixes.discard(params["prefix"])
+                connection.send({"id": request_id, "result": True})
+            elif method == "gps_info" and self.gps is not None:
+                with self.gps.lock:
+                    connection.send({"id": request_id, "result": self.gps.get_gps_data()})
+            elif method in MODEM_METHODS:
+                future = self._submit(connection, method, params)
+                future.add_done_callback(lambda done: self._reply(connection, request_id, done))
+            else:
+                raise DaemonError("UnknownMethod", f"Méthode inconnue : {method}")
+        except Exception as e:
+            connection.send({"id": request_id, "error": _error(e)})
+
+    def _submit(self, connection: _Connection, method: str, params: Dict[str, Any]) -> Future:
+        task, priority = MODEM_METHODS[method]
+        requested = params.pop("priority", None)
+        if requested is not None:
+            if requested not in Priority.__members__:
+                raise DaemonError("InvalidParams", f"Priorité inconnue : {requested}")
+            priority = Priority[requested]
+        elif priority is None:
+            priority = classify(params["command"])
+        return self.scheduler.submit(task, priority=priority, client=connection.id, **params)
+
+    @staticmethod
+    def _reply(connection: _Connection, request_id, future: Future):
+        if future.cancelled():
+            connection.send({"id": request_id, "error": {"type": "Cancelled", "message": "Requête annulée"}})
+        elif future.exception() is not None:
+            connection.send({"id": request_id, "error": _error(future.exception())})
+        else:
+            connection.send({"id": request_id, "result": future.result()})
+
+    def _subscribe(self, connection: _Connection, prefix: str):
+        connection.prefixes.add(prefix)
+        with self._lock:
+            if prefix in self._urc_handlers:
+                return
+            handler = self._urc_handlers[prefix] = lambda line: self._fan_out(prefix, line)
+        self.modem.subscribe_urc(prefix, handler)
+
+    def _fan_out(self, prefix: str, line: str):
+        event = {"event": "urc", "prefix": prefix, "line": line}
+        with self._lock:
+            connections = [c for c in self._connections.values() if prefix in c.prefixes]
+        for connection in connections:
+            connection.send(event)
+
+
+def _error(exception: BaseException) -> Dict[str, str]:
+    if isinstance(exception, DaemonError):
+        return {"type": exception.error_type, "message": exception.message}
+    return {"type": type(exception).__name__, "message": str(exception)}
+
+
+class ModemClient:
+    """
+    Client du démon : une connexion persistante, plusieurs requêtes en vol (call_async),
+    et réception des URC auxquelles il est abonné. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[int, Future] = {}
+        self._handlers: Dict[str, list] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+
+    def connect(self) -> 'ModemClient':
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(self.socket_path)
+            self._reader = threading.Thread(target=self._read_loop, args=(self._sock.makefile("rb"),),
+                                            name="ModemClient", daemon=True)
+            self._reader.start()
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+            self._reader.join()
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def call_async(self, method: str, **params) -> Future:
+        """Envoie une requête sans attendre ; le Future donne le résultat ou lève DaemonError."""
+        self.connect()
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = future
+        with self._send_lock:
+            send_frame(self._sock, {"id": request_id, "method": method, "params": params})
+        return future
+
+    def call(self, method: str, **params) -> Any:
+        return self.call_async(method, **params).result(self.timeout)
+
+    def send_command(self, command: str, show=False, raw=False, priority: Optional[str] = None,
+                     deadline: Optional[float] = None) -> str:
+        return self.call("send_command", command=command, show=show, raw=raw, priority=priority, deadline=deadline)
+
+    def execute_command(self, command: str, priority: Optional[str] = None,
+                        deadline: Optional[float] = None) -> Dict[str, Any]:
+        return self.call("execute_command", command=command, priority=priority, deadline=deadline)
+
+    def send_sms(self, phone_number: str, message: str):
+        return self.call("send_sms", phone_number=phone_number, message=message)
+
+    def read_sms(self, delete: bool = False):
+        return self.call("read_sms", delete=delete)
+
+    def network_snapshot(self, with_signal: bool = True) -> Dict[str, Any]:
+        return self.call("network_snapshot", with_signal=with_signal)
+
+    def gps_info(self):
+        return self.call("gps_info")
+
+    def ping(self) -> bool:
+        return self.call("ping") == "pong"
+
+    def subscribe(self, prefix: str, callback: Callable[[str], None]):
+        """Abonne callback(line) aux URC prefix diffusées par le démon (appelé dans le thread lecteur)."""
+        with self._lock:
+            first = prefix not in self._handlers
+            self._handlers.setdefault(prefix, []).append(callback)
+        if first:
+            self.call("subscribe", prefix=prefix)
+
+    def unsubscribe(self, prefix: str, callback: Callable[[str], None]):
+        with self._lock:
+            handlers = self._handlers.get(prefix, [])
+            if callback in handlers:
+                handlers.remove(callback)
+            last = prefix in self._handlers and not handlers
+            if last:
+                del self._handlers[prefix]
+        if last:
+            self.call("unsubscribe", prefix=prefix)
+
+    def _read_loop(self, stream):
+        try:
+            while True:
+                message = recv_frame(stream)
+                if message is None:
+                    break
+                if "event" in message:
+                    self._dispatch_event(message)
+                    continue
+                with self._lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(DaemonError(message["error"]["type"], message["error"]["message"]))
+                else:
+                    future.set_result(message.get("result"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(ConnectionError("Connexion au démon SIM7600 fermée."))
+
+    def _dispatch_event(self, message: Dict[str, Any]):
+        with self._lock:
+            handlers = list(self._handlers.get(message.get("prefix"), []))
+        for callback in handlers:
+            try:
+                callback(message["line"])
+            except Exception as e:
+                logging.error(f"Erreur dans un abonné URC : {e}")
+
+
+def main():
+    from SIM7600SMS import SIM7600SMS
+    from SerialPortCategorizer import SerialPortCategorizer
+
+    parser = argparse.ArgumentParser(description="Démon SIM7600 : partage du port AT par socket Unix.")
+    parser.add_argument("--port", help="port AT (détecté par défaut)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="chemin du socket Unix")
+    args = parser.parse_args()
+
+    setup_logging(logging.INFO)
+    port = args.port or SerialPortCategorizer().get_port("at")
+    modem = SIM7600SMS(port)
+    modem.set_echo_command(False)
+    modem.open_connection()
+    modem.check_sim_card()
+    try:
+        ModemDaemon(modem, args.socket).serve_forever()
+    finally:
+        modem.close_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from serial import SerialException
+
+from SIM7600Cmd import RegistrationError
+from SIM7600SMS import SIM7600SMS
+from SerialPortCategorizer import SerialPortCategorizer
+
+
+class ModemWorker(threading.Thread):
+    """
+    Thread propriétaire d'un modem : les tâches soumises sont exécutées une à une,
+    dans l'ordre, avec le modem en argument. Aucun autre thread n'accède au port.
+    """
+
+    def __init__(self, modem):
+        super().__init__(name=f"ModemWorker-{modem.port}", daemon=True)
+        self.modem = modem
+        self.completed = 0
+        self.failed = 0
+        self._tasks = queue.Queue()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.modem.port
+
+    @property
+    def load(self) -> int:
+        """Nombre de tâches en attente ou en cours d'exécution."""
+        with self._lock:
+            return self._active
+
+    def submit(self, task: Callable[..., Any], *args, **kwargs) -> Future:
+        """Ajoute task(modem, *args, **kwargs) à la file du modem."""
+        future = Future()
+        with self._lock:
+            self._active += 1
+        self._tasks.put((future, task, args, kwargs))
+        return future
+
+    def run(self):
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, task, args, kwargs = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(task(self.modem, *args, **kwargs))
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    future.set_exception(e)
+            with self._lock:
+                self._active -= 1
+
+    def stop(self, timeout: Optional[float] = None):
+        """Termine le thread après les tâches déjà soumises."""
+        self._tasks.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+class ModemFleet:
+    """
+    Ensemble de modems SIM7600, chacun piloté par son propre ModemWorker.
+
+    Les opérations de flotte (état de tous les modems, configuration diffusée, envoi de
+    SMS vers le modem le moins chargé) s'exécutent en parallèle sur les différents ports.
+    """
+
+    def __init__(self, modems: Iterable[SIM7600SMS]):
+        self.workers: Dict[str, ModemWorker] = {}
+        for modem in modems:
+            self.workers[modem.port] = ModemWorker(modem)
+        self._started = False
+
+    @classmethod
+    def discover(cls, modem_class=SIM7600SMS, categorizer: Optional[SerialPortCategorizer] = None,
+                 **kwargs) -> 'ModemFleet':
+        """Crée une flotte avec un modem par port AT détecté (kwargs transmis au constructeur du modem)."""
+        categorizer = categorizer or SerialPortCategorizer()
+        ports = categorizer.get_all_ports("at")
+        logging.info(f"{len(ports)} module(s) SIM7600 détecté(s) : {', '.join(ports)}")
+        return cls(modem_class(port, **kwargs) for port in ports)
+
+    def __len__(self):
+        return len(self.workers)
+
+    def __enter__(self):
+        self.open_all()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+        return False
+
+    @property
+    def modems(self) -> List[SIM7600SMS]:
+        return [worker.modem for worker in self.workers.values()]
+
+    def start(self):
+        if not self._started:
+            for worker in self.workers.values():
+                worker.start()
+            self._started = True
+
+    def open_all(self) -> Dict[str, bool]:
+        """
+        Ouvre tous les ports en parallèle et vérifie les cartes SIM. Les modems qui ne
+        répondent pas sont retirés de la flotte.
+
+        Returns:
+            dict: {port: carte SIM prête}
+        """
+        self.start()
+        results = self.gather(_open_modem)
+        for port, error in list(results.items()):
+            if isinstance(error, Exception):
+                logging.error(f"Modem {port} retiré de la flotte : {error}")
+                self.workers.pop(port).stop()
+        return {port: ready for port, ready in results.items() if not isinstance(ready, Exception)}
+
+    def close_all(self):
+        """Ferme tous les ports après les tâches en cours puis arrête les threads."""
+        if self._started:
+            self.gather(lambda modem: modem.close_connection())
+            for port, worker in self.workers.items():
+                worker.stop()
+                # Un thread ne peut être démarré qu'une fois : prépare une réouverture
+                self.workers[port] = ModemWorker(worker.modem)
+            self._started = False
+
+    def submit(self, port: str, task: Callable[..., Any], *args, **kwargs) -> Future:
+        """Exécute task(modem, *args, **kwargs) sur le modem du port donné."""
+        self.start()
+        return self.workers[port].submit(task, *args, **kwargs)
+
+    def submit_all(self, task: Callable[..., Any], *args, **kwargs) -> Dict[str, Future]:
+        """Soumet la même tâche à tous les modems ; retourne {port: Future}."""
+        self.start()
+        return {port: worker.submit(task, *args, **kwargs) for port, worker in self.workers.items()}
+
+    def gather(self, task: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Exécute la tâche sur tous les modems en parallèle et attend les résultats.
+
+        Returns:
+            dict: {port: résultat}, ou l'exception levée par la tâche sur ce port.
+        """
+        futures = self.submit_all(task, *args, **kwargs)
+        wait(futures.values(), timeout)
+        results = {}
+        for port, future in futures.items():
+            if not future.done():
+                results[port] = TimeoutError(f"Aucune réponse du modem {port}")
+            elif future.exception() is not None:
+                results[port] = future.exception()
+            else:
+                results[port] = future.result()
+        return results
+
+    def least_loaded(self) -> ModemWorker:
+        """Retourne le worker ayant le moins de tâches en attente (puis le moins sollicité)."""
+        if not self.workers:
+            raise SerialException("Aucun modem disponible dans la flotte.")
+        return min(self.workers.values(), key=lambda worker: (worker.load, worker.completed + worker.failed))
+
+    def send_sms(self, phone_number: str, message: str) -> Future:
+        """Envoie un SMS par le modem le moins chargé ; le Future donne la réponse de send_sms."""
+        self.start()
+        return self.least_loaded().submit(lambda modem: modem.send_sms(phone_number, message))
+
+    def send_many(self, messages: Iterable[tuple]) -> List[Future]:
+        """Répartit des (numéro, message) entre les modems au fil de leur charge."""
+        return [self.send_sms(phone_number, message) for phone_number, message in messages]
+
+    def gather_status(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Retourne l'état d'enregistrement réseau de chaque modem (ou l'exception rencontrée)."""
+        return self.gather(_modem_status, timeout=timeout)
+
+    def broadcast(self, command: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Envoie la même commande AT (configuration) à tous les modems ; retourne {port: ATResponse}."""
+        return self.gather(lambda modem: modem.execute_command(command), timeout=timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {port: {'load': worker.load, 'completed': worker.completed, 'failed': worker.failed}
+                for port, worker in self.workers.items()}
+
+
+def _open_modem(modem) -> bool:
+    if not modem.is_open():
+        modem.open_connection()
+    return modem.check_sim_card()
+
+
+def _modem_status(modem) -> Dict[str, Any]:
+    try:
+        return modem.check_network_registration()
+    except RegistrationError as e:
+        return {'registered': False, 'error': str(e)}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    with ModemFleet.discover() as fleet:
+        for port, status in fleet.gather_status(timeout=10).items():
+            logging.info(f"{port}: {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import ResponseParsers
+from ResponseParsers import Registration, SignalQuality
+
+# Activation des rapports côté module : commande -> commande de désactivation
+REPORTING_COMMANDS = {
+    'AT+CREG=2': 'AT+CREG=0',
+    'AT+CEREG=2': 'AT+CEREG=0',
+    'AT+AUTOCSQ=1,1': 'AT+AUTOCSQ=0,0',
+}
+
+# Requête de scrutation : un seul aller-retour série
+POLL_COMMAND = 'AT+CREG?;+CEREG?;+CSQ'
+
+# Préfixe d'URC -> champ de NetworkState
+_FIELDS = {'+CREG': 'registration', '+CEREG': 'eps_registration', '+CSQ': 'signal'}
+
+
+class NetworkState(NamedTuple):
+    """État courant de l'enregistrement et du signal, remplacé (jamais modifié) à chaque mise à jour."""
+    registration: Optional[Registration] = None
+    eps_registration: Optional[Registration] = None
+    signal: Optional[SignalQuality] = None
+    updated_at: float = 0.0
+
+    @property
+    def registered(self) -> bool:
+        return any(reg is not None and reg.registered for reg in (self.registration, self.eps_registration))
+
+    @property
+    def dbm(self) -> Optional[int]:
+        return self.signal.dbm if self.signal is not None else None
+
+
+StateCallback = Callable[[NetworkState, Tuple[str, ...]], None]
+
+
+class NetworkMonitor:
+    """
+    Suit l'enregistrement réseau et le niveau de signal d'un modem.
+
+    Le module signale lui-même les changements (AT+CREG=2, AT+CEREG=2, AT+AUTOCSQ=1,1) ;
+    les URC reçues mettent à jour l'état en mémoire. Une scrutation de secours
+    (AT+CREG?;+CEREG?;+CSQ) s'espace tant que les valeurs sont stables, et ne tourne
+    qu'à max_interval lorsque tous les rapports sont actifs. Les abonnés ne sont notifiés
+    que des changements ; pour le signal, seulement au-delà de hysteresis_db.
+    """
+
+    def __init__(self, modem, hysteresis_db: int = 4, min_interval: float = 2.0, max_interval: float = 60.0,
+                 backoff: float = 2.0):
+        self.modem = modem
+        self.hysteresis_db = hysteresis_db
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.reporting: Dict[str, bool] = {}
+        self.polls = 0
+        self.urc_updates = 0
+        self._state = NetworkState()
+        self._notified_dbm: Optional[int] = None
+        self._subscribers: List[StateCallback] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> NetworkState:
+        return self._state
+
+    @property
+    def event_driven(self) -> bool:
+        """Vrai si le module signale lui-même tous les changements suivis."""
+        return bool(self.reporting) and all(self.reporting.values())
+
+    def subscribe(self, callback: StateCallback):
+        """Abonne callback(state, changed) ; changed contient les champs modifiés ('registration', 'signal'...)."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: StateCallback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self) -> NetworkState:
+        """Active les rapports du module, lit l'état initial et démarre la scrutation de secours."""
+        if self._thread is not None:
+            return self._state
+        self.modem.start_urc_reader()
+        for prefix in _FIELDS:
+            self.modem.subscribe_urc(prefix, self._on_urc)
+        self.modem.subscribe_urc("RDY", self._on_module_restart)
+        self.enable_reporting()
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"NetworkMonitor-{self.modem.port}", daemon=True)
+        self._thread.start()
+        return self._state
+
+    def stop(self, disable_reporting: bool = True):
+        """Arrête la scrutation, se désabonne des URC et rétablit la configuration des rapports."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        for prefix in _FIELDS:
+            self.modem.unsubscribe_urc(prefix, self._on_urc)
+        self.modem.unsubscribe_urc("RDY", self._on_module_restart)
+        if disable_reporting and self.modem.is_open():
+            for command, enabled in self.reporting.items():
+                if enabled:
+                    self.modem.execute_command(REPORTING_COMMANDS[command])
+        self.reporting = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def enable_reporting(self) -> Dict[str, bool]:
+        """Envoie les commandes de rapport ; un firmware qui en refuse une reste couvert par la scrutation."""
+        for command in REPORTING_COMMANDS:
+            result = self.modem.execute_command(command)
+            self.reporting[command] = result.success
+            if not result.success:
+                logging.warning(f"{command} refusée ({result.final_line or 'délai dépassé'}), scrutation conservée.")
+        return self.reporting
+
+    def poll(self) -> bool:
+        """Lit CREG, CEREG et CSQ en un aller-retour ; retourne vrai si l'état a changé."""
+        result = self.modem.execute_command(POLL_COMMAND)
+        self.polls += 1
+        if not result.success:
+            logging.warning(f"Scrutation réseau sans réponse ({result.final_line or 'délai dépassé'}).")
+            return False
+        updates = {}
+        for prefix, field in _FIELDS.items():
+            record = ResponseParsers.parse_response(result, prefix)
+            if record is not None:
+                updates[field] = record
+        return self._update(updates)
+
+    def _on_urc(self, line: str):
+        record = ResponseParsers.parse_line(line)
+        if record is None:
+            return
+        self.urc_updates += 1
+        self._update({_FIELDS[line[:line.index(':')]]: record})
+
+    def _on_module_restart(self, line: str):
+        # Le redémarrage du module efface la configuration des rapports
+        logging.info("Redémarrage du module détecté, réactivation des rapports réseau.")
+        self.enable_reporting()
+
+    def _update(self, updates: Dict[str, object]) -> bool:
+        """Applique les nouvelles valeurs et notifie les abonnés des champs réellement modifiés."""
+        with self._lock:
+            state = self._state
+            changed = []
+            for field, record in updates.items():
+                if isinstance(record, Registration):
+                    # n n'est présent que dans les réponses aux requêtes : il ne compte pas comme un changement
+                    record = record._replace(n=None)
+                if field == 'signal':
+                    if self._signal_changed(record):
+                        self._notified_dbm = record.dbm
+                        changed.append(field)
+                elif getattr(state, field) != record:
+                    changed.append(field)
+                updates[field] = record
+            self._state = state._replace(updated_at=time.time(), **updates)
+            subscribers = list(self._subscribers) if changed else []
+
+        for callback in subscribers:
+            try:
+                callback(self._state, tuple(changed))
+            except Exception as e:
+                logging.error(f"Erreur dans un abonné du moniteur réseau : {e}")
+        return bool(changed)
+
+    def _signal_changed(self, signal: SignalQuality) -> bool:
+        previous = self._notified_dbm
+        if self._state.signal is None or (previous is None) != (signal.dbm is None):
+            return True
+        return previous is not None and abs(signal.dbm - previous) >= self.hysteresis_db
+
+    def _next_interval(self, changed: bool) -> float:
+        if self.event_driven:
+            return self.max_interval
+        if changed:
+            return self.min_interval
+        return min(self.interval * self.backoff, self.max_interval)
+
+    def _run(self):
+        self.interval = self._next_interval(True)
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+            except Exception as e:
+                logging.error(f"Erreur lors de la scrutation réseau : {e}")
+                changed = False
+            self.interval = self._next_interval(changed)
@@ -0,0 +1,86 @@
+import time
+from typing import NamedTuple, Optional, Union
+
+import ResponseParsers
+from ResponseReader import ATResponse
+
+# Mode système de AT+CPSI? -> génération du réseau
+_GENERATIONS = (
+    ("NR5G", "5G"),
+    ("LTE", "4G"),
+    ("WCDMA", "3G"),
+    ("TDS", "3G"),
+    ("CDMA", "3G"),
+    ("EVDO", "3G"),
+    ("HDR", "3G"),
+    ("GSM", "2G"),
+)
+
+
+def generation_of(system_mode: str) -> str:
+    """Génération ('2G' à '5G') d'un mode système +CPSI, ou 'Inconnu'."""
+    for prefix, generation in _GENERATIONS:
+        if system_mode.startswith(prefix):
+            return generation
+    return "Inconnu"
+
+
+class NetworkSnapshot(NamedTuple):
+    """
+    État du réseau à un instant donné, construit à partir d'une seule réponse
+    AT+CPSI? (et de AT+CSQ si elle est envoyée sur la même ligne). Immuable.
+
+    rsrp, rsrq et rssi sont convertis en dBm / dB ; les champs non fournis par le mode
+    système courant (ex. rsrp hors LTE) valent None.
+    """
+    system_mode: str
+    operation_mode: str
+    mcc: Optional[int]
+    mnc: Optional[int]
+    lac: Optional[int]
+    cell_id: Optional[int]
+    band: Optional[str]
+    channel: Optional[int]
+    rsrp: Optional[float]
+    rsrq: Optional[float]
+    rssi: Optional[float]
+    sinr: Optional[int]
+    signal_dbm: Optional[int]
+    taken_at: float
+
+    @classmethod
+    def from_records(cls, cell: ResponseParsers.ServingCell,
+                     csq: Optional[ResponseParsers.SignalQuality] = None,
+                     taken_at: Optional[float] = None) -> 'NetworkSnapshot':
+        return cls(cell.system_mode, cell.operation_mode, cell.mcc, cell.mnc, cell.lac, cell.cell_id,
+                   cell.band, cell.channel, _tenths(cell.rsrp), _tenths(cell.rsrq), _tenths(cell.rssi),
+                   cell.snr, csq.dbm if csq is not None else None,
+                   taken_at if taken_at is not None else time.time())
+
+    @classmethod
+    def from_response(cls, response: Union[ATResponse, str, None],
+                      taken_at: Optional[float] = None) -> Optional['NetworkSnapshot']:
+        """Construit l'instantané depuis la réponse à AT+CPSI? (ou AT+CPSI?;+CSQ), None sans +CPSI valide."""
+        cell = ResponseParsers.parse_response(response, '+CPSI')
+        if cell is None:
+            return None
+        return cls.from_records(cell, ResponseParsers.parse_response(response, '+CSQ'), taken_at)
+
+    @property
+    def registered(self) -> bool:
+        return self.system_mode != "NO SERVICE" and self.mcc is not None
+
+    @property
+    def generation(self) -> str:
+        return generation_of(self.system_mode)
+
+    @property
+    def operator(self) -> Optional[str]:
+        """Code opérateur MCC-MNC (ex. '208-01')."""
+        if self.mcc is None or self.mnc is None:
+            return None
+        return f"{self.mcc:03d}-{self.mnc:02d}"
+
+
+def _tenths(value: Optional[int]) -> Optional[float]:
+    return value / 10 if value is not None else None
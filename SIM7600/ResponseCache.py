@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from ResponseReader import ATResponse
+
+# Durée de validité (en secondes) des réponses par commande
+DEFAULT_TTLS = {
+    # Identité du module : invariante tant que le module est alimenté
+    'ATI': math.inf,
+    'AT+CGMR': math.inf,
+    'AT+CGMI': math.inf,
+    'AT+CGSN': math.inf,
+    'AT+CGMM': math.inf,
+    'AT+CSUB': math.inf,
+    'AT+SIMCOMATI': math.inf,
+    'AT+CIMI': math.inf,
+    'AT+CICCID': math.inf,
+    # Configuration : modifiée uniquement par la commande d'écriture correspondante
+    'AT+CNMP?': 60,
+    'AT+CGDCONT?': 60,
+    # État radio : évolue en quelques secondes
+    'AT+CSQ': 2,
+    'AT+CPSI?': 2,
+    'AT+CREG?': 5,
+    'AT+CEREG?': 5,
+    'AT+CGREG?': 5,
+    'AT+COPS?': 10,
+}
+
+# Commandes qui invalident tout le cache (redémarrage, changement de mode RF...)
+RESET_COMMANDS = ('AT+CRESET', 'AT+CFUN=', 'ATZ', 'AT&F')
+
+
+def normalize_command(command: str) -> str:
+    return command.strip().upper()
+
+
+class ResponseCache:
+    """
+    Cache des réponses AT indexé par commande, avec une durée de validité par commande.
+    Seules les commandes présentes dans la table des TTL sont mises en cache.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, clock=time.monotonic):
+        self.ttls = {normalize_command(k): v for k, v in (ttls if ttls is not None else DEFAULT_TTLS).items()}
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def is_cacheable(self, command: str) -> bool:
+        return normalize_command(command) in self.ttls
+
+    def get(self, command: str) -> Optional[ATResponse]:
+        """Retourne la réponse en cache encore valide, ou None (compté comme un échec)."""
+        key = normalize_command(command)
+        if key not in self.ttls:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, command: str, result: ATResponse):
+        """Mémorise une réponse réussie pour les commandes présentes dans la table."""
+        key = normalize_command(command)
+        ttl = self.ttls.get(key)
+        if ttl is None or not result.success:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, result)
+
+    def observe(self, command: str):
+        """
+        Invalide les entrées affectées par une commande envoyée au module : tout le cache
+        pour un redémarrage (AT+CRESET, AT+CFUN=...), sinon la lecture correspondant à
+        une écriture (AT+CNMP=38 invalide AT+CNMP?).
+        """
+        key = normalize_command(command)
+        if key.startswith(RESET_COMMANDS):
+            self.clear()
+        elif "=" in key:
+            self.invalidate(key.split("=", 1)[0] + "?")
+
+    def invalidate(self, command: str):
+        with self._lock:
+            if self._entries.pop(normalize_command(command), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Vide le cache (redémarrage du module, reconnexion)."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
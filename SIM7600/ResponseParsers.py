@@ -0,0 +1,423 @@
+"""
+Registre des analyseurs de réponses AT.
+
+Chaque préfixe de réponse (+CSQ, +CREG, +COPS...) est associé à un analyseur dont les
+expressions régulières sont compilées une seule fois, au chargement du module. Les
+analyseurs reçoivent le contenu situé après « +XXX: » et retournent un enregistrement
+NamedTuple compact à champs numériques (sans dictionnaire par instance), ou None si
+la ligne n'a pas le format attendu.
+"""
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from ResponseReader import ATResponse
+
+
+class SignalQuality(NamedTuple):
+    """+CSQ: <rssi>,<ber> (rssi 0-31, 99 = inconnu)."""
+    rssi: int
+    ber: int
+
+    @property
+    def known(self) -> bool:
+        return self.rssi != 99
+
+    @property
+    def dbm(self) -> Optional[int]:
+        return self.rssi * 2 - 113 if self.rssi != 99 else None
+
+
+class Registration(NamedTuple):
+    """
+    +CREG / +CGREG / +CEREG, en réponse à la requête (n renseigné) ou en code non
+    sollicité (n = None). lac et ci sont la zone (LAC, ou TAC en LTE) et l'identifiant
+    de cellule, convertis depuis l'hexadécimal ; lac_hex et ci_hex conservent les chaînes
+    du module telles quelles (zéros de tête compris, ex. "00A1").
+    """
+    n: Optional[int]
+    stat: int
+    lac: Optional[int] = None
+    ci: Optional[int] = None
+    act: Optional[int] = None
+    lac_hex: Optional[str] = None
+    ci_hex: Optional[str] = None
+
+    @property
+    def registered(self) -> bool:
+        return self.stat in (1, 5)
+
+    @property
+    def roaming(self) -> bool:
+        return self.stat == 5
+
+
+class Operator(NamedTuple):
+    """+COPS: <mode>[,<format>,<oper>[,<AcT>]]"""
+    mode: int
+    format: Optional[int] = None
+    name: Optional[str] = None
+    act: Optional[int] = None
+
+
+class NetworkMode(NamedTuple):
+    """+CNMP: <mode> (2 automatique, 13 GSM, 14 WCDMA, 38 LTE, 71 NR)."""
+    mode: int
+
+
+class ServingCell(NamedTuple):
+    """
+    +CPSI: cellule de service. Les champs absents du mode système courant valent None ;
+    en LTE, rsrq, rsrp et rssi sont exprimés en dixièmes de dB, tels que renvoyés par le module.
+    """
+    system_mode: str
+    operation_mode: str
+    mcc: Optional[int] = None
+    mnc: Optional[int] = None
+    lac: Optional[int] = None
+    cell_id: Optional[int] = None
+    band: Optional[str] = None
+    channel: Optional[int] = None
+    rsrq: Optional[int] = None
+    rsrp: Optional[int] = None
+    rssi: Optional[int] = None
+    snr: Optional[int] = None
+
+    @property
+    def online(self) -> bool:
+        return self.system_mode != "NO SERVICE"
+
+
+class Firmware(NamedTuple):
+    """+CGMR: <revision>"""
+    revision: str
+
+
+class SubVersion(NamedTuple):
+    """+CSUB: <version> (deux lignes : sous-système puis modem)."""
+    version: str
+
+
+class SimStatus(NamedTuple):
+    """+CPIN: <code> (READY, SIM PIN, SIM PUK...)."""
+    code: str
+
+    @property
+    def ready(self) -> bool:
+        return self.code == "READY"
+
+
+class SmsHeader(NamedTuple):
+    """
+    En-tête d'un SMS en mode texte : +CMGL (index renseigné) ou +CMGR (index None).
+    date et time sont vides pour un SMS stocké non daté (STO SENT, STO UNSENT) ; length
+    n'est renseigné qu'avec AT+CSDH=1, et dcs (schéma de codage) pour +CMGR seulement.
+    """
+    index: Optional[int]
+    status: str
+    sender: str
+    alpha: str
+    date: str
+    time: str
+    length: Optional[int] = None
+    dcs: Optional[int] = None
+
+
+class PduHeader(NamedTuple):
+    """En-tête d'un SMS en mode PDU : +CMGL: <index>,<stat>,[<alpha>],<length> ou +CMGR (index None)."""
+    index: Optional[int]
+    status: int
+    alpha: str
+    length: int
+
+
+class CharacterSet(NamedTuple):
+    """+CSCS: "<chset>", jeu de caractères de l'interface en mode texte (IRA, GSM, UCS2)."""
+    name: str
+
+
+class TextModeParameters(NamedTuple):
+    """+CSMP: <fo>,<vp>,<pid>,<dcs>, paramètres des SMS envoyés ou stockés en mode texte."""
+    fo: int
+    vp: Optional[int]
+    pid: int
+    dcs: int
+
+
+class SubmitReference(NamedTuple):
+    """+CMGS: <mr>, référence attribuée au SMS envoyé."""
+    mr: int
+
+
+class NewMessage(NamedTuple):
+    """+CMTI: <mem>,<index>, SMS reçu et stocké ; +CDSI : rapport de remise stocké."""
+    storage: str
+    index: int
+
+
+class StatusReport(NamedTuple):
+    """
+    +CDS: <fo>,<mr>,[<ra>],[<tora>],<scts>,<dt>,<st>, rapport de remise en mode texte.
+    scts et discharge sont au format « 24/10/18,10:15:00+08 » ; status est TP-ST.
+    """
+    fo: int
+    mr: int
+    recipient: str
+    scts: str
+    discharge: str
+    status: int
+
+
+Parser = Callable[[str], Any]
+
+# Préfixe ('+CSQ') -> analyseur du contenu de la ligne
+PARSERS: Dict[str, Parser] = {}
+
+_CSQ_RE = re.compile(r'(\d+),(\d+)')
+_REG_RE = re.compile(r'(?:(\d+),)?(\d+)(?:,"([0-9A-Fa-f]*)","([0-9A-Fa-f]*)"(?:,(\d+))?)?')
+_COPS_RE = re.compile(r'(\d+)(?:,(\d+),"([^"]*)"(?:,(\d+))?)?')
+_INT_RE = re.compile(r'\s*(-?\d+)')
+_PLMN_RE = re.compile(r'(\d+)-(\d+)')
+_TEXT_RE = re.compile(r'\s*"?([^"\s]+)')
+_SMS_HEADER_RE = re.compile(
+    r'(?:(\d+),)?"([A-Z ]+)","([^"]*)",(?:"([^"]*)")?(?:,(?:"(\d{2}/\d{2}/\d{2}),(\d{2}:\d{2}:\d{2}[+-]\d{2})")?)?')
+# Champs ajoutés par AT+CSDH=1 à la fin d'un en-tête +CMGL : <tooa/toda>,<length>
+_CSDH_RE = re.compile(r',(\d+),(\d+)')
+# ... et à la fin d'un en-tête +CMGR : <tooa>,<fo>,<pid>,<dcs>,<sca>,<tosca>,<length>
+_CSDH_READ_RE = re.compile(r',(\d+),(\d+),(\d+),(\d+),(?:"[^"]*")?,(\d*),(\d+)')
+_CSMP_RE = re.compile(r'(\d+),(?:(\d+)|"[^"]*")?,(\d+),(\d+)')
+_PDU_HEADER_RE = re.compile(r'(?:(\d+),)?(\d),(?:"([^"]*)")?,(\d+)\s*$')
+_CMTI_RE = re.compile(r'"([A-Z]+)",(\d+)')
+_CDS_RE = re.compile(r'(\d+),(\d+),(?:"([^"]*)")?,(?:\d+)?,"([^"]*)","([^"]*)",(\d+)')
+
+
+def register_parser(*prefixes: str) -> Callable[[Parser], Parser]:
+    """Décorateur associant un analyseur à un ou plusieurs préfixes de réponse."""
+    def decorator(parser: Parser) -> Parser:
+        for prefix in prefixes:
+            PARSERS[prefix] = parser
+        return parser
+    return decorator
+
+
+def _int(field: str) -> Optional[int]:
+    match = _INT_RE.match(field)
+    return int(match.group(1)) if match else None
+
+
+def _hex(field: Optional[str]) -> Optional[int]:
+    if not field:
+        return None
+    try:
+        return int(field, 16)
+    except ValueError:
+        return None
+
+
+@register_parser('+CSQ')
+def parse_csq(payload: str) -> Optional[SignalQuality]:
+    match = _CSQ_RE.match(payload)
+    if not match:
+        return None
+    return SignalQuality(int(match.group(1)), int(match.group(2)))
+
+
+@register_parser('+CREG', '+CGREG', '+CEREG')
+def parse_registration(payload: str) -> Optional[Registration]:
+    match = _REG_RE.match(payload)
+    if not match:
+        return None
+    n, stat, lac, ci, act = match.groups()
+    return Registration(int(n) if n is not None else None, int(stat), _hex(lac), _hex(ci),
+                        int(act) if act is not None else None, lac or None, ci or None)
+
+
+@register_parser('+COPS')
+def parse_cops(payload: str) -> Optional[Operator]:
+    match = _COPS_RE.match(payload)
+    if not match:
+        return None
+    mode, fmt, name, act = match.groups()
+    return Operator(int(mode), int(fmt) if fmt is not None else None, name,
+                    int(act) if act is not None else None)
+
+
+@register_parser('+CNMP')
+def parse_cnmp(payload: str) -> Optional[NetworkMode]:
+    mode = _int(payload)
+    return NetworkMode(mode) if mode is not None else None
+
+
+@register_parser('+CPSI')
+def parse_cpsi(payload: str) -> Optional[ServingCell]:
+    fields = payload.split(',')
+    if len(fields) < 2:
+        return None
+    system_mode, operation_mode = fields[0].strip(), fields[1].strip()
+    if len(fields) < 5:
+        return ServingCell(system_mode, operation_mode)
+    plmn = _PLMN_RE.match(fields[2])
+    mcc, mnc = (int(plmn.group(1)), int(plmn.group(2))) if plmn else (None, None)
+    lac, cell_id = _hex(fields[3].strip()), _int(fields[4])
+    if system_mode.startswith("LTE") and len(fields) >= 14:
+        # LTE,Online,MCC-MNC,TAC,SCellID,PCellID,Band,EARFCN,DLBW,ULBW,RSRQ,RSRP,RSSI,RSSNR
+        return ServingCell(system_mode, operation_mode, mcc, mnc, lac, cell_id, fields[6].strip(),
+                           _int(fields[7]), _int(fields[10]), _int(fields[11]), _int(fields[12]),
+                           _int(fields[13]))
+    # GSM et WCDMA : la suite des champs varie selon le mode, seule la cellule est retenue
+    return ServingCell(system_mode, operation_mode, mcc, mnc, lac, cell_id)
+
+
+@register_parser('+CGMR')
+def parse_cgmr(payload: str) -> Optional[Firmware]:
+    match = _TEXT_RE.match(payload)
+    return Firmware(match.group(1)) if match else None
+
+
+@register_parser('+CSUB')
+def parse_csub(payload: str) -> Optional[SubVersion]:
+    match = _TEXT_RE.match(payload)
+    return SubVersion(match.group(1)) if match else None
+
+
+@register_parser('+CPIN')
+def parse_cpin(payload: str) -> Optional[SimStatus]:
+    code = payload.split(" OK", 1)[0].strip()
+    return SimStatus(code) if code else None
+
+
+def _sms_header(match: 're.Match', length: Optional[int] = None, dcs: Optional[int] = None) -> SmsHeader:
+    index, status, sender, alpha, date, time = match.groups()
+    return SmsHeader(int(index) if index is not None else None, status, sender, alpha or "", date or "",
+                     time or "", length, dcs)
+
+
+def _text_details(payload: str, start: int) -> Tuple[Optional[int], Optional[int], int]:
+    """Longueur, DCS et fin des champs ajoutés par AT+CSDH=1 (None, None, start s'il n'y en a pas)."""
+    details = _CSDH_READ_RE.match(payload, start)
+    if details:
+        return int(details.group(6)), int(details.group(4)), details.end()
+    details = _CSDH_RE.match(payload, start)
+    if details:
+        return int(details.group(2)), None, details.end()
+    return None, None, start
+
+
+@register_parser('+CMGL', '+CMGR')
+def parse_sms_header(payload: str) -> Union[SmsHeader, PduHeader, None]:
+    """En-tête en mode texte (statut entre guillemets) ou en mode PDU (statut numérique)."""
+    payload = payload.lstrip().rstrip()
+    match = _SMS_HEADER_RE.match(payload)
+    if match:
+        length, dcs, end = _text_details(payload, match.end())
+        if end != len(payload):
+            length, dcs = None, None
+        return _sms_header(match, length, dcs)
+    match = _PDU_HEADER_RE.match(payload)
+    if match:
+        index, status, alpha, length = match.groups()
+        return PduHeader(int(index) if index is not None else None, int(status), alpha or "", int(length))
+    return None
+
+
+def parse_sms_entry(payload: str) -> Optional[Tuple[SmsHeader, str]]:
+    """En-tête et texte d'une entrée « <en-tête> <texte> » de AT+CMGL au format de send_command."""
+    payload = payload.lstrip()
+    match = _SMS_HEADER_RE.match(payload)
+    if not match:
+        return None
+    length, dcs, end = _text_details(payload, match.end())
+    text = payload[end:]
+    return _sms_header(match, length, dcs), text[1:] if text[:1].isspace() else text
+
+
+@register_parser('+CSCS')
+def parse_cscs(payload: str) -> Optional[CharacterSet]:
+    match = _TEXT_RE.match(payload)
+    return CharacterSet(match.group(1).upper()) if match else None
+
+
+@register_parser('+CSMP')
+def parse_csmp(payload: str) -> Optional[TextModeParameters]:
+    match = _CSMP_RE.match(payload.lstrip())
+    if not match:
+        return None
+    fo, vp, pid, dcs = match.groups()
+    return TextModeParameters(int(fo), int(vp) if vp is not None else None, int(pid), int(dcs))
+
+
+@register_parser('+CMGS')
+def parse_cmgs(payload: str) -> Optional[SubmitReference]:
+    mr = _int(payload)
+    return SubmitReference(mr) if mr is not None else None
+
+
+@register_parser('+CMTI', '+CDSI')
+def parse_cmti(payload: str) -> Optional[NewMessage]:
+    match = _CMTI_RE.match(payload.lstrip())
+    return NewMessage(match.group(1), int(match.group(2))) if match else None
+
+
+@register_parser('+CDS')
+def parse_cds(payload: str) -> Optional[StatusReport]:
+    # En mode PDU, +CDS: <length> est suivi du PDU sur la ligne suivante : None
+    match = _CDS_RE.match(payload.lstrip())
+    if not match:
+        return None
+    fo, mr, recipient, scts, discharge, status = match.groups()
+    return StatusReport(int(fo), int(mr), recipient or "", scts, discharge, int(status))
+
+
+def parse_line(line: str) -> Any:
+    """Analyse une ligne « +XXX: ... » avec l'analyseur de son préfixe (None si inconnu ou invalide)."""
+    colon = line.find(':')
+    if colon <= 0:
+        return None
+    parser = PARSERS.get(line[:colon])
+    if parser is None:
+        return None
+    return parser(line[colon + 1:].lstrip())
+
+
+def parse_response(response: Union[ATResponse, str, None], prefix: str) -> Any:
+    """
+    Retourne l'enregistrement de la première ligne prefix (ex. '+CSQ') d'une réponse,
+    structurée (ATResponse) ou au format de send_command, ou None.
+    """
+    if not response:
+        return None
+    marker = prefix + ':'
+    if isinstance(response, ATResponse):
+        line = response.line_with(marker)
+        if line is None:
+            return None
+        payload = line[len(marker):]
+    else:
+        start = response.find(marker)
+        if start < 0:
+            return None
+        payload = response[start + len(marker):]
+    return PARSERS[prefix](payload.lstrip())
+
+
+def has_line(response: Union[ATResponse, str, None], prefix: str) -> bool:
+    """Vrai si la réponse contient une ligne prefix (ex. '+CSQ'), même illisible."""
+    if not response:
+        return False
+    marker = prefix + ':'
+    if isinstance(response, ATResponse):
+        return response.line_with(marker) is not None
+    return marker in response
+
+
+def parse_all(response: Union[ATResponse, str, None], prefix: str) -> List[Any]:
+    """Retourne les enregistrements de toutes les lignes prefix d'une réponse (ex. +CSUB, +CMGL)."""
+    if not response:
+        return []
+    parser = PARSERS[prefix]
+    marker = prefix + ':'
+    if isinstance(response, ATResponse):
+        payloads = [line[len(marker):] for line in response.lines_with((marker,))]
+    else:
+        payloads = response.split(marker)[1:]
+    records = (parser(payload.lstrip()) for payload in payloads)
+    return [record for record in records if record is not None]
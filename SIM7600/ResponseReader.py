@@ -0,0 +1,408 @@
+import re
+import time
+from enum import Enum
+from typing import Iterator, List, Optional, Tuple
+
+
+class ResultCode(Enum):
+    """Codes de résultat finaux V.250 (mode verbeux) et invite de saisie SMS."""
+    OK = "OK"
+    CONNECT = "CONNECT"
+    NO_CARRIER = "NO CARRIER"
+    ERROR = "ERROR"
+    NO_DIALTONE = "NO DIALTONE"
+    BUSY = "BUSY"
+    NO_ANSWER = "NO ANSWER"
+    CME_ERROR = "+CME ERROR"
+    CMS_ERROR = "+CMS ERROR"
+    PROMPT = ">"
+    TIMEOUT = "TIMEOUT"
+
+
+# RING n'est pas un code final : c'est un code non sollicité qui peut arriver
+# pendant l'attente de la réponse d'une commande.
+_FINAL_RESULT_RE = re.compile(
+    r'^(?:(OK|ERROR|NO CARRIER|NO DIALTONE|BUSY|NO ANSWER)|(CONNECT)(?:\s+(.*))?|\+(CME|CMS) ERROR:\s*(.*))$'
+)
+
+_SUCCESS_CODES = (ResultCode.OK, ResultCode.CONNECT, ResultCode.PROMPT)
+
+# Ligne complète contenant un code final, recherchée directement dans les octets reçus, après
+# un LF (préfixe littéral, que le moteur d'expressions régulières recherche rapidement au lieu
+# d'essayer chaque position). Le LF sentinelle de LineBuffer couvre la première ligne.
+_FINAL_CODES = rb'(OK|ERROR|NO CARRIER|NO DIALTONE|BUSY|NO ANSWER|CONNECT(?:[ \t][^\r\n]*)?|\+CM[ES] ERROR:[^\r\n]*)\r*\n'
+_FINAL_SEARCH_RE = re.compile(rb'\n' + _FINAL_CODES)
+
+# Contenu d'une ligne (sans les CR de fin) dans le corps d'une réponse
+_LINE_RE = re.compile(rb'([^\n]*?)\r*(?:\n|$)')
+
+
+def parse_final_result(line: str):
+    """
+    Identifie un code de résultat final dans une ligne de réponse.
+
+    Returns:
+        tuple: (ResultCode, détail) si la ligne est un code final, sinon (None, None).
+            Le détail contient le code d'erreur CME/CMS ou le texte suivant CONNECT.
+    """
+    if line == "OK":
+        return ResultCode.OK, None
+    match = _FINAL_RESULT_RE.match(line)
+    if not match:
+        return None, None
+    simple, connect, connect_text, error_kind, error_detail = match.groups()
+    if simple:
+        return ResultCode(simple), None
+    if connect:
+        return ResultCode.CONNECT, connect_text
+    code = ResultCode.CME_ERROR if error_kind == "CME" else ResultCode.CMS_ERROR
+    return code, error_detail.strip()
+
+
+class ATResponse:
+    """
+    Réponse complète à une commande AT, découpée en lignes.
+
+    Une réponse construite par le ResponseFramer conserve les octets reçus : les lignes
+    ne sont découpées et décodées qu'au premier accès à lines, et line_with() ne décode
+    que la ligne demandée.
+    """
+
+    # Une réponse est créée par échange AT : attributs fixes, création et accès plus rapides
+    __slots__ = ('_lines', '_raw', '_spans', '_encoding', '_errors', 'result_code', 'final_line',
+                 'error_detail', 'elapsed')
+
+    def __init__(self, lines: Optional[List[str]], result_code: ResultCode, final_line: Optional[str] = None,
+                 error_detail: Optional[str] = None, elapsed: float = 0.0, raw: bytes = b"",
+                 encoding='utf-8', errors='ignore'):
+        self._lines = lines
+        self._raw = raw
+        self._spans: Optional[List[tuple]] = None if raw else []
+        self._encoding = encoding
+        self._errors = errors
+        self.result_code = result_code
+        self.final_line = final_line
+        self.error_detail = error_detail
+        self.elapsed = elapsed
+
+    @classmethod
+    def from_buffer(cls, raw: bytes, result_code: ResultCode, final_line: Optional[str] = None,
+                    error_detail: Optional[str] = None, encoding='utf-8', errors='ignore') -> 'ATResponse':
+        """Crée une réponse à partir des octets reçus avant le code final (lignes séparées par LF)."""
+        return cls(None, result_code, final_line, error_detail, 0.0, raw, encoding, errors)
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            encoding, errors = self._encoding, self._errors
+            self._lines = [line.rstrip(b"\r").decode(encoding, errors)
+                           for line in self._raw.split(b"\n") if line.strip()]
+        return self._lines
+
+    def _line_spans(self) -> List[tuple]:
+        if self._spans is None:
+            raw = self._raw
+            self._spans = [match.span(1) for match in _LINE_RE.finditer(raw)
+                           if match.end(1) > match.start(1) and raw[match.start(1):match.end(1)].strip()]
+        return self._spans
+
+    @lines.setter
+    def lines(self, lines: List[str]):
+        self._lines = lines
+        self._raw, self._spans = b"", []
+
+    def raw_lines(self) -> List[memoryview]:
+        """Lignes de la réponse sous forme de vues sur les octets reçus (sans copie ni décodage)."""
+        if not self._raw:
+            return [memoryview(line.encode(self._encoding, self._errors)) for line in self.lines]
+        view = memoryview(self._raw)
+        return [view[start:end] for start, end in self._line_spans()]
+
+    def lines_with(self, prefixes: Tuple[str, ...]) -> List[str]:
+        """Lignes commençant par l'un des préfixes, en ne décodant que celles-ci."""
+        if self._lines is not None or not self._raw:
+            return [line for line in self.lines if line.startswith(prefixes)]
+        encoded = tuple(prefix.encode(self._encoding) for prefix in prefixes)
+        raw, encoding, errors = self._raw, self._encoding, self._errors
+        return [raw[start:end].decode(encoding, errors) for start, end in self._line_spans()
+                if raw.startswith(encoded, start)]
+
+    def joined(self) -> str:
+        """
+        Lignes non vides jointes par des espaces, sans CR (texte de send_command). Les octets
+        reçus sont décodés en une fois, sans passer par la liste des lignes.
+        """
+        if self._lines is not None or not self._raw:
+            return " ".join(self.lines).replace("\r", "")
+        text = self._raw.decode(self._encoding, self._errors).replace("\r", "").strip("\n")
+        if "\n\n" not in text:
+            # Cas courant (une ligne, ou lignes sans ligne vide intermédiaire) : un seul remplacement
+            return text.replace("\n", " ")
+        return " ".join(filter(None, text.split("\n")))
+
+    def line_with(self, prefix: str) -> Optional[str]:
+        """Première ligne commençant par prefix (ex. '+CSQ:'), en ne décodant que celle-ci."""
+        if self._lines is not None or not self._raw:
+            return next((line for line in self.lines if line.startswith(prefix)), None)
+        encoded = prefix.encode(self._encoding)
+        raw = self._raw
+        start = 0 if raw.startswith(encoded) else raw.find(b"\n" + encoded) + 1
+        if start == 0 and not raw.startswith(encoded):
+            return None
+        end = raw.find(b"\n", start)
+        line = raw[start:] if end < 0 else raw[start:end]
+        return line.rstrip(b"\r").decode(self._encoding, self._errors)
+
+    @property
+    def success(self) -> bool:
+        """Vrai si la commande s'est terminée par OK, CONNECT ou l'invite '>'."""
+        return self.result_code in _SUCCESS_CODES
+
+    @property
+    def timed_out(self) -> bool:
+        return self.result_code is ResultCode.TIMEOUT
+
+    @property
+    def error_code(self) -> Optional[int]:
+        """Code numérique d'un +CME ERROR / +CMS ERROR, si disponible."""
+        if self.error_detail and self.error_detail.isdigit():
+            return int(self.error_detail)
+        return None
+
+    def text(self) -> str:
+        """Reconstitue le texte brut de la réponse (lignes séparées par CRLF)."""
+        lines = list(self.lines)
+        if self.final_line:
+            lines.append(self.final_line)
+        return "\r\n".join(lines)
+
+    def __repr__(self):
+        return f"ATResponse({self.result_code.name}, lines={self.lines!r}, elapsed={self.elapsed:.3f}s)"
+
+
+class LineBuffer:
+    """
+    Tampon des octets reçus, découpé en lignes sans copie.
+
+    Les octets consommés ne sont pas retirés ligne par ligne (ce qui recopierait le reste
+    du tampon à chaque ligne) : un indice de début avance et le tampon n'est compacté
+    qu'une fois vide ou au-delà de compact_threshold octets consommés.
+
+    Les octets non consommés sont data[start:] ; start est toujours en début de ligne et
+    data[start - 1] est un LF (sentinelle en tête d'un tampon vide) : un motif qui commence
+    par un LF trouve aussi la première ligne, en une seule recherche.
+    next_span() retourne les bornes (début, fin) de la ligne suivante dans data, sans CR/LF ;
+    next_line() retourne une memoryview sur ces octets, à libérer avant l'appel suivant de feed().
+    """
+
+    def __init__(self, compact_threshold=4096):
+        self.compact_threshold = compact_threshold
+        self.data = bytearray(b"\n")
+        self.start = 1
+
+    def __len__(self):
+        return len(self.data) - self.start
+
+    def feed(self, data: bytes):
+        start = self.start
+        if start == len(self.data):
+            if start > 1:
+                del self.data[1:]
+                self.start = 1
+        elif start > self.compact_threshold:
+            # Le LF qui précède start devient la sentinelle
+            del self.data[:start - 1]
+            self.start = 1
+        self.data += data
+
+    def clear(self):
+        del self.data[1:]
+        self.start = 1
+
+    def next_span(self) -> Optional[tuple]:
+        data, start = self.data, self.start
+        index = data.find(b"\n", start)
+        if index < 0:
+            return None
+        end = index
+        while end > start and data[end - 1] == 13:
+            end -= 1
+        self.start = index + 1
+        return start, end
+
+    def next_line(self) -> Optional[memoryview]:
+        span = self.next_span()
+        if span is None:
+            return None
+        return memoryview(self.data)[span[0]:span[1]]
+
+    def __iter__(self):
+        """Itère sur les lignes complètes (memoryview) actuellement dans le tampon."""
+        line = self.next_line()
+        while line is not None:
+            yield line
+            line = self.next_line()
+
+    def take(self, end: int, skip_to: Optional[int] = None) -> bytearray:
+        """Copie les octets non consommés jusqu'à la position end de data, puis consomme jusqu'à skip_to."""
+        # Une seule copie : la tranche est retournée telle quelle (bytes() en ferait une seconde)
+        chunk = self.data[self.start:end]
+        self.start = end if skip_to is None else skip_to
+        return chunk
+
+    def last_line_start(self) -> int:
+        """Nombre d'octets non consommés précédant la dernière ligne incomplète."""
+        index = self.data.rfind(b"\n", self.start)
+        return index + 1 - self.start if index >= 0 else 0
+
+    def pending_startswith(self, prefix: bytes, skip=b"\r\n", offset=0) -> bool:
+        """Vrai si les octets non consommés (à partir de offset), sans les caractères skip initiaux, commencent par prefix."""
+        data, position = self.data, self.start + offset
+        while position < len(data) and data[position] in skip:
+            position += 1
+        return data.startswith(prefix, position)
+
+    def take_remaining(self) -> bytearray:
+        """Retourne et consomme les octets d'une ligne incomplète."""
+        remaining = self.data[self.start:]
+        self.clear()
+        return remaining
+
+
+class ResponseFramer:
+    """
+    Découpe un flux d'octets en lignes et assemble les réponses AT, indépendamment
+    de la façon dont les octets sont lus (lecture bloquante, asyncio, thread dédié).
+
+    Le code final est recherché directement dans les octets reçus (une expression compilée
+    par appel, à partir de la dernière ligne déjà examinée) ; les lignes qui le précèdent
+    sont copiées une seule fois et ne sont découpées et décodées qu'à la demande.
+    """
+
+    def __init__(self, encoding='utf-8', errors='ignore'):
+        self.encoding = encoding
+        self.errors = errors
+        self._buffer = LineBuffer()
+        self._scanned = 0
+
+    def reset(self):
+        """Vide le tampon interne et les lignes en attente."""
+        self._buffer.clear()
+        self._scanned = 0
+
+    def feed(self, data: bytes):
+        """Ajoute des octets reçus du port série."""
+        self._buffer.feed(data)
+
+    def pop_response(self, expect_prompt: bool = False) -> Optional[ATResponse]:
+        """
+        Retourne la réponse si un code final (ou l'invite '>' si expect_prompt) a été reçu,
+        sinon None. Les lignes déjà reçues sont conservées pour l'appel suivant.
+        """
+        # Chemin de chaque échange AT : le motif est appliqué directement au tampon. Le LF qui
+        # précède la première ligne non examinée (sentinelle au début) fait partie du motif.
+        buffer = self._buffer
+        match = _FINAL_SEARCH_RE.search(buffer.data, buffer.start - 1 + self._scanned)
+        if match is not None:
+            self._scanned = 0
+            start = match.start(1)
+            if match.end(1) - start == 2:
+                # Seul code final de deux caractères : OK, cas le plus fréquent
+                code, final_line, detail = ResultCode.OK, "OK", None
+            else:
+                final_line = match.group(1).decode(self.encoding, errors=self.errors)
+                code, detail = parse_final_result(final_line)
+            body = buffer.take(start, match.end())
+            return ATResponse(None, code, final_line, detail, 0.0, body, self.encoding, self.errors)
+
+        # Les lignes complètes examinées ne contiennent pas de code final
+        self._scanned = buffer.last_line_start()
+        if expect_prompt and buffer.pending_startswith(b">", offset=self._scanned):
+            body = buffer.take_remaining()[:self._scanned]
+            self._scanned = 0
+            return ATResponse.from_buffer(body, ResultCode.PROMPT, ">", None, self.encoding, self.errors)
+        return None
+
+    def pop_line(self) -> Optional[str]:
+        """Retourne la ligne complète suivante (décodée, sans CR/LF), sans chercher de code final."""
+        self._scanned = 0
+        span = self._buffer.next_span()
+        if span is None:
+            return None
+        return self._buffer.data[span[0]:span[1]].decode(self.encoding, errors=self.errors)
+
+    def flush_timeout(self) -> ATResponse:
+        """Termine la réponse en cours sur expiration du délai, en conservant la ligne incomplète."""
+        self._scanned = 0
+        return ATResponse.from_buffer(self._buffer.take_remaining().strip(), ResultCode.TIMEOUT, None, None,
+                                      self.encoding, self.errors)
+
+
+class ResponseReader:
+    """
+    Lit le port série jusqu'à ce qu'un code de résultat final (OK, ERROR, +CME ERROR,
+    +CMS ERROR, NO CARRIER, ...) ou l'invite SMS '>' soit reçu, au lieu d'attendre
+    l'expiration du délai du port série.
+    """
+
+    def __init__(self, serial_conn, encoding='utf-8', errors='ignore'):
+        self.serial_conn = serial_conn
+        self.framer = ResponseFramer(encoding, errors)
+        self.bytes_read = 0
+
+    def reset(self):
+        """Vide le tampon interne (octets reçus mais non encore consommés)."""
+        self.framer.reset()
+
+    def _fill(self):
+        """Lit les octets disponibles, ou bloque au plus le délai du port pour un octet."""
+        waiting = self.serial_conn.in_waiting
+        chunk = self.serial_conn.read(waiting or 1)
+        if chunk:
+            self.bytes_read += len(chunk)
+            self.framer.feed(chunk)
+        return len(chunk)
+
+    def read(self, timeout: Optional[float] = None, expect_prompt: bool = False) -> ATResponse:
+        """
+        Lit une réponse complète.
+
+        Args:
+            timeout: Durée maximale d'attente en secondes (par défaut le délai du port).
+            expect_prompt: Si vrai, l'invite '>' (AT+CMGS, AT+CMGW) termine la lecture.
+
+        Returns:
+            ATResponse: La réponse structurée. En cas d'expiration, result_code vaut TIMEOUT
+            et les lignes reçues (y compris une ligne incomplète) sont conservées.
+        """
+        if timeout is None:
+            timeout = self.serial_conn.timeout
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+
+        while True:
+            result = self.framer.pop_response(expect_prompt)
+            if result is None and deadline is not None and time.monotonic() >= deadline:
+                result = self.framer.flush_timeout()
+            if result is not None:
+                result.elapsed = time.monotonic() - start
+                return result
+            self._fill()
+
+    def iter_lines(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Produit les lignes au fil de leur réception, lignes vides comprises (elles peuvent
+        appartenir au texte d'un SMS), sans interpréter les codes finaux : c'est à l'appelant
+        d'arrêter l'itération. Se termine après timeout secondes (par défaut le délai du port).
+        """
+        if timeout is None:
+            timeout = self.serial_conn.timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            line = self.framer.pop_line()
+            while line is not None:
+                yield line
+                line = self.framer.pop_line()
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            self._fill()
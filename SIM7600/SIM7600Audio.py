@@ -1,5 +1,4 @@
 import serial
-import pyaudio
 
 from SerialPortCategorizer import SerialPortCategorizer
 
@@ -11,8 +10,11 @@ class SIM7600Audio:
         self.s_AT = serial.Serial(at_port, baudrate)
         self.s_Audio = serial.Serial(audio_port, baudrate)
 
-        # Initialisation de PyAudio
+        # Initialisation de PyAudio (chargé seulement à l'utilisation de l'audio)
+        import pyaudio
+
         self.p = pyaudio.PyAudio()
+        self.pa_continue = pyaudio.paContinue
 
     def send_at_command(self, command):
         """Envoie une commande AT et retourne la réponse."""
@@ -54,7 +56,7 @@ class SIM7600Audio:
     def pcm_out(self, in_data, frame_count, time_info, status):
         """Callback pour rediriger le flux audio vers le module."""
         self.s_Audio.write(in_data)
-        return (in_data, pyaudio.paContinue)
+        return (in_data, self.pa_continue)
 
     def close(self):
         """Ferme les ports série et les flux audio."""
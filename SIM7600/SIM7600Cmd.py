@@ -1,13 +1,20 @@
-import re
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Union
 
 import serial
 from serial import SerialException
 
 from enum import Enum
 import logging
-import colorlog
+
+from ResponseReader import ResponseReader, ATResponse
+from URCDispatcher import URCDispatcher, URCReaderThread, command_prefixes
+from ResponseCache import ResponseCache
+from CommandMetrics import CommandMetrics, traced
+from CommandTimeouts import CommandTimeouts
+import ResponseParsers
+from NetworkSnapshot import NetworkSnapshot
 
 
 class NetworkStatus(Enum):
@@ -30,10 +37,46 @@ class NetworkStatus(Enum):
 #     LTE = 7
 #     NR = 8  # 5G New Radio
 
+class AccessTechnology(Enum):
+    # Valeurs <AcT> de +CREG, +CGREG, +CEREG et +COPS (3GPP TS 27.007)
+    GSM = 0
+    GSM_COMPACT = 1
+    UTRAN = 2
+    EDGE = 3
+    HSDPA = 4
+    HSUPA = 5
+    HSPA = 6
+    LTE = 7
+    EC_GSM_IOT = 8
+    NB_IOT = 9
+    LTE_5GCN = 10
+    NR = 11
+    NG_RAN = 12
+    LTE_NR = 13  # 5G NSA (EN-DC)
+
+
 class RegistrationError(Exception):
     pass
 
 
+# Longueur maximale d'une ligne de commandes concaténées envoyée au module
+BATCH_MAX_LENGTH = 256
+
+# Requêtes nécessaires au statut réseau, regroupées en une seule ligne AT
+REGISTRATION_COMMANDS = ['AT+CREG?', 'AT+CEREG?', 'AT+CSQ', 'AT+COPS?']
+# Instantané réseau : cellule de service et niveau de signal sur une seule ligne AT
+NETWORK_SNAPSHOT_COMMANDS = ['AT+CPSI?', 'AT+CSQ']
+
+# Attente maximale d'un octet sur le port : borne le dépassement du délai d'une commande
+SERIAL_READ_TIMEOUT = 0.1
+
+# Débits UART candidats pour AT+IPR, du plus rapide au plus lent
+UART_BAUDRATES = (3000000, 921600, 460800, 230400, 115200, 57600, 38400, 19200, 9600)
+
+
+_ACCESS_TECHNOLOGIES = {act.value for act in AccessTechnology}
+
+
 class NetworkType(Enum):
     G2 = 13  # GSM only
     G3 = 14  # WCDMA only
@@ -42,20 +85,22 @@ class NetworkType(Enum):
     AUTO = 2  # Automatic
 
 
-# Configuration du logging
-def setup_logging():
+# Configuration du logging, à appeler par l'application (les modules ne la modifient pas à l'import)
+def setup_logging(level=logging.DEBUG):
+    import colorlog
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    if any(getattr(handler, '_sim7600', False) for handler in logger.handlers):
+        return
     handler = colorlog.StreamHandler()
     formatter = colorlog.ColoredFormatter(
         '%(log_color)s%(asctime)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     handler.setFormatter(formatter)
-    logger = logging.getLogger()
+    handler._sim7600 = True
     logger.addHandler(handler)
-    logger.setLevel(logging.DEBUG)
-
-
-setup_logging()
 
 
 class SIM7600Cmd:
@@ -65,19 +110,62 @@ class SIM7600Cmd:
         self.timeout = timeout
         self.serial_conn = None
         self.echo = True
+        self.last_result: Optional[ATResponse] = None
+        self._reader: Optional[ResponseReader] = None
+        self.urc_dispatcher = URCDispatcher()
+        self.urc_reader: Optional[URCReaderThread] = None
+        self.cache: Optional[ResponseCache] = None
+        self.metrics: Optional[CommandMetrics] = None
+        # Délai par famille de commandes ; timeout reste la valeur des commandes absentes de la table
+        self.timeouts = CommandTimeouts()
+        # Verrou du port : un échange AT (ou une séquence, ex. invite CMGS + texte) à la fois
+        self.lock = threading.RLock()
         logging.info(f"Initialisation de SIM7600 sur le port {port}.")
 
     def set_echo_command(self, b_echo):
         self.echo = b_echo
 
+    def enable_cache(self, ttls: Optional[Dict[str, float]] = None) -> ResponseCache:
+        """
+        Active le cache des réponses : les requêtes listées dans la table des TTL
+        (identité du module, CSQ, CPSI...) ne génèrent plus de trafic série tant
+        que leur réponse est valide.
+        """
+        self.cache = ResponseCache(ttls)
+        self.subscribe_urc("RDY", self._on_module_restart)
+        return self.cache
+
+    def disable_cache(self):
+        self.unsubscribe_urc("RDY", self._on_module_restart)
+        self.cache = None
+
+    def enable_metrics(self, metrics: Optional[CommandMetrics] = None) -> CommandMetrics:
+        """
+        Active la mesure des échanges AT (latence, expirations, erreurs, octets par verbe)
+        et des opérations de haut niveau. Une même instance de CommandMetrics peut être
+        partagée entre plusieurs modems.
+        """
+        self.metrics = metrics if metrics is not None else CommandMetrics()
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
+
+    def _on_module_restart(self, line):
+        if self.cache is not None:
+            logging.info("Redémarrage du module détecté, cache des réponses vidé.")
+            self.cache.clear()
+
     def open_connection(self):
         """Ouvre la connexion série."""
         try:
             self.serial_conn = serial.Serial(
                 port=self.port,
                 baudrate=self.baudrate,
-                timeout=self.timeout
+                timeout=min(self.timeout, SERIAL_READ_TIMEOUT)
             )
+            if self.cache is not None:
+                self.cache.clear()
             logging.info(f"Connexion établie sur le port {self.port}.")
         except SerialException as e:
             logging.error(f"Erreur lors de l'ouverture du port {self.port}")
@@ -85,32 +173,285 @@ class SIM7600Cmd:
 
     def close_connection(self):
         """Ferme la connexion série."""
+        self.stop_urc_reader()
+        if self.cache is not None:
+            self.cache.clear()
         if self.serial_conn and self.serial_conn.is_open:
             self.serial_conn.close()
             logging.info(f"Connexion fermée sur le port {self.port}.")
 
-    def send_command(self, command, show=False, raw=False):
+    def _set_host_baudrate(self, rate) -> bool:
+        """Change le débit du port hôte ; faux si le pilote ne le supporte pas."""
+        try:
+            self.serial_conn.baudrate = rate
+        except (ValueError, SerialException) as e:
+            logging.debug(f"Débit {rate} refusé par le port {self.port}: {e}")
+            return False
+        self.serial_conn.reset_input_buffer()
+        self.get_reader().reset()
+        return True
+
+    def _answers_at(self, rate, timeout) -> bool:
+        """Vrai si le module répond OK à AT au débit donné (deux essais)."""
+        if not self._set_host_baudrate(rate):
+            return False
+        # Le premier caractère reçu après un changement de débit est souvent perdu
+        return any(self.execute_command("AT", deadline=timeout).success for _ in range(2))
+
+    def probe_baudrate(self, rates=UART_BAUDRATES, timeout=0.3) -> Optional[int]:
+        """Cherche le débit auquel le module répond, en commençant par le débit courant du port."""
+        for rate in dict.fromkeys((self.serial_conn.baudrate,) + tuple(rates)):
+            if self._answers_at(rate, timeout):
+                return rate
+        return None
+
+    def negotiate_baudrate(self, max_rate=3000000, rates=UART_BAUDRATES, timeout=0.3, settle=0.05) -> int:
+        """
+        Passe l'UART au débit le plus élevé supporté par le port hôte et par le module.
+
+        Le débit courant est d'abord détecté, puis chaque débit candidat (du plus rapide
+        au plus lent, au plus max_rate) est demandé par AT+IPR et vérifié par AT. Si le module
+        ne répond pas au nouveau débit, il est retrouvé par sondage et le candidat suivant est
+        essayé. Sans effet utile sur les ports USB CDC, dont le débit n'est pas significatif.
+
+        Returns:
+            int: Le débit retenu, également conservé dans self.baudrate.
+
+        Raises:
+            SerialException: Si le module ne répond à aucun débit.
+        """
+        if not self.serial_conn or not self.serial_conn.is_open:
+            raise SerialException("Le port série n'est pas ouvert.")
+        if self.urc_reader is not None:
+            raise SerialException("Arrêtez le lecteur d'URC avant de changer de débit.")
+
+        with self.lock:
+            return self._negotiate_baudrate(max_rate, rates, timeout, settle)
+
+    def _negotiate_baudrate(self, max_rate, rates, timeout, settle) -> int:
+        current = self.probe_baudrate(rates, timeout)
+        if current is None:
+            raise SerialException(f"Le module ne répond à aucun débit sur le port {self.port}.")
+        logging.info(f"Débit courant du module : {current} bauds.")
+
+        for rate in rates:
+            if rate > max_rate:
+                continue
+            if rate <= current:
+                break
+            # Le port hôte doit accepter ce débit avant de le demander au module
+            if not self._set_host_baudrate(rate):
+                continue
+            self._set_host_baudrate(current)
+            if not self.execute_command(f"AT+IPR={rate}").success:
+                logging.debug(f"Débit {rate} refusé par le module.")
+                continue
+            time.sleep(settle)
+            if self._answers_at(rate, timeout):
+                current = rate
+                break
+
+            logging.warning(f"Pas de réponse à {rate} bauds, recherche du débit du module.")
+            recovered = self.probe_baudrate(rates, timeout)
+            if recovered is None:
+                raise SerialException(f"Module perdu après AT+IPR={rate} sur le port {self.port}.")
+            current = recovered
+            if recovered == rate:
+                break
+
+        self._set_host_baudrate(current)
+        self.baudrate = current
+        logging.info(f"Débit UART négocié : {current} bauds.")
+        return current
+
+    def start_urc_reader(self):
+        """
+        Démarre le thread lecteur qui devient seul propriétaire du flux série : les réponses
+        sont routées vers la commande en cours et les URC (+CMTI, RING, VOICE CALL...) vers
+        les abonnés enregistrés avec subscribe_urc.
+        """
+        if not self.serial_conn or not self.serial_conn.is_open:
+            raise SerialException("Le port série n'est pas ouvert.")
+        if self.urc_reader is None:
+            self.urc_dispatcher.reset()
+            self.urc_reader = URCReaderThread(self.serial_conn, self.urc_dispatcher)
+            self.urc_reader.start()
+
+    def stop_urc_reader(self):
+        if self.urc_reader is not None:
+            self.urc_reader.stop()
+            self.urc_reader = None
+
+    def subscribe_urc(self, prefix, callback):
+        """Abonne callback(line) aux codes non sollicités commençant par prefix."""
+        self.urc_dispatcher.subscribe(prefix, callback)
+
+    def unsubscribe_urc(self, prefix, callback):
+        self.urc_dispatcher.unsubscribe(prefix, callback)
+
+    def send_command(self, command, show=False, raw=False, expect_prompt=False, deadline=None):
         """Envoie une commande AT et attend la réponse."""
+        result = self.execute_command(command, expect_prompt=expect_prompt, deadline=deadline)
+        return self.format_response(result, show=show, raw=raw)
+
+    def execute_command(self, command, expect_prompt=False, terminator='\r\n', deadline=None) -> ATResponse:
+        """
+        Envoie une commande AT et retourne la réponse structurée (lignes et code final).
+
+        Le délai d'attente est celui de la famille de la commande (self.timeouts), ou deadline
+        s'il est fourni, limité au temps restant d'une operation_deadline englobante.
+        """
         if not self.serial_conn or not self.serial_conn.is_open:
             raise SerialException("Le port série n'est pas ouvert.")
 
+        if self.cache is not None:
+            cached = self.cache.get(command)
+            if cached is not None:
+                self.last_result = cached
+                return cached
+            self.cache.observe(command)
+
         # Envoyer la commande AT
         if self.echo:
             logging.info(f"Envoi de la commande: {command}")
 
-        self.serial_conn.write((command + '\r\n').encode('utf-8', errors='ignore'))
-
-        return self.read_response(show=show, raw=raw)
+        timeout = self.timeouts.timeout_for(command, self.timeout, deadline)
+        data = (command + terminator).encode('utf-8', errors='ignore')
+        with self.lock:
+            if self.urc_reader is not None:
+                received = self.urc_dispatcher.bytes_received
+                result = self._record_result(self.urc_reader.transact(data, command, timeout, expect_prompt))
+                received = self.urc_dispatcher.bytes_received - received
+            else:
+                reader = self.get_reader()
+                received = reader.bytes_read
+                self.serial_conn.write(data)
+                result = self.read_result(expect_prompt=expect_prompt, timeout=timeout)
+                received = reader.bytes_read - received
+
+        self.timeouts.observe(command, result.elapsed, result.timed_out)
+        if self.metrics is not None:
+            self.metrics.record(self.port, command, result, len(data), received)
+        if self.cache is not None:
+            self.cache.store(command, result)
+        return result
+
+    def get_reader(self) -> ResponseReader:
+        """Retourne le lecteur de réponses associé à la connexion série courante."""
+        if self._reader is None or self._reader.serial_conn is not self.serial_conn:
+            self._reader = ResponseReader(self.serial_conn)
+        return self._reader
+
+    def read_result(self, expect_prompt=False, timeout=None) -> ATResponse:
+        """Lit la réponse jusqu'au code de résultat final (OK, ERROR, +CME/+CMS ERROR, '>'...)."""
+        timeout = timeout if timeout is not None else self.timeout
+        return self._record_result(self.get_reader().read(timeout=timeout, expect_prompt=expect_prompt))
+
+    def _record_result(self, result: ATResponse) -> ATResponse:
+        if result.timed_out:
+            logging.warning(f"Aucun code de résultat final reçu après {result.elapsed:.1f}s.")
+        elif not result.success:
+            logging.debug(f"Commande terminée par {result.final_line}")
+        self.last_result = result
+        return result
+
+    def read_response(self, show=False, raw=False, expect_prompt=False):
+        return self.format_response(self.read_result(expect_prompt=expect_prompt), show=show, raw=raw)
+
+    @staticmethod
+    def format_response(result: ATResponse, show=False, raw=False):
+        """
+        Convertit une réponse structurée au format texte historique de send_command : lignes
+        jointes par des espaces (CRLF si raw), sans le code final OK sauf si show. Le texte
+        des lignes n'est pas modifié (un SMS contenant « OK » reste intact) ; les lignes
+        restent disponibles séparément dans result.lines.
+        """
+        final_line = result.final_line if result.final_line and (show or result.final_line != "OK") else None
+        if raw:
+            lines = result.lines
+            return "\r\n".join(lines + [final_line] if final_line else lines)
+        text = result.joined()
+        if final_line:
+            text = f"{text} {final_line}" if text else final_line
+        return text.rstrip()
+
+    @staticmethod
+    def join_batch(commands: List[str]) -> str:
+        """Concatène des commandes étendues en une ligne : ['AT+CSQ', 'AT+COPS?'] -> 'AT+CSQ;+COPS?'."""
+        parts = []
+        for command in commands:
+            if not command.upper().startswith("AT+"):
+                raise ValueError(f"Seules les commandes étendues (AT+...) peuvent être regroupées : {command}")
+            parts.append(command[2:])
+        return "AT" + ";".join(parts)
+
+    @staticmethod
+    def split_batch_result(commands: List[str], result: ATResponse) -> Dict[str, Optional[ATResponse]]:
+        """
+        Répartit la réponse d'une ligne concaténée entre les commandes, d'après le préfixe
+        de chaque ligne (+CSQ:, +COPS:...) : chaque commande reçoit une réponse structurée
+        réduite à ses lignes, seules décodées. Le module interrompt la ligne à la première
+        erreur : les commandes sans réponse valent alors None.
+        """
+        responses: Dict[str, Optional[ATResponse]] = {}
+        for command in commands:
+            lines = result.lines_with(tuple(prefix + ":" for prefix in command_prefixes(command)))
+            if lines or result.success:
+                responses[command] = ATResponse(lines, result.result_code, result.final_line, result.error_detail,
+                                                result.elapsed)
+            else:
+                responses[command] = None
+        return responses
 
-    def read_response(self, show=False, raw=False):
-        response = self.serial_conn.read_until(b"OK\r\n").decode('utf-8')
-        if not show:
-            response = response.replace("OK", "")
-        if not raw:
-            response = self.clean_message(response)
-        return response
+    @classmethod
+    def split_batch_response(cls, commands: List[str], result: ATResponse) -> Dict[str, Optional[str]]:
+        """Comme split_batch_result, au format de send_command (lignes jointes par des espaces)."""
+        return {command: response.joined() if response is not None else None
+                for command, response in cls.split_batch_result(commands, result).items()}
 
-    def clean_message(self, message):
+    def execute_batch(self, commands: List[str]) -> Dict[str, Optional[ATResponse]]:
+        """
+        Envoie plusieurs commandes étendues en un minimum d'allers-retours
+        (AT+CSQ;+COPS?;+CREG?) et retourne la réponse structurée de chacune (voir split_batch_result).
+        """
+        responses: Dict[str, Optional[ATResponse]] = {}
+        pending = []
+        for command in commands:
+            cached = self.cache.get(command) if self.cache is not None else None
+            if cached is not None:
+                responses[command] = cached
+            else:
+                pending.append(command)
+
+        for chunk in self._batch_chunks(pending):
+            result = self.execute_command(self.join_batch(chunk))
+            chunk_responses = self.split_batch_result(chunk, result)
+            if self.cache is not None:
+                for command, response in chunk_responses.items():
+                    if response is not None:
+                        self.cache.store(command, response)
+            responses.update(chunk_responses)
+        return responses
+
+    def send_batch(self, commands: List[str]) -> Dict[str, Optional[str]]:
+        """Comme execute_batch, avec la réponse de chaque commande au format de send_command."""
+        return {command: response.joined() if response is not None else None
+                for command, response in self.execute_batch(commands).items()}
+
+    @classmethod
+    def _batch_chunks(cls, commands: List[str]) -> List[List[str]]:
+        chunks, current = [], []
+        for command in commands:
+            if current and len(cls.join_batch(current + [command])) > BATCH_MAX_LENGTH:
+                chunks.append(current)
+                current = []
+            current.append(command)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def clean_message(message):
         response = message.replace("\r", "")
         response = response.rstrip()
         response = response.split("\n")
@@ -137,28 +478,41 @@ class SIM7600Cmd:
 
     def get_signal_quality(self):
         """Récupère la qualité du signal en dBm et l'interprète."""
-        response = self.send_command('AT+CSQ')
-        if "+CSQ: " in response:
-            response = self.clean_message(response)
-            csq_values = response.split("+CSQ: ")[1].split(",")
-            if len(csq_values) < 2:
-                return "Erreur: Réponse invalide"
-            signal_quality = int(csq_values[0])
-            if signal_quality == 99:
+        return self.parse_signal_quality(self.execute_command('AT+CSQ'))
+
+    @staticmethod
+    def parse_signal_quality(response: Union[ATResponse, str, None]):
+        """
+        Interprète la réponse de la commande AT+CSQ, structurée (seule la ligne +CSQ est
+        décodée) ou au format de send_command.
+        """
+        csq = ResponseParsers.parse_response(response, '+CSQ')
+        if csq is not None:
+            if not csq.known:
                 return "Signal inconnu"
-            else:
-                dbm = signal_quality * 2 - 113
-                if dbm >= -70:
-                    quality = "Excellent"
-                elif dbm >= -85:
-                    quality = "Bon"
-                elif dbm >= -100:
-                    quality = "Faible"
-                else:
-                    quality = "Très faible"
-                return dbm, quality
-        else:
-            return "Erreur: Impossible de récupérer la qualité du signal"
+            return csq.dbm, SIM7600Cmd.signal_quality_label(csq.dbm)
+        if ResponseParsers.has_line(response, '+CSQ'):
+            return "Erreur: Réponse invalide"
+        return "Erreur: Impossible de récupérer la qualité du signal"
+
+    @staticmethod
+    def signal_quality_label(dbm: int) -> str:
+        """Libellé de la qualité d'un signal exprimé en dBm."""
+        if dbm >= -70:
+            return "Excellent"
+        elif dbm >= -85:
+            return "Bon"
+        elif dbm >= -100:
+            return "Faible"
+        return "Très faible"
+
+    def query(self, command: str, prefix: Optional[str] = None):
+        """
+        Envoie une requête et retourne l'enregistrement typé de sa réponse (voir ResponseParsers),
+        ex. query('AT+CSQ') -> SignalQuality(rssi=20, ber=99), ou None sans réponse exploitable.
+        """
+        prefix = prefix or command_prefixes(command)[0]
+        return ResponseParsers.parse_response(self.execute_command(command), prefix)
 
     def get_operator_info(self):
         """Récupère des informations sur l'opérateur."""
@@ -183,28 +537,36 @@ class SIM7600Cmd:
             logging.warning(f"Erreur lors de la configuration du mode réseau {network_type.name}")
 
     def get_current_network_mode(self):
-        response = self.send_command('AT+CNMP?')
+        return self.parse_network_mode(self.send_command('AT+CNMP?'))
 
+    @staticmethod
+    def parse_network_mode(response):
+        """Interprète la réponse de la commande AT+CNMP?"""
         # La réponse typique sera sous la forme "+CNMP: <mode>"
         if '+CNMP:' in response:
-            response = response.replace("OK", "")
-            mode = response.split(':')[1].strip()
-            mode = int(mode)  # Convertir en entier
+            record = ResponseParsers.parse_response(response, '+CNMP')
+            if record is None:
+                logging.error("Erreur lors de la récupération du mode réseau")
+                return None
 
             # Mapper la valeur du mode à l'énumération NetworkType
             for network_type in NetworkType:
-                if network_type.value == mode:
+                if network_type.value == record.mode:
                     return network_type
 
             # Si le mode n'est pas reconnu, retourner None ou lever une exception
-            logging.warning(f"Mode réseau non reconnu : {mode}")
+            logging.warning(f"Mode réseau non reconnu : {record.mode}")
             return None
         else:
             logging.error("Erreur lors de la récupération du mode réseau")
             return None
 
     def get_network_type_str(self):
-        network_mode = self.get_current_network_mode()
+        return self.network_mode_str(self.get_current_network_mode())
+
+    @staticmethod
+    def network_mode_str(network_mode):
+        """Retourne le libellé d'un mode réseau NetworkType."""
         if network_mode:
             if network_mode == NetworkType.AUTO:
                 return "Automatique"
@@ -214,6 +576,7 @@ class SIM7600Cmd:
         else:
             return "Inconnu"
 
+    @traced("check_network_registration")
     def check_network_registration(self) -> Dict[str, Any]:
         """
         Vérifie l'état d'enregistrement du réseau de manière détaillée.
@@ -224,80 +587,95 @@ class SIM7600Cmd:
         Raises:
             RegistrationError: Si une erreur se produit lors de la vérification de l'enregistrement.
         """
+        return self.registration_from_batch(self.execute_batch(REGISTRATION_COMMANDS))
+
+    @classmethod
+    def registration_from_batch(cls, responses: Dict[str, Union[ATResponse, str, None]]) -> Dict[str, Any]:
+        """
+        Construit les informations d'enregistrement à partir des réponses de REGISTRATION_COMMANDS,
+        structurées (execute_batch) ou au format de send_command (send_batch).
+        """
         try:
-            response = self.send_command('AT+CREG?')
-            extended_response = self.send_command('AT+CEREG?')
-            signal_quality, _ = self.get_signal_quality()
-            operator_info = self.get_operator_info()
-
-            result = self._parse_creg_response(response)
-            result.update(self._parse_cereg_response(extended_response))
-            result['signal_quality'] = signal_quality
-            result['operator'] = operator_info
-            self._enrich_network_info(result)
-
-            return result
+            signal_quality, _ = cls.parse_signal_quality(responses['AT+CSQ'] or "")
+            operator_info = responses['AT+COPS?']
+            if isinstance(operator_info, ATResponse):
+                operator_info = operator_info.joined()
+            return cls.build_registration_info(responses['AT+CREG?'] or "", responses['AT+CEREG?'] or "",
+                                               signal_quality, operator_info)
         except Exception as er:
             raise RegistrationError(f"Erreur lors de la vérification de l'enregistrement réseau: {str(er)}")
 
-    def _parse_creg_response(self, response: str) -> Dict[str, Any]:
+    @classmethod
+    def build_registration_info(cls, creg_response: Union[ATResponse, str], cereg_response: Union[ATResponse, str],
+                                signal_quality, operator_info) -> Dict[str, Any]:
+        """Assemble le dictionnaire d'enregistrement à partir des réponses CREG, CEREG, CSQ et COPS."""
+        result = cls._parse_creg_response(creg_response)
+        result.update(cls._parse_cereg_response(cereg_response))
+        result['signal_quality'] = signal_quality
+        result['operator'] = operator_info
+        cls._enrich_network_info(result)
+        return result
+
+    @staticmethod
+    def _parse_creg_response(response: Union[ATResponse, str]) -> Dict[str, Any]:
         """Parse la réponse de la commande AT+CREG?"""
-        match = re.search(r'\+CREG: (\d+),(\d+)(?:,"([0-9A-F]+)","([0-9A-F]+)")?', response)
-        if not match:
+        creg = ResponseParsers.parse_response(response, '+CREG')
+        if creg is None or creg.n is None:
             raise ValueError("Format de réponse CREG invalide")
 
-        n, stat = map(int, match.group(1, 2))
-        lac = match.group(3)
-        ci = match.group(4)
-
         return {
-            'status': NetworkStatus(stat),
-            'registered': stat in [1, 5],
-            'location_area_code': lac,
-            'cell_id': ci
+            'status': NetworkStatus(creg.stat),
+            'registered': creg.registered,
+            'location_area_code': creg.lac_hex,
+            'cell_id': creg.ci_hex
         }
 
-    def _parse_cereg_response(self, response: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_cereg_response(response: Union[ATResponse, str]) -> Dict[str, Any]:
         """Parse la réponse de la commande AT+CEREG?"""
-        match = re.search(r'\+CEREG: (\d+),(\d+)(?:,"([0-9A-F]+)","([0-9A-F]+)",(\d+))?', response)
-        if not match:
+        cereg = ResponseParsers.parse_response(response, '+CEREG')
+        if cereg is None or cereg.n is None:
             raise ValueError("Format de réponse CEREG invalide")
 
-        n, stat = map(int, match.group(1, 2))
-        tac = match.group(3)
-        ci = match.group(4)
-        act = int(match.group(5)) if match.group(5) else None
-
+        act = cereg.act
         return {
-            'tac': tac,  # Tracking Area Code (for 4G/5G)
-            'eci': ci,  # E-UTRAN Cell Identifier (for 4G/5G)
-            'act': NetworkType(act) if act is not None else None
+            'tac': cereg.lac_hex,  # Tracking Area Code (for 4G/5G)
+            'eci': cereg.ci_hex,  # E-UTRAN Cell Identifier (for 4G/5G)
+            'act': AccessTechnology(act) if act in _ACCESS_TECHNOLOGIES else None
         }
 
-    def _enrich_network_info(self, result: Dict[str, Any]) -> None:
+    @classmethod
+    def _enrich_network_info(cls, result: Dict[str, Any]) -> None:
         """Enrichit les informations réseau avec des données supplémentaires"""
-        result['network_generation'] = self._determine_network_generation(result.get('act'))
-        result['coverage_quality'] = self._assess_coverage_quality(result.get('signal_quality'))
-        result['location_info'] = self._get_approximate_location(result.get('location_area_code'),
-                                                                 result.get('cell_id'))
+        result['network_generation'] = cls._determine_network_generation(result.get('act'))
+        result['coverage_quality'] = cls._assess_coverage_quality(result.get('signal_quality'))
+        result['location_info'] = cls._get_approximate_location(result.get('location_area_code'),
+                                                                result.get('cell_id'))
 
-    def _determine_network_generation(self, act: Optional[NetworkType]) -> str:
+    @staticmethod
+    def _determine_network_generation(act: Optional[AccessTechnology]) -> str:
         if act is None:
             return "Inconnu"
         generation_map = {
-            NetworkType.GSM: "2G",
-            NetworkType.GPRS: "2.5G",
-            NetworkType.EDGE: "2.75G",
-            NetworkType.UMTS: "3G",
-            NetworkType.HSDPA: "3.5G",
-            NetworkType.HSUPA: "3.75G",
-            NetworkType.HSPA: "3.75G",
-            NetworkType.LTE: "4G",
-            NetworkType.NR: "5G"
+            AccessTechnology.GSM: "2G",
+            AccessTechnology.GSM_COMPACT: "2G",
+            AccessTechnology.EC_GSM_IOT: "2G",
+            AccessTechnology.EDGE: "2.75G",
+            AccessTechnology.UTRAN: "3G",
+            AccessTechnology.HSDPA: "3.5G",
+            AccessTechnology.HSUPA: "3.75G",
+            AccessTechnology.HSPA: "3.75G",
+            AccessTechnology.LTE: "4G",
+            AccessTechnology.NB_IOT: "4G",
+            AccessTechnology.LTE_5GCN: "4G",
+            AccessTechnology.NR: "5G",
+            AccessTechnology.NG_RAN: "5G",
+            AccessTechnology.LTE_NR: "5G"
         }
         return generation_map.get(act, "Inconnu")
 
-    def _assess_coverage_quality(self, signal_quality: int) -> str:
+    @staticmethod
+    def _assess_coverage_quality(signal_quality: int) -> str:
         if signal_quality >= -70:
             return "Excellent"
         elif signal_quality >= -85:
@@ -309,7 +687,8 @@ class SIM7600Cmd:
         else:
             return "Très Faible"
 
-    def _get_approximate_location(self, lac: Optional[str], ci: Optional[str]) -> Dict[str, Any]:
+    @staticmethod
+    def _get_approximate_location(lac: Optional[str], ci: Optional[str]) -> Dict[str, Any]:
         # Cette méthode pourrait être implémentée pour obtenir une localisation approximative
         # basée sur le LAC et le Cell ID, peut-être en utilisant une API externe ou une base de données locale
         return {
@@ -319,33 +698,54 @@ class SIM7600Cmd:
             "source": "Network-based (approximate)"
         }
 
+    @traced("get_network_snapshot")
+    def get_network_snapshot(self, with_signal: bool = True) -> NetworkSnapshot:
+        """
+        Retourne l'état du réseau (mode système, opérateur, LAC/TAC, cellule, bande,
+        RSRP/RSRQ/SINR) lu dans AT+CPSI?, avec AT+CSQ sur la même ligne si with_signal.
+        Un seul aller-retour série.
+
+        Raises:
+            RegistrationError: Si le module ne retourne pas de réponse +CPSI exploitable.
+        """
+        commands = NETWORK_SNAPSHOT_COMMANDS if with_signal else NETWORK_SNAPSHOT_COMMANDS[:1]
+        result = self.execute_command(self.join_batch(commands))
+        return self.snapshot_from_response(result)
+
+    @staticmethod
+    def snapshot_from_response(result: ATResponse) -> NetworkSnapshot:
+        snapshot = NetworkSnapshot.from_response(result)
+        if snapshot is None:
+            detail = result.final_line or "délai dépassé"
+            raise RegistrationError(f"Réponse AT+CPSI? invalide ({detail})")
+        return snapshot
+
+    @traced("print_network_status")
     def print_network_status(self) -> None:
-        """Affiche un résumé détaillé du statut réseau"""
+        """Affiche un résumé détaillé du statut réseau (un seul aller-retour série)."""
         try:
-            info = self.check_network_registration()
-            signal_quality, quality_desc = self.get_signal_quality()
-            operator_info = self.get_operator_info()
-            network_mode = self.get_network_type_str()
-
-            logging.info("=== Statut du Réseau ===")
-            logging.info(f"Enregistré: {'Oui' if info['registered'] else 'Non'}")
-            logging.info(f"Statut: {info['status'].name}")
-            logging.info(f"Mode réseau actuel: {network_mode}")
-            logging.info(f"Type de réseau: {info['act'].name if info['act'] else 'Inconnu'}")
-            logging.info(f"Génération: {info['network_generation']}")
-            logging.info(f"Qualité du signal: {signal_quality} dBm ({quality_desc})")
-            logging.info(f"Opérateur: {operator_info}")
-            logging.info(f"LAC/TAC: {info.get('location_area_code') or info.get('tac') or 'N/A'}")
-            logging.info(f"Cell ID/ECI: {info.get('cell_id') or info.get('eci') or 'N/A'}")
-
-            if 'location_info' in info and info['location_info'].get('latitude'):
-                logging.info(
-                    f"Position approximative: {info['location_info']['latitude']}, {info['location_info']['longitude']}")
-
-            logging.info("========================")
+            self.log_network_snapshot(self.get_network_snapshot())
         except RegistrationError as e:
             logging.error(f"Erreur lors de la vérification du statut réseau: {e}")
 
+    @classmethod
+    def log_network_snapshot(cls, snapshot: NetworkSnapshot) -> None:
+        """Journalise le résumé du statut réseau."""
+        logging.info("=== Statut du Réseau ===")
+        logging.info(f"Enregistré: {'Oui' if snapshot.registered else 'Non'}")
+        logging.info(f"Mode système: {snapshot.system_mode} ({snapshot.operation_mode})")
+        logging.info(f"Génération: {snapshot.generation}")
+        logging.info(f"Opérateur: {snapshot.operator or 'N/A'}")
+        logging.info(f"LAC/TAC: {f'{snapshot.lac:X}' if snapshot.lac is not None else 'N/A'}")
+        logging.info(f"Cell ID/ECI: {snapshot.cell_id if snapshot.cell_id is not None else 'N/A'}")
+        logging.info(f"Bande: {snapshot.band or 'N/A'}")
+        if snapshot.rsrp is not None:
+            logging.info(f"RSRP: {snapshot.rsrp} dBm, RSRQ: {snapshot.rsrq} dB, SINR: {snapshot.sinr} dB")
+        if snapshot.signal_dbm is not None:
+            logging.info(f"Qualité du signal: {snapshot.signal_dbm} dBm "
+                         f"({cls._assess_coverage_quality(snapshot.signal_dbm)})")
+        logging.info("========================")
+
     def enable_gps(self):
         """Active le module GPS."""
         response = self.send_command("AT+CGPS=1")  # Activer le GPS
@@ -357,6 +757,7 @@ class SIM7600Cmd:
         self.close_connection()
 
     def reset_module(self):
+        # AT+CRESET vide aussi le cache des réponses (voir ResponseCache.observe)
         response = self.send_command("AT+CRESET")
         if "CRESET" in response:
             logging.info("Configurations du modem reset avec succès.")
@@ -365,6 +766,7 @@ class SIM7600Cmd:
 
 
 def main():
+    setup_logging()
     ports_to_try = ["COM17"]
     sim7600 = None
 
@@ -1,9 +1,14 @@
 import logging
 import serial
-from SIM7600 import SIM7600Cmd  # Assurez-vous que SIM7600 est également en mode synchrone
 
+from CommandTimeouts import operation_deadline
+from SIM7600Cmd import SIM7600Cmd
 
-class SIM7600Data(SIM7600):
+# Durée maximale de connect() : attachement GPRS et activation du contexte
+CONNECT_DEADLINE = 180
+
+
+class SIM7600Data(SIM7600Cmd):
     def __init__(self, port, apn=None, baudrate=115200, timeout=2):
         """Initialise le module SIM7600 pour les données avec le port et l'APN spécifiés."""
         super().__init__(port, baudrate, timeout)
@@ -15,21 +20,22 @@ class SIM7600Data(SIM7600):
         logging.info(f"Configuration de l'APN: {self.apn}")
         self.send_command(f'AT+CGDCONT=1,"IP","{self.apn}"')  # Configure l'APN
 
-    def connect(self):
-        """Établit une connexion de données GPRS."""
+    def connect(self, deadline=CONNECT_DEADLINE):
+        """Établit une connexion de données GPRS en deadline secondes au plus."""
         if not self.apn:
             raise ValueError("APN non configuré. Veuillez d'abord configurer un APN.")
 
-        # Attacher le module au GPRS
-        logging.info("Attachement au réseau GPRS...")
-        self.send_command('AT+CGATT=1')
+        with operation_deadline(deadline):
+            # Attacher le module au GPRS
+            logging.info("Attachement au réseau GPRS...")
+            self.send_command('AT+CGATT=1')
 
-        # Établir la connexion
-        logging.info("Établissement de la connexion de données...")
-        self.send_command('AT+CIICR')
+            # Établir la connexion
+            logging.info("Établissement de la connexion de données...")
+            self.send_command('AT+CIICR')
 
-        # Obtenir l'adresse IP
-        ip_address = self.send_command('AT+CIFSR')
+            # Obtenir l'adresse IP
+            ip_address = self.send_command('AT+CIFSR')
         logging.info(f"Adresse IP obtenue: {ip_address.strip()}")
         return ip_address.strip()
 
@@ -3,7 +3,8 @@ import time
 
 from serial.serialutil import SerialException
 
-from SIM7600Cmd import SIM7600Cmd
+from SIM7600Cmd import SIM7600Cmd, setup_logging
+from CommandMetrics import traced
 from SerialPortCategorizer import SerialPortCategorizer
 
 
@@ -14,17 +15,21 @@ class SIM7600GPS(SIM7600Cmd):
         self.fixed = False
         logging.info("Module GPS en cours de démarrage.")
 
+    @traced("get_gps_data")
     def get_gps_data(self):
         """Récupère les données GPS."""
         response = self.send_command("AT+CGPSINFO", raw=True)
+        data = self.parse_gps_data(response)
+        self.fixed = data is not None
+        return data
+
+    @staticmethod
+    def parse_gps_data(response):
+        """Découpe la réponse brute de AT+CGPSINFO en trames, ou None sans données GPS."""
         if "$" in response:
-            self.fixed = True
-            response = response.splitlines()
-            return response
-        else:
-            logging.error("Aucune réception des données GPS.")
-            self.fixed = False
-            return None
+            return response.splitlines()
+        logging.error("Aucune réception des données GPS.")
+        return None
 
     def disable_gps(self):
         """Désactive le module GPS."""
@@ -41,6 +46,7 @@ class SIM7600GPS(SIM7600Cmd):
 
 
 def main():
+    setup_logging()
     try:
         serp = SerialPortCategorizer()
         port_cmd = serp.get_port("at")
@@ -2,47 +2,63 @@ import logging
 import re
 from serial.serialutil import SerialException
 
-from SIM7600Cmd import SIM7600Cmd
+from SIM7600Cmd import SIM7600Cmd, setup_logging
+from CommandMetrics import traced
+import ResponseParsers
 
 
 class SIM7600Info(SIM7600Cmd):
-    def __init__(self, port, baudrate=115200, timeout=2):
+    def __init__(self, port, baudrate=115200, timeout=2, use_cache=True):
         super().__init__(port, baudrate, timeout)
+        # Les informations d'identité ne changent pas tant que le module est alimenté
+        if use_cache:
+            self.enable_cache()
 
     def get_firmware_version(self):
-        response = self.send_command("AT+CGMR")
-        pattern=r'\+CGMR:\s*([^\s]+)'
-        match = re.search(pattern, response)  # Extrait la version du firmware
-        return match.group(1) if match else "Version non trouvée"
+        return self.parse_firmware_version(self.send_command("AT+CGMR"))
+
+    @staticmethod
+    def parse_firmware_version(response):
+        firmware = ResponseParsers.parse_response(response, '+CGMR')  # Extrait la version du firmware
+        return firmware.revision if firmware else "Version non trouvée"
 
     def get_manufacturer(self):
-        response = self.send_command("AT+CGMI")
+        return self.parse_manufacturer(self.send_command("AT+CGMI"))
+
+    @staticmethod
+    def parse_manufacturer(response):
         pattern = r'\+CGMI \s*(.+)'
         match = re.search(pattern, response)  # Extrait le nom du fabricant
         return match.group(1).strip() if match else "Fabricant non trouvé"
 
     def get_serial_number(self):
-        response = self.send_command("AT+CGSN")
+        return self.parse_serial_number(self.send_command("AT+CGSN"))
+
+    @staticmethod
+    def parse_serial_number(response):
         pattern = r'\+CGSN \s*(.+)'   # Capture des caractères alphanumériques après +CGSN:
         match = re.search(pattern, response)  # Extrait le numéro de série
         return match.group(1) if match else "Numéro de série non trouvé"
 
     def get_module_version(self):
-        response = self.send_command("AT+CGMM")
+        return self.parse_module_version(self.send_command("AT+CGMM"))
+
+    @staticmethod
+    def parse_module_version(response):
         pattern = r'\+CGMM \s*(.+)'
         match = re.search(pattern, response)  # Extrait la version du module
         return match.group(1).strip() if match else "Version du module non trouvée"
 
     def get_chip_info(self):
-        response = self.send_command("AT+CSUB")
-        # Nouvel pattern pour capturer les informations correctement
-        pattern = r'\+CSUB:\s*([^\s]+)\s+\+CSUB:\s*([^\s]+)'
+        return self.parse_chip_info(self.send_command("AT+CSUB"))
 
-        match = re.search(pattern, response)
+    @staticmethod
+    def parse_chip_info(response):
+        versions = ResponseParsers.parse_all(response, '+CSUB')
         chip_info={}
-        if match:
-            sub_version = match.group(1).strip()  # Version de sous-système
-            modem_version = match.group(2).strip()  # Version de modem
+        if len(versions) >= 2:
+            sub_version = versions[0].version  # Version de sous-système
+            modem_version = versions[1].version  # Version de modem
             chip_info["sub_version"]=sub_version
             chip_info["modem_version"]=modem_version
             return chip_info
@@ -50,7 +66,10 @@ class SIM7600Info(SIM7600Cmd):
             return "Informations du chip non trouvées"
 
     def get_full_info(self):
-        response = self.send_command("ATI")
+        return self.parse_full_info(self.send_command("ATI"))
+
+    @staticmethod
+    def parse_full_info(response):
         model_info = {}
 
         # Utilisation d'une expression régulière pour extraire le modèle, la révision et l'IMEI
@@ -75,16 +94,21 @@ class SIM7600Info(SIM7600Cmd):
 
         return model_info
 
+    @traced("print_all_info")
     def print_all_info(self):
+        self.log_all_info(self.get_firmware_version(), self.get_manufacturer(), self.get_serial_number(),
+                          self.get_module_version(), self.get_chip_info(), self.get_full_info())
+
+    @staticmethod
+    def log_all_info(firmware, manufacturer, serial_number, module_version, chip_info, full_info):
+        """Journalise l'ensemble des informations du module."""
         logging.info("=== Informations SIM7600 ===")
-        logging.info(f"Micrologiciel: {self.get_firmware_version()}")
-        logging.info(f"Fabricant: {self.get_manufacturer()}")
-        logging.info(f"Numéro de série: {self.get_serial_number()}")
-        logging.info(f"Version du module: {self.get_module_version()}")
-        chip_info=self.get_chip_info()
+        logging.info(f"Micrologiciel: {firmware}")
+        logging.info(f"Fabricant: {manufacturer}")
+        logging.info(f"Numéro de série: {serial_number}")
+        logging.info(f"Version du module: {module_version}")
         logging.info(f"Information du chip: sub version :{chip_info['sub_version']}")
         logging.info(f"Information du chip: modem version :{chip_info['modem_version']}")
-        full_info = self.get_full_info()
         logging.info(f"Modèle: {full_info['Modèle']}")
         logging.info(f"Révision: {full_info['Révision']}")
         logging.info(f"IMEI: {full_info['IMEI']}")
@@ -92,6 +116,7 @@ class SIM7600Info(SIM7600Cmd):
 
 
 def main():
+    setup_logging()
     ports_to_try = ["COM17"]
     sim_info = None
 
@@ -1,8 +1,6 @@
 import logging
 import time
 
-import paho.mqtt.client as mqtt
-
 from SIM7600Cmd import SIM7600Cmd
 
 class SIM7600MQTT(SIM7600Cmd):
@@ -12,6 +10,9 @@ class SIM7600MQTT(SIM7600Cmd):
         self.broker = broker
         self.broker_port = port_mqtt
         self.open_connection()
+        # paho n'est chargé qu'à la création d'un client MQTT
+        import paho.mqtt.client as mqtt
+
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
 
         # Définition des callbacks
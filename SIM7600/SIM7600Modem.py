@@ -1,8 +1,14 @@
 import logging
 import time
-from SIM7600 import SIM7600Cmd  # Assurez-vous d'importer correctement votre classe SIM7600
 
-class SIM7600Modem(SIM7600):
+from CommandTimeouts import operation_deadline
+from SIM7600Cmd import SIM7600Cmd
+
+# Durée maximale de connect() : attachement (AT+CGATT=1) et établissement PPP compris
+CONNECT_DEADLINE = 180
+
+
+class SIM7600Modem(SIM7600Cmd):
     def __init__(self, port, apn="Lebara"):
         """Initialise le module SIM7600 avec le port série et l'APN Lebara."""
         super().__init__(port)
@@ -38,13 +44,17 @@ class SIM7600Modem(SIM7600):
         logging.info(f"Adresse IP obtenue : {ip_address}")
         return ip_address
 
-    def connect(self):
-        """Configure l'APN, attache au réseau, et établit la connexion PPP."""
-        self.configure_apn()
-        self.attach_to_network()
-        time.sleep(2)  # Pause pour stabiliser la connexion
-        self.establish_ppp_connection()
-        return self.get_ip_address()
+    def connect(self, deadline=CONNECT_DEADLINE):
+        """
+        Configure l'APN, attache au réseau, et établit la connexion PPP, en deadline secondes
+        au plus (DeadlineExceeded si l'échéance est dépassée avant une étape).
+        """
+        with operation_deadline(deadline):
+            self.configure_apn()
+            self.attach_to_network()
+            time.sleep(2)  # Pause pour stabiliser la connexion
+            self.establish_ppp_connection()
+            return self.get_ip_address()
 
 # Utilisation du module SIM7600Modem avec Lebara
 if __name__ == "__main__":
@@ -1,30 +1,24 @@
 import logging
-import re
-import string
+import queue
+import threading
+import time
 
 from serial.serialutil import SerialException
 
-from SIM7600.SerialPortCategorizer import SerialPortCategorizer
+from SerialPortCategorizer import SerialPortCategorizer
 from SIM7600Cmd import SIM7600Cmd, NetworkType
+from ResponseReader import ResultCode
+from CommandMetrics import traced
+import ResponseParsers
+from ResponseParsers import PduHeader
+import SMSPdu
+from SmsCodec import CHARSET_UCS2, SmsCodec
+from SmsListing import SmsListingParser
 
 
-def is_hexadecimal_and_printable(hex_str):
-    # Supprime les espaces pour traiter des chaînes hexadécimales telles que "4F62 6F"
-    hex_str = hex_str.replace(" ", "")
+# Configuration par défaut du mode texte (AT+CSCS="IRA", DCS 0), pour les méthodes statiques
+_DEFAULT_CODEC = SmsCodec()
 
-    # Vérifie si la chaîne est hexadécimale valide
-    if re.match(r'^[0-9A-Fa-f]+$', hex_str):
-        try:
-            # Convertit la chaîne hexadécimale en bytes
-            bytes_data = bytes.fromhex(hex_str)
-            # Convertit les bytes en texte clair (ASCII)
-            decoded_str = bytes_data.decode('utf-8', errors='ignore')  # ignore les erreurs de décodage
-
-            # Vérifie si tous les caractères sont imprimables
-            return all(c in string.printable for c in decoded_str)
-        except ValueError:
-            return False  # En cas d'erreur lors de la conversion
-    return False  # Si la chaîne n'est pas une hexadécimale valide
 
 class SIM7600SMS(SIM7600Cmd):
     def __init__(self, port, baudrate=115200, timeout=2):
@@ -33,6 +27,39 @@ class SIM7600SMS(SIM7600Cmd):
         self.sms_instances = []
         self.transport = None  # Connexion série sera gérée par SIM7600
         self.card_is_ready = False
+        # Configuration du mode texte (AT+CSCS, AT+CSMP) : valeurs par défaut du module
+        self.codec = SmsCodec()
+        # Jeu de caractères utilisé pour lire les SMS : en UCS2, tout message est décodé exactement
+        self.read_charset = CHARSET_UCS2
+        # Archive SQLite des SMS reçus et envoyés (enable_archive)
+        self.archive = None
+        self.imei = None
+
+    def enable_archive(self, archive):
+        """
+        Archive désormais les SMS lus et envoyés dans archive (SmsArchive), sous l'IMEI du
+        module (AT+CGSN). Une même archive peut être partagée entre plusieurs modems.
+        """
+        result = self.execute_command('AT+CGSN')
+        serial_numbers = [line.strip() for line in result.lines if line.strip().isdigit()]
+        self.imei = serial_numbers[0] if result.success and serial_numbers else archive.imei
+        self.archive = archive
+        return archive
+
+    def disable_archive(self):
+        if self.archive is not None:
+            self.archive.flush()
+        self.archive = None
+
+    def archive_received(self, messages):
+        """Archive des SMS lus (dictionnaires de read_sms ou SMSPdu.SmsMessage)."""
+        if self.archive is not None:
+            for message in messages:
+                self.archive.add_received(message, self.imei)
+
+    def archive_sent(self, phone_number, message, references):
+        if self.archive is not None and references:
+            self.archive.add_sent(phone_number, message, references, self.imei)
 
     def check_sim_card(self):
         """Vérifie si une carte SIM est présente et prête."""
@@ -48,55 +75,156 @@ class SIM7600SMS(SIM7600Cmd):
             self.card_is_ready = False
         return self.card_is_ready
 
+    def load_codec(self):
+        """Lit le jeu de caractères (AT+CSCS) et le DCS (AT+CSMP) du mode texte et retourne le codec."""
+        result = self.execute_command('AT+CSCS?;+CSMP?')
+        if result.success:
+            self.codec = SmsCodec.from_response(result)
+        else:
+            logging.warning(f"Configuration du mode texte illisible : {result.final_line or 'délai dépassé'}")
+        return self.codec
+
+    def set_charset(self, charset):
+        """Sélectionne le jeu de caractères de l'interface (AT+CSCS : "IRA", "GSM" ou "UCS2")."""
+        result = self.execute_command(f'AT+CSCS="{charset}"')
+        if result.success:
+            self.codec = SmsCodec(charset, self.codec.dcs)
+        else:
+            logging.error(f"Jeu de caractères {charset} refusé : {result.final_line or 'délai dépassé'}")
+        return result.success
+
+    @traced("send_sms")
     def send_sms(self, phone_number, message):
         """Envoie un SMS au numéro spécifié avec le message donné."""
         if not self.card_is_ready:
             logging.error("Impossible d'envoyer un SMS : aucune carte SIM prête.")
             return None
 
-        # Met le module en mode texte
-        self.send_command('AT+CMGF=1')
-        # Définit le numéro du destinataire
-        self.send_command(f'AT+CMGS="{phone_number}"')
-        self.serial_conn.write((message + chr(26)).encode())
-
-        # Attendre la réponse du module
-        response = self.read_response()
-        response = self.clean_message(response)
-        return response
+        # L'invite et le texte doivent se suivre sans autre commande intercalée
+        with self.lock:
+            # Met le module en mode texte
+            self.send_command('AT+CMGF=1')
+            # Définit le numéro du destinataire et attend l'invite '>'
+            response = self.send_command(f'AT+CMGS="{self.codec.encode_address(phone_number)}"', expect_prompt=True)
+            if self.last_result.result_code is not ResultCode.PROMPT:
+                logging.error(f"Invite de saisie SMS non reçue : {self.last_result.final_line or 'délai dépassé'}")
+                return response
+            # Envoie le texte terminé par Ctrl-Z et attend la réponse du module
+            result = self.execute_command(self.codec.encode(message) + chr(26), terminator='',
+                                          deadline=self.timeouts.deadline_for('AT+CMGS=', self.timeout))
+        submitted = ResponseParsers.parse_response(result, '+CMGS') if result.success else None
+        if submitted is not None:
+            self.archive_sent(phone_number, message, [submitted.mr])
+        return self.format_response(result)
+
+    @traced("send_sms_pdu")
+    def send_sms_pdu(self, phone_number, message, encoding=None, status_report=False):
+        """
+        Envoie un SMS en mode PDU (AT+CMGF=0). Le message est découpé en plusieurs parties
+        concaténées s'il dépasse 160 caractères GSM ou 70 caractères UCS2.
+
+        Args:
+            message: Texte, ou bytes pour un message 8 bits.
+            encoding: 'gsm7', '8bit' ou 'ucs2' ; choisi d'après le contenu par défaut.
+            status_report: Demande un rapport de remise pour chaque partie.
+
+        Returns:
+            list: Références (mr) des parties envoyées, dans l'ordre ; None sans carte SIM.
+        """
+        if not self.card_is_ready:
+            logging.error("Impossible d'envoyer un SMS : aucune carte SIM prête.")
+            return None
 
-    def command_read_sms(self):
-        if not self.serial_conn or not self.serial_conn.is_open:
-            raise SerialException("Le port série n'est pas ouvert.")
+        parts = SMSPdu.encode_submit(phone_number, message, encoding=encoding, status_report=status_report)
+        references = []
+        with self.lock:
+            self.execute_command('AT+CMGF=0')
+            for part in parts:
+                result = self.execute_command(f'AT+CMGS={part.length}', expect_prompt=True)
+                if result.result_code is not ResultCode.PROMPT:
+                    logging.error(f"Invite de saisie SMS non reçue : {result.final_line or 'délai dépassé'}")
+                    break
+                result = self.execute_command(part.pdu + chr(26), terminator='',
+                                              deadline=self.timeouts.deadline_for('AT+CMGS=', self.timeout))
+                submitted = ResponseParsers.parse_response(result, '+CMGS')
+                if not result.success or submitted is None:
+                    logging.error(f"Échec de l'envoi de la partie {len(references) + 1}/{len(parts)} : "
+                                  f"{result.final_line or 'délai dépassé'}")
+                    break
+                references.append(submitted.mr)
+        self.archive_sent(phone_number, message, references)
+        return references
+
+    @traced("read_sms_pdu")
+    def read_sms_pdu(self, status=4, delete_action=False):
+        """
+        Lit les SMS en mode PDU (AT+CMGL=<status>, 4 = tous) et réassemble les messages
+        concaténés. Les messages dont une partie manque sont retournés avec complete=False.
+
+        Returns:
+            list[SMSPdu.SmsMessage]: Messages lus, None sans carte SIM.
+        """
+        if not self.card_is_ready:
+            logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
+            return None
 
-        command='AT+CMGL="ALL"'
-        # Envoyer la commande AT
-        if self.echo:
-            logging.info(f"Envoi de la commande: {command}")
+        with self.lock:
+            if not self.execute_command('AT+CMGF=0').success:
+                logging.error("Erreur lors de la configuration du mode SMS.")
+                return None
+            result = self.execute_command(f'AT+CMGL={status}')
+        messages = self.parse_pdu_listing(result.lines)
+        self.archive_received(messages)
 
-        self.serial_conn.write((command + '\r\n').encode('utf-8',errors='ignore'))
+        if delete_action:
+            # Les parties d'un message incomplet restent en mémoire jusqu'à l'arrivée des autres
+            for message in messages:
+                if not message.complete:
+                    continue
+                for index in message.indices:
+                    self.delete_sms(index)
+        return messages
+
+    @staticmethod
+    def parse_pdu_listing(lines):
+        """Décode les lignes de AT+CMGL en mode PDU (en-tête puis PDU) et réassemble les messages."""
+        reassembler = SMSPdu.ConcatenatedMessages()
+        messages = []
+        header = None
+        for line in lines:
+            if line.startswith("+CMGL:"):
+                header = ResponseParsers.parse_line(line)
+                continue
+            if not isinstance(header, PduHeader):
+                continue
+            try:
+                pdu = SMSPdu.decode_pdu(line.strip())
+            except ValueError as e:
+                logging.warning(f"SMS {header.index} ignoré : {e}")
+            else:
+                message = reassembler.add(pdu, header.index)
+                if message is not None:
+                    messages.append(message)
+            header = None
+        messages.extend(reassembler.flush())
+        return messages
 
-        return self.read_response_message()
+    def command_read_sms(self):
+        return self.send_command('AT+CMGL="ALL"')
 
 
+    @traced("read_sms")
     def read_sms(self, delete_action=False):
         if not self.card_is_ready:
             logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
             return None
 
-        self.sms_instances = []
-        response = self.send_command('AT+CMGF=1')
-        if "CMGF" not in response:
-            logging.error("Erreur lors de la configuration du mode SMS.")
-            return
-
-        response = self.command_read_sms()
-        if "CMGL" in response:
-            messages = response.split("CMGL")
-            for line in messages:
-                line = line.strip()
-                if line.startswith(":"):
-                    self.process_sms_line(line)
+        # Contenus décodés ensemble une fois la liste reçue
+        codec = self._read_codec()
+        entries = list(self._listing_entries("ALL", codec))
+        contents = codec.decode_many(entry.body for entry in entries)
+        self.sms_instances = [self.sms_from_entry(entry, codec, content) for entry, content in zip(entries, contents)]
+        self.archive_received(self.sms_instances)
 
         if delete_action:
             for instance in self.sms_instances:
@@ -104,43 +232,165 @@ class SIM7600SMS(SIM7600Cmd):
 
         return self.sms_instances
 
-    def read_response(self, show=False, raw=False):
-        response = self.serial_conn.read_until(b"OK\r\n")
-        response=response.decode()
-        if not show:
-            response = response.replace("OK", "")
-        if not raw:
-            response = self.clean_message(response)
-        return response
+    def stream_sms(self, status="ALL"):
+        """
+        Lit les SMS en mode texte (AT+CMGL) et produit chacun, sous la même forme que
+        read_sms, dès que son corps est reçu, sans attendre la fin de la liste.
+
+        AT+CSDH=1 fait annoncer la longueur de chaque message : un corps sur plusieurs
+        lignes, ou contenant « OK » ou « +CMGL », est lu en entier. La lecture se fait dans
+        le jeu de caractères read_charset, puis celui de self.codec est rétabli.
+
+        La liste est lue par un thread dédié, qui garde le port verrouillé jusqu'au code final
+        puis le libère, que l'itération soit allée au bout ou non : une boucle interrompue
+        (break) ne bloque pas les autres commandes. L'appelant ne doit donc pas détenir
+        self.lock pendant l'itération.
+        """
+        if not self.card_is_ready:
+            logging.error("Impossible de lire les SMS : aucune carte SIM prête.")
+            return
+
+        codec = self._read_codec()
+        entries = queue.Queue()
+
+        def drain():
+            try:
+                for entry in self._listing_entries(status, codec):
+                    entries.put(entry)
+            except Exception as e:
+                entries.put(e)
+            finally:
+                entries.put(None)
+
+        threading.Thread(target=drain, name="SmsListing", daemon=True).start()
+        while True:
+            entry = entries.get()
+            if entry is None:
+                return
+            if isinstance(entry, Exception):
+                raise entry
+            sms = self.sms_from_entry(entry, codec)
+            self.archive_received((sms,))
+            yield sms
+
+    def _read_codec(self):
+        return SmsCodec(self.read_charset, self.codec.dcs) if self.read_charset else self.codec
+
+    def _listing_entries(self, status, codec):
+        """Entrées de AT+CMGL en mode texte, lues dans le jeu de caractères de codec."""
+        switch = codec.charset != self.codec.charset
+        with self.lock:
+            setup = 'AT+CMGF=1;+CSDH=1' + (f';+CSCS="{codec.charset}"' if switch else '')
+            if not self.execute_command(setup).success:
+                logging.error("Erreur lors de la configuration du mode SMS.")
+                return
+            try:
+                yield from self._stream_listing(f'AT+CMGL="{status}"')
+            finally:
+                self.execute_command('AT+CSDH=0' + (f';+CSCS="{self.codec.charset}"' if switch else ''))
+
+    def _stream_listing(self, command):
+        """Envoie une commande de liste et produit ses entrées au fil des lignes reçues."""
+        parser = SmsListingParser()
+        timeout = self.timeouts.timeout_for(command, self.timeout)
+        data = (command + '\r\n').encode('utf-8', errors='ignore')
+        if self.echo:
+            logging.info(f"Envoi de la commande: {command}")
+        started = time.monotonic()
+        try:
+            if self.urc_reader is not None:
+                # Le thread des URC analyse la réponse et transmet chaque entrée dès qu'elle est complète
+                yield from self.urc_reader.stream(data, command, timeout, parser)
+            else:
+                self.serial_conn.write(data)
+                yield from self._parse_lines(parser, self.get_reader().iter_lines(timeout))
+            if not parser.done:
+                # Délai dépassé : le message en cours est transmis tel quel
+                entry = parser.close()
+                if entry is not None:
+                    yield entry
+        finally:
+            timed_out = parser.result_code is None
+            if timed_out:
+                logging.warning(f"Liste des SMS incomplète : aucun code final reçu pour {command}.")
+            self.timeouts.observe(command, time.monotonic() - started, timed_out)
+
+    @staticmethod
+    def _parse_lines(parser, lines):
+        try:
+            for line in lines:
+                entry = parser.feed(line)
+                if entry is not None:
+                    yield entry
+                if parser.done:
+                    return
+        finally:
+            # Itération abandonnée : la fin de la réponse est lue pour ne pas la mêler à la commande suivante
+            if not parser.done:
+                for line in lines:
+                    parser.feed(line)
+                    if parser.done:
+                        break
+
+    @staticmethod
+    def sms_from_entry(entry, codec=None, content=None):
+        """
+        Convertit une entrée de liste en mode texte (SmsListing.ListedSms) en dictionnaire.
+        codec : configuration du mode texte lors de la lecture ; content : texte déjà décodé.
+        """
+        codec = codec if codec is not None else _DEFAULT_CODEC
+        header = entry.header
+        return {
+            'index': header.index,
+            'status': header.status,
+            'phone_number': codec.decode_address(header.sender),
+            'date': header.date,
+            'time': header.time,
+            'content': content if content is not None else codec.decode(entry.body, header.dcs)
+        }
 
     def read_response_message(self, show=False, raw=False):
-        response = self.serial_conn.read_until(b"OK\r\n")
-        response=response.decode("utf-8",errors='ignore')
-        if not show:
-            response = response.replace("OK", "")
-        if not raw:
-            response = self.clean_message(response)
-        return response
+        return self.read_response(show=show, raw=raw)
+
+    @staticmethod
+    def parse_sms_listing(response):
+        """Découpe la réponse nettoyée de AT+CMGL en une liste de SMS."""
+        sms_list = []
+        if "CMGL" in response:
+            messages = response.split("+CMGL")
+            for line in messages:
+                line = line.strip()
+                if line.startswith(":"):
+                    sms_instance = SIM7600SMS.parse_sms_line(line)
+                    if sms_instance:
+                        sms_list.append(sms_instance)
+        return sms_list
 
     def process_sms_line(self, line):
-        pattern = r'^:\s(\d+),"REC READ","(\+?\d+)","","(\d{2}/\d{2}/\d{2}),(\d{2}:\d{2}:\d{2}\+\d{2})"\s(.*)'
-        match = re.search(pattern, line)
-        if match:
-            index, phone_number, date, time, content_hex = match.groups()
-            content = self.decode_content(content_hex)
-            sms_instance = {
-                'index': int(index),
-                'phone_number': phone_number,
-                'date': date,
-                'time': time,
+        sms_instance = self.parse_sms_line(line)
+        if sms_instance:
+            self.sms_instances.append(sms_instance)
+
+    @staticmethod
+    def parse_sms_line(line):
+        """Analyse une entrée de AT+CMGL et retourne le SMS sous forme de dictionnaire."""
+        entry = ResponseParsers.parse_sms_entry(line[1:] if line.startswith(":") else line)
+        if entry:
+            header, body = entry
+            content = SIM7600SMS.decode_content(body, header.dcs)
+            return {
+                'index': header.index,
+                'phone_number': header.sender,
+                'date': header.date,
+                'time': header.time,
                 'content': content
             }
-            self.sms_instances.append(sms_instance)
+        return None
 
-    def decode_content(self, content_hex):
-        if is_hexadecimal_and_printable(content_hex):
-            return bytes.fromhex(content_hex).decode('utf-16-be', errors='ignore')
-        return content_hex
+    @staticmethod
+    def decode_content(content, dcs=None, codec=None):
+        """Texte d'un SMS lu en mode texte, selon la configuration codec (par défaut celle du module)."""
+        return (codec if codec is not None else _DEFAULT_CODEC).decode(content, dcs)
 
     def get_sms(self):
         return self.sms_instances
@@ -0,0 +1,745 @@
+import argparse
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import SMSPdu
+
+# Réponses statiques : commande (en majuscules) -> lignes de réponse avant OK
+DEFAULT_RESPONSES = {
+    'AT': [],
+    'ATI': ['Manufacturer: SIMCOM INCORPORATED', 'Model: SIMCOM_SIM7600E-H', 'Revision: SIM7600M22_V2.0',
+            'IMEI: 861234567890123', '+GCAP: +CGSM'],
+    'AT+CGMR': ['+CGMR: LE20B04SIM7600M22'],
+    'AT+CGMI': ['SIMCOM INCORPORATED'],
+    'AT+CGMM': ['SIMCOM_SIM7600E-H'],
+    'AT+CGSN': ['861234567890123'],
+    'AT+CSUB': ['+CSUB: B04V03', '+CSUB: V03'],
+    'AT+SIMCOMATI': ['Manufacturer: SIMCOM INCORPORATED', 'Model: SIMCOM_SIM7600E-H',
+                     'Revision: SIM7600M22_V2.0', 'QCN: ', 'IMEI: 861234567890123'],
+    'AT+CIMI': ['208150000000001'],
+    'AT+CICCID': ['+ICCID: 8933150000000000001'],
+    'AT+CPIN?': ['+CPIN: READY'],
+    'AT+CFUN?': ['+CFUN: 1'],
+    'AT+CSQ': ['+CSQ: 20,99'],
+    'AT+CREG?': ['+CREG: 0,1'],
+    'AT+CEREG?': ['+CEREG: 0,1'],
+    'AT+CGREG?': ['+CGREG: 0,1'],
+    'AT+COPS?': ['+COPS: 0,0,"Orange F",7'],
+    'AT+COPS=?': ['+COPS: (2,"Orange F","Orange","20801",7),(1,"SFR","SFR","20810",7),,(0-4),(0-2)'],
+    'AT+CPSI?': ['+CPSI: LTE,Online,208-01,0x1A2B,27447297,302,EUTRAN-BAND3,1300,5,5,-94,-1017,-730,11'],
+    'AT+CGDCONT?': ['+CGDCONT: 1,"IP","orange","0.0.0.0",0,0'],
+    'AT+CGATT?': ['+CGATT: 1'],
+    'AT+CGPSINFO': ['+CGPSINFO: 4851.123456,N,00221.654321,E,181024,101500.0,35.2,0.0,'],
+    'AT+CIFSR': ['10.64.12.34'],
+    'AT+CGPADDR': ['+CGPADDR: 1,10.64.12.34'],
+}
+
+# Débits acceptés par AT+IPR sur l'UART du SIM7600
+MODULE_BAUDRATES = (300, 600, 1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600,
+                    3000000, 3200000, 3686400, 4000000)
+
+# Commandes d'écriture acceptées sans réponse intermédiaire (préfixes)
+ACCEPTED_WRITES = (
+    'ATE', 'AT+CGPS=', 'AT+CGDCONT=', 'AT+CGATT=', 'AT+CIICR', 'AT+CSTT=', 'AT+CLIP=', 'AT+CLVL=',
+    'AT+CMMS=', 'AT+CREG=', 'AT+CEREG=', 'AT+CGREG=', 'AT+AUTOCSQ=',
+    'AT+CFUN=', 'AT+CGEREP=', 'AT+NETOPEN', 'AT+NETCLOSE', 'AT+CPMS=', 'AT+CSCA=', 'ATH', 'AT+CHUP',
+)
+
+NMEA_SENTENCES = (
+    '$GNGGA,101500.00,4851.12345,N,00221.65432,E,1,08,0.9,35.2,M,47.0,M,,*5B',
+    '$GNRMC,101500.00,A,4851.12345,N,00221.65432,E,0.0,0.0,181024,,,A*6E',
+    '$GNGSA,A,3,05,13,15,18,20,24,,,,,,,1.6,0.9,1.3*2F',
+    '$GNVTG,0.0,T,,M,0.0,N,0.0,K,A*23',
+)
+
+# Statuts des SMS : valeur numérique du mode PDU <-> libellé du mode texte
+PDU_STATUSES = {0: "REC UNREAD", 1: "REC READ", 2: "STO UNSENT", 3: "STO SENT", 4: "ALL"}
+_PDU_STATUS_CODES = {label: code for code, label in PDU_STATUSES.items()}
+
+# Erreur injectée par inject_timeout : la commande reste sans réponse
+NO_RESPONSE = ""
+
+Handler = Callable[['SIM7600Simulator', str], Union[List[str], str, None]]
+
+
+class SimulatedSMS:
+    def __init__(self, index, number, text, status="REC UNREAD", timestamp="24/10/18,10:15:00+08", alpha="",
+                 pdu=None):
+        self.index = index
+        self.number = number
+        self.text = text
+        self.status = status
+        self.timestamp = timestamp
+        self.alpha = alpha
+        self.pdu = pdu
+
+    def as_pdu(self) -> str:
+        """PDU SMS-DELIVER du message (première partie si le texte ne tient pas dans un PDU)."""
+        if self.pdu is None:
+            moment = SMSPdu.parse_text_timestamp(*self.timestamp.split(",", 1))
+            self.pdu = SMSPdu.encode_deliver(self.number, self.text, moment)[0]
+        return self.pdu
+
+
+class _OutputQueue:
+    """File des octets à émettre par le modem simulé, chacun avec son instant de disponibilité."""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._ready = bytearray()
+        self.cond = threading.Condition()
+
+    def push(self, data: bytes, ready_at: float):
+        with self.cond:
+            heapq.heappush(self._heap, (ready_at, next(self._counter), data))
+            self.cond.notify_all()
+
+    def _promote(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            self._ready.extend(heapq.heappop(self._heap)[2])
+
+    def available(self) -> int:
+        with self.cond:
+            self._promote(time.monotonic())
+            return len(self._ready)
+
+    def take(self, size: Optional[int], timeout: Optional[float]) -> bytes:
+        """Retourne jusqu'à size octets disponibles, en attendant au plus timeout secondes."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                self._promote(now)
+                if self._ready:
+                    count = len(self._ready) if size is None else min(size, len(self._ready))
+                    data = bytes(self._ready[:count])
+                    del self._ready[:count]
+                    return data
+                if end is not None and now >= end:
+                    return b""
+                wake = self._heap[0][0] if self._heap else None
+                if end is not None:
+                    wake = end if wake is None else min(wake, end)
+                self.cond.wait(None if wake is None else max(0.0, wake - now))
+
+    def clear(self):
+        with self.cond:
+            self._heap.clear()
+            self._ready.clear()
+
+
+class SIM7600Simulator:
+    """
+    Émulateur scriptable d'un module SIM7600 : répond aux commandes AT envoyées par le
+    paquet avec une latence configurable (et gigue), permet d'injecter des erreurs et des
+    URC (+CMTI, RING, rafales NMEA) et conserve une mémoire SMS.
+
+    Deux transports sont disponibles : un pseudo-terminal Linux (open_pty) utilisable
+    comme un vrai port série, ou un objet compatible pyserial en mémoire (serial()).
+
+    Avec uart=True, le port en mémoire se comporte comme une liaison UART : la durée de
+    transmission dépend du débit (AT+IPR) et les octets envoyés à un débit différent de
+    celui du module sont perdus. host_max_baudrate borne les débits acceptés par l'hôte.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, echo=True, seed=None, uart=False, host_max_baudrate=None,
+                 sms_link_setup=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.echo = echo
+        # Liaison UART : durée de transmission selon le débit, octets perdus si les débits diffèrent
+        self.uart = uart
+        self.host_max_baudrate = host_max_baudrate
+        self.responses: Dict[str, Union[List[str], Handler]] = dict(DEFAULT_RESPONSES)
+        self.command_latency: Dict[str, float] = {}
+        self.sms_storage: Dict[int, SimulatedSMS] = {}
+        self.sms_capacity = 255
+        self.sms_text_mode = True
+        self.show_text_details = False  # AT+CSDH
+        self.charset = "IRA"  # AT+CSCS
+        self.text_parameters = "17,167,0,0"  # AT+CSMP
+        self.cnmi = "2,1,0,0,0"  # AT+CNMI
+        # Rapport de remise d'un envoi qui le demande (TP-SRR) : délai et état TP-ST
+        self.delivery_delay = 0.05
+        self.delivery_status = 0
+        # Établissement de la liaison radio avant un envoi, évité avec AT+CMMS=1/2 après le premier SMS
+        self.sms_link_setup = sms_link_setup
+        self.more_messages = 0
+        self._sms_link_open = False
+        self.baudrate = 115200
+        self._next_baudrate: Optional[int] = None
+        self._line_free_at = 0.0
+        self.received: List[str] = []
+        self.sent_messages: List[tuple] = []
+        self.output = _OutputQueue()
+        self._errors: Dict[str, List] = {}
+        self._random = random.Random(seed)
+        self._input = bytearray()
+        self._sms_target: Optional[str] = None
+        self._message_reference = itertools.count(1)
+        self._lock = threading.RLock()
+        self._master_fd = None
+        self._slave_fd = None
+        self._threads = []
+        self._running = False
+
+    # --- Configuration du scénario ---
+
+    def set_response(self, command: str, response: Union[List[str], str, Handler], latency: Optional[float] = None):
+        """Définit la réponse d'une commande (lignes, texte ou fonction(simulateur, commande))."""
+        if isinstance(response, str):
+            response = [response]
+        self.responses[command.upper()] = response
+        if latency is not None:
+            self.command_latency[command.upper()] = latency
+
+    def set_latency(self, command: str, latency: float):
+        self.command_latency[command.upper()] = latency
+
+    def inject_error(self, command: str, error: str = "ERROR", times: Optional[int] = 1):
+        """Fait échouer les prochaines commandes commençant par command (times=None : toujours)."""
+        self._errors[command.upper()] = [error, times]
+
+    def inject_timeout(self, command: str, times: Optional[int] = 1):
+        """Laisse sans réponse les prochaines commandes commençant par command (délai dépassé côté hôte)."""
+        self._errors[command.upper()] = [NO_RESPONSE, times]
+
+    def inject_urc(self, line: str, delay: float = 0.0):
+        """Émet un code non sollicité (ex. 'RING', '+CMTI: \"SM\",3')."""
+        self._emit(f"\r\n{line}\r\n".encode(), delay)
+
+    def inject_nmea(self, count: int = 10, delay: float = 0.0):
+        """Émet une rafale de trames NMEA."""
+        sentences = [NMEA_SENTENCES[i % len(NMEA_SENTENCES)] for i in range(count)]
+        self._emit(("\r\n".join(sentences) + "\r\n").encode(), delay)
+
+    def add_sms(self, number: str, text: str, status: str = "REC UNREAD", timestamp: str = "24/10/18,10:15:00+08",
+                alpha: str = "") -> int:
+        """Ajoute un SMS en mémoire sans notification et retourne son index."""
+        with self._lock:
+            index = next(i for i in range(1, self.sms_capacity + 1) if i not in self.sms_storage)
+            self.sms_storage[index] = SimulatedSMS(index, number, text, status, timestamp, alpha)
+            return index
+
+    def add_sms_pdu(self, pdu: str, status: str = "REC UNREAD") -> int:
+        """Ajoute un SMS donné par son PDU (SMS-DELIVER avec SMSC) et retourne son index."""
+        decoded = SMSPdu.decode_pdu(pdu)
+        with self._lock:
+            index = self.add_sms(decoded.address, decoded.text or "", status)
+            self.sms_storage[index].pdu = pdu
+            return index
+
+    def deliver_sms_pdu(self, number: str, text: str, delay: float = 0.0) -> List[int]:
+        """Simule la réception d'un message éventuellement concaténé : une entrée et un +CMTI par partie."""
+        indices = [self.add_sms_pdu(pdu) for pdu in SMSPdu.encode_deliver(number, text)]
+        for index in indices:
+            self.inject_urc(f'+CMTI: "SM",{index}', delay)
+        return indices
+
+    def send_status_report(self, reference: int, recipient: str, status: int = 0, delay: float = 0.0):
+        """
+        Émet le rapport de remise de l'envoi reference selon AT+CNMI (<ds>) : +CDS direct
+        (1, format du mode courant), ou stockage puis +CDSI (2) ; rien si <ds> vaut 0.
+        """
+        fields = self.cnmi.split(",")
+        ds = int(fields[3]) if len(fields) > 3 and fields[3] else 0
+        if ds == 0:
+            return
+        pdu = SMSPdu.encode_status_report(recipient, reference, status)
+        if ds == 2:
+            with self._lock:
+                index = self.add_sms(recipient, "")
+                self.sms_storage[index].pdu = pdu
+            self.inject_urc(f'+CDSI: "SM",{index}', delay)
+        elif self.sms_text_mode:
+            report = SMSPdu.decode_pdu(pdu)
+            scts, dt = (moment.strftime("%y/%m/%d,%H:%M:%S+00") for moment in (report.timestamp, report.discharge_time))
+            toa = 145 if recipient.startswith('+') else 129
+            self.inject_urc(f'+CDS: 6,{reference},"{self._format_sms_field(recipient)}",{toa},'
+                            f'"{scts}","{dt}",{status}', delay)
+        else:
+            self._emit(f"\r\n+CDS: {len(pdu) // 2 - 1}\r\n{pdu}\r\n".encode(), delay)
+
+    def deliver_sms(self, number: str, text: str, delay: float = 0.0) -> int:
+        """Simule la réception d'un SMS : stockage puis URC +CMTI."""
+        index = self.add_sms(number, text)
+        self.inject_urc(f'+CMTI: "SM",{index}', delay)
+        return index
+
+    # --- Transports ---
+
+    def serial(self, timeout=2, port="sim://sim7600") -> 'SimulatedSerial':
+        """Retourne un port série en mémoire compatible avec l'API pyserial utilisée par le paquet."""
+        return SimulatedSerial(self, port=port, timeout=timeout)
+
+    def attach(self, modem, timeout=None):
+        """Branche une instance SIM7600Cmd (ou dérivée) sur le simulateur, sans ouvrir de port réel."""
+        modem.serial_conn = self.serial(timeout=modem.timeout if timeout is None else timeout)
+        return modem
+
+    def open_pty(self) -> str:
+        """Sert le simulateur sur un pseudo-terminal Linux et retourne le chemin du port esclave."""
+        import tty
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        self._running = True
+        for target in (self._pty_reader, self._pty_writer):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return os.ttyname(self._slave_fd)
+
+    def close(self):
+        self._running = False
+        with self.output.cond:
+            self.output.cond.notify_all()
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master_fd = self._slave_fd = None
+
+    def _pty_reader(self):
+        while self._running:
+            try:
+                data = os.read(self._master_fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            self.receive(data)
+
+    def _pty_writer(self):
+        while self._running:
+            data = self.output.take(None, 0.1)
+            if data and self._master_fd is not None:
+                try:
+                    os.write(self._master_fd, data)
+                except OSError:
+                    break
+
+    # --- Moteur de commandes ---
+
+    def receive(self, data: bytes):
+        """Traite les octets écrits par l'hôte."""
+        with self._lock:
+            self._input.extend(data)
+            while True:
+                if self._sms_target is not None:
+                    if not self._consume_sms_text():
+                        return
+                    continue
+                index = self._input.find(b"\r")
+                if index < 0:
+                    return
+                line = bytes(self._input[:index]).decode('utf-8', errors='ignore').strip()
+                del self._input[:index + 1]
+                if self._input.startswith(b"\n"):
+                    del self._input[:1]
+                if line:
+                    self._handle_line(line)
+
+    def _consume_sms_text(self) -> bool:
+        for terminator in (b"\x1a", b"\x1b"):
+            index = self._input.find(terminator)
+            if index >= 0:
+                text = bytes(self._input[:index]).decode('utf-8', errors='ignore')
+                del self._input[:index + 1]
+                target, self._sms_target = self._sms_target, None
+                if terminator == b"\x1b":
+                    self._reply(target, [], "OK")
+                else:
+                    self._complete_sms_send(target, text)
+                return True
+        return False
+
+    def _delay_for(self, command: str) -> float:
+        upper = command.upper()
+        matches = [prefix for prefix in self.command_latency if upper.startswith(prefix)]
+        delay = self.command_latency[max(matches, key=len)] if matches else self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+    def _emit(self, data: bytes, delay: float = 0.0):
+        ready_at = time.monotonic() + delay
+        if self.uart:
+            # 10 bits par octet (8N1), la ligne transmet un bloc après l'autre
+            ready_at = max(ready_at, self._line_free_at) + len(data) * 10 / self.baudrate
+            self._line_free_at = ready_at
+        self.output.push(data, ready_at)
+
+    def _reply(self, command: str, lines: List[str], final: str):
+        # Bloc de réponse encadré d'un seul CR LF : le corps d'un SMS suit directement son en-tête
+        body = "\r\n" + "".join(f"{line}\r\n" for line in lines) if lines else ""
+        echo = f"{command}\r" if self.echo else ""
+        self._emit((echo + body + f"\r\n{final}\r\n").encode(), self._delay_for(command))
+
+    def _handle_line(self, line: str):
+        self.received.append(line)
+        upper = line.upper()
+        if not upper.startswith("AT"):
+            self._reply(line, [], "ERROR")
+            return
+
+        if upper.startswith(("AT+CMGS=", "AT+CMGW")):
+            error = self._pending_error(upper)
+            if error is not None:
+                if error != NO_RESPONSE:
+                    self._reply(line, [], error)
+                return
+            self._sms_target = line
+            echo = f"{line}\r" if self.echo else ""
+            self._emit((echo + "\r\n> ").encode(), self._delay_for(line))
+            return
+
+        # Ligne de commandes concaténées : AT+CSQ;+COPS?
+        commands = [upper] if upper.startswith("ATD") else self._split_batch(upper)
+        lines = []
+        for command in commands:
+            error = self._pending_error(command)
+            if error is not None:
+                if error != NO_RESPONSE:
+                    self._reply(line, lines, error)
+                return
+            result = self._execute(command, line)
+            if result is None:
+                self._reply(line, lines, "ERROR")
+                return
+            lines.extend(result)
+        self._reply(line, lines, "OK")
+        if self._next_baudrate is not None:
+            # AT+IPR répond OK à l'ancien débit puis change de débit
+            self.baudrate, self._next_baudrate = self._next_baudrate, None
+
+    @staticmethod
+    def _split_batch(upper: str) -> List[str]:
+        parts = upper.split(";")
+        return [parts[0]] + ["AT" + part for part in parts[1:] if part]
+
+    def _pending_error(self, command: str) -> Optional[str]:
+        for prefix, entry in list(self._errors.items()):
+            if command.startswith(prefix):
+                error, times = entry
+                if times is not None:
+                    entry[1] -= 1
+                    if entry[1] <= 0:
+                        del self._errors[prefix]
+                return error
+        return None
+
+    def _execute(self, command: str, original: str) -> Optional[List[str]]:
+        """Retourne les lignes de réponse d'une commande, ou None pour ERROR."""
+        response = self.responses.get(command)
+        if response is not None:
+            if callable(response):
+                result = response(self, original)
+                return [result] if isinstance(result, str) else result
+            return list(response)
+
+        if command.startswith("AT+CNMP="):
+            self.responses['AT+CNMP?'] = [f"+CNMP: {command.split('=', 1)[1]}"]
+            return []
+        if command == "AT+CNMP?":
+            return ["+CNMP: 2"]
+        if command.startswith("AT+CMGF="):
+            self.sms_text_mode = command.endswith("1")
+            return []
+        if command == "AT+CMGF?":
+            return [f"+CMGF: {1 if self.sms_text_mode else 0}"]
+        if command.startswith("AT+CSDH="):
+            self.show_text_details = command.endswith("1")
+            return []
+        if command.startswith("AT+CSCS="):
+            charset = command.split("=", 1)[1].strip('"')
+            if charset not in ("IRA", "GSM", "UCS2"):
+                return None
+            self.charset = charset
+            return []
+        if command == "AT+CSCS?":
+            return [f'+CSCS: "{self.charset}"']
+        if command.startswith("AT+CSMP="):
+            self.text_parameters = command.split("=", 1)[1]
+            return []
+        if command == "AT+CSMP?":
+            return [f"+CSMP: {self.text_parameters}"]
+        if command.startswith("AT+CNMI="):
+            self.cnmi = command.split("=", 1)[1]
+            return []
+        if command == "AT+CNMI?":
+            return [f"+CNMI: {self.cnmi}"]
+        if command.startswith("AT+CMMS="):
+            self.more_messages = int(command.split("=", 1)[1] or 0)
+            if not self.more_messages:
+                self._sms_link_open = False
+            return []
+        if command == "AT+CMMS?":
+            return [f"+CMMS: {self.more_messages}"]
+        if command.startswith("AT+CMGL"):
+            return self._list_sms(command)
+        if command.startswith("AT+CMGR="):
+            return self._read_sms(int(command.split("=", 1)[1]))
+        if command.startswith("AT+CMGD="):
+            return self._delete_sms(command.split("=", 1)[1])
+        if command == "AT+CPMS?":
+            count = len(self.sms_storage)
+            return [f'+CPMS: "SM",{count},{self.sms_capacity},"SM",{count},{self.sms_capacity},'
+                    f'"SM",{count},{self.sms_capacity}']
+        if command == "AT+IPR?":
+            return [f"+IPR: {self.baudrate}"]
+        if command.startswith("AT+IPR="):
+            return self._set_baudrate(command.split("=", 1)[1])
+        if command == "AT+CRESET":
+            self._schedule_restart()
+            return []
+        if command.startswith("ATD"):
+            return self._dial(command)
+        if command == "ATA":
+            return []
+        if command.startswith(ACCEPTED_WRITES):
+            return []
+        return None
+
+    # --- SMS ---
+
+    def _format_sms_header(self, sms: SimulatedSMS, with_index: bool) -> str:
+        prefix = f"{sms.index}," if with_index else ""
+        # Un SMS stocké (STO SENT, STO UNSENT) n'a pas d'horodatage
+        timestamp = f'"{sms.timestamp}"' if sms.timestamp else ""
+        details = ""
+        if self.show_text_details:
+            text = self._format_sms_text(sms)
+            # Longueur en caractères, en octets pour un contenu affiché en hexadécimal
+            length = len(text) // 2 if self._shows_hex(sms) else len(text)
+            toa = 145 if sms.number.startswith('+') else 129
+            if with_index:
+                details = f",{toa},{length}"
+            else:
+                dcs = 0 if SMSPdu.is_gsm7(sms.text) else 8
+                fo = 4 if sms.status.startswith("REC") else 17
+                details = f',{toa},{fo},0,{dcs},"+33609001390",145,{length}'
+        return (f'{prefix}"{sms.status}","{self._format_sms_field(sms.number)}",'
+                f'"{self._format_sms_field(sms.alpha)}",{timestamp}{details}')
+
+    def _format_sms_field(self, value: str) -> str:
+        return value.encode('utf-16-be').hex().upper() if self.charset == "UCS2" else value
+
+    def _shows_hex(self, sms: SimulatedSMS) -> bool:
+        return self.charset == "UCS2" or not SMSPdu.is_gsm7(sms.text)
+
+    def _format_sms_text(self, sms: SimulatedSMS) -> str:
+        """Texte affiché en mode texte : hexadécimal UCS2 avec AT+CSCS="UCS2" ou pour un message UCS2."""
+        if self._shows_hex(sms):
+            return sms.text.encode('utf-16-be').hex().upper()
+        if self.charset == "GSM":
+            return SMSPdu.gsm7_encode(sms.text).decode('latin-1')
+        return sms.text
+
+    def _format_pdu_header(self, sms: SimulatedSMS, with_index: bool) -> str:
+        prefix = f"{sms.index}," if with_index else ""
+        alpha = f'"{sms.alpha}"' if sms.alpha else ""
+        # Longueur du TPDU, sans l'adresse du centre SMS
+        length = len(sms.as_pdu()) // 2 - 1 - int(sms.as_pdu()[:2], 16)
+        return f"{prefix}{_PDU_STATUS_CODES[sms.status]},{alpha},{length}"
+
+    def _list_sms(self, command: str) -> Optional[List[str]]:
+        if self.sms_text_mode:
+            match = re.search(r'="([A-Z ]+)"', command)
+            wanted = match.group(1) if match else "ALL"
+        else:
+            match = re.search(r'=(\d)', command)
+            wanted = PDU_STATUSES.get(int(match.group(1)) if match else 4)
+            if wanted is None:
+                return None
+        lines = []
+        with self._lock:
+            for index in sorted(self.sms_storage):
+                sms = self.sms_storage[index]
+                if wanted != "ALL" and sms.status != wanted:
+                    continue
+                if self.sms_text_mode:
+                    lines.append(f"+CMGL: {self._format_sms_header(sms, True)}")
+                    lines.append(self._format_sms_text(sms))
+                else:
+                    lines.append(f"+CMGL: {self._format_pdu_header(sms, True)}")
+                    lines.append(sms.as_pdu())
+                if sms.status == "REC UNREAD":
+                    sms.status = "REC READ"
+        return lines
+
+    def _read_sms(self, index: int) -> Optional[List[str]]:
+        sms = self.sms_storage.get(index)
+        if sms is None:
+            return []
+        if self.sms_text_mode:
+            lines = [f"+CMGR: {self._format_sms_header(sms, False)}", self._format_sms_text(sms)]
+        else:
+            lines = [f"+CMGR: {self._format_pdu_header(sms, False)}", sms.as_pdu()]
+        if sms.status == "REC UNREAD":
+            sms.status = "REC READ"
+        return lines
+
+    def _delete_sms(self, argument: str) -> List[str]:
+        parts = [int(p) for p in argument.split(",")]
+        index, flag = parts[0], parts[1] if len(parts) > 1 else 0
+        with self._lock:
+            if flag == 0:
+                self.sms_storage.pop(index, None)
+                return []
+            statuses = {1: ("REC READ",), 2: ("REC READ", "STO SENT"),
+                        3: ("REC READ", "STO SENT", "STO UNSENT")}.get(flag)
+            for i in list(self.sms_storage):
+                if statuses is None or self.sms_storage[i].status in statuses:
+                    del self.sms_storage[i]
+        return []
+
+    def _complete_sms_send(self, command: str, text: str):
+        reference = next(self._message_reference) % 256
+        self.sent_messages.append((command, text, reference))
+        delay = self._delay_for(command)
+        if not self._sms_link_open:
+            delay += self.sms_link_setup
+            self._sms_link_open = self.more_messages > 0
+        self._emit(f"\r\n+CMGS: {reference}\r\n\r\nOK\r\n".encode(), delay)
+        recipient = self._status_report_recipient(command, text)
+        if recipient is not None:
+            self.send_status_report(reference, recipient, self.delivery_status, delay + self.delivery_delay)
+
+    def _status_report_recipient(self, command: str, text: str) -> Optional[str]:
+        """Destinataire d'un envoi qui demande un rapport de remise (TP-SRR), sinon None."""
+        if self.sms_text_mode:
+            match = re.search(r'"([^"]*)"', command)
+            if match is None or not int(self.text_parameters.split(",")[0]) & 0x20:
+                return None
+            number = match.group(1)
+            return bytes.fromhex(number).decode('utf-16-be') if self.charset == "UCS2" else number
+        pdu = text.strip()
+        try:
+            submitted = SMSPdu.decode_pdu(pdu)
+            first = bytes.fromhex(pdu)[1 + int(pdu[:2], 16)]
+        except (ValueError, IndexError):
+            return None
+        return submitted.address if first & 0x20 else None
+
+    # --- Appels, redémarrage, débit ---
+
+    def _dial(self, command: str) -> List[str]:
+        if command.endswith(";"):
+            self.inject_urc("VOICE CALL: BEGIN", self._delay_for(command) + 0.05)
+        return []
+
+    def _schedule_restart(self):
+        delay = self._delay_for("AT+CRESET") + 0.1
+        for urc in ("RDY", "+CPIN: READY", "SMS DONE", "PB DONE"):
+            self.inject_urc(urc, delay)
+
+    def _set_baudrate(self, value: str) -> Optional[List[str]]:
+        if not value.isdigit() or int(value) not in MODULE_BAUDRATES:
+            return None
+        self._next_baudrate = int(value)
+        return []
+
+
+class SimulatedSerial:
+    """Port série en mémoire relié à un SIM7600Simulator (sous-ensemble de l'API pyserial)."""
+
+    def __init__(self, simulator: SIM7600Simulator, port="sim://sim7600", baudrate=115200, timeout=2):
+        self.simulator = simulator
+        self.port = port
+        self._baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.bytes_written = 0
+
+    @property
+    def baudrate(self):
+        return self._baudrate
+
+    @baudrate.setter
+    def baudrate(self, value):
+        limit = self.simulator.host_max_baudrate
+        if limit is not None and value > limit:
+            raise ValueError(f"Débit non supporté par le port hôte : {value}")
+        self._baudrate = value
+
+    @property
+    def in_waiting(self):
+        return self.simulator.output.available()
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise OSError("Port simulé fermé")
+        self.bytes_written += len(data)
+        if self.simulator.uart and self._baudrate != self.simulator.baudrate:
+            # Débits différents : le module ne reconnaît pas les caractères reçus
+            return len(data)
+        self.simulator.receive(data)
+        return len(data)
+
+    def read(self, size=1) -> bytes:
+        if not self.is_open:
+            raise OSError("Port simulé fermé")
+        return self.simulator.output.take(size, self.timeout)
+
+    def read_until(self, expected=b"\n", size=None) -> bytes:
+        """Même sémantique que pyserial : le délai porte sur l'ensemble de la lecture."""
+        end = None if self.timeout is None else time.monotonic() + self.timeout
+        line = bytearray()
+        while True:
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            chunk = self.simulator.output.take(1, remaining)
+            if not chunk:
+                break
+            line += chunk
+            if line.endswith(expected) or (size is not None and len(line) >= size):
+                break
+        return bytes(line)
+
+    def readline(self) -> bytes:
+        return self.read_until(b"\n")
+
+    def reset_input_buffer(self):
+        self.simulator.output.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur SIM7600 servi sur un pseudo-terminal.")
+    parser.add_argument("--latency", type=float, default=0.01, help="latence par commande (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="gigue maximale (s)")
+    parser.add_argument("--sms", type=int, default=3, help="nombre de SMS en mémoire au démarrage")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = SIM7600Simulator(latency=args.latency, jitter=args.jitter)
+    for i in range(args.sms):
+        simulator.add_sms("+33612345678", f"Message de test {i + 1}", status="REC READ")
+    port = simulator.open_pty()
+    logging.info(f"Simulateur SIM7600 disponible sur {port} (Ctrl-C pour arrêter)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.close()
+
+
+if __name__ == '__main__':
+    main()
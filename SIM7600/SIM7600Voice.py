@@ -1,10 +1,10 @@
 import logging
 import re
-import time
+import threading
 import enum
 
 
-from SIM7600Cmd import SIM7600Cmd
+from SIM7600Cmd import SIM7600Cmd, setup_logging
 from SerialPortCategorizer import SerialPortCategorizer
 from TextToSpeech import TextToSpeech
 
@@ -15,7 +15,7 @@ class TypeCall(enum.Enum):
 
 
 class SIM7600Voice(SIM7600Cmd):
-    def __init__(self, port, tts=None):
+    def __init__(self, port, tts=None, call_timeout=60):
         """Initialise le module vocal sur le port spécifié."""
         super().__init__(port)
         self.text_automate = "Message automatique du module SIM 7600"
@@ -23,12 +23,25 @@ class SIM7600Voice(SIM7600Cmd):
         self.duration = 0
         self.phone = None
         self.mode_call = TypeCall.VOICE
+        self.call_timeout = call_timeout
+        self.answered = False
+        self._call_event = threading.Event()
+
+        # Les événements d'appel arrivent par URC, routés par le thread lecteur
+        self.subscribe_urc("VOICE CALL: BEGIN", self._on_call_begin)
+        self.subscribe_urc("VOICE CALL: END", self._on_call_end)
+        for prefix in ("NO CARRIER", "BUSY", "NO ANSWER"):
+            self.subscribe_urc(prefix, self._on_call_failed)
 
     def call(self, phone_number):
         """Compose un numéro de téléphone et détecte le décrochage de l'appelé."""
         self.phone = phone_number
-        response = self.send_command(f'ATD{phone_number};')
-        if 'ATD' in response:
+        self.answered = False
+        self._call_event.clear()
+        self.start_urc_reader()
+        result = self.execute_command(f'ATD{phone_number};')
+        response = self.format_response(result)
+        if result.success:
             logging.info("Appel lancé avec succès.")
             self._wait_for_connection()
         else:
@@ -36,16 +49,27 @@ class SIM7600Voice(SIM7600Cmd):
         return response
 
     def _wait_for_connection(self):
-        """Attend la connexion de l'appel et gère le statut."""
-        while True:
-            call_status = self.read_response()
-            if 'CONNECT' in call_status:
-                logging.info(f"L'appelé {self.phone} a décroché.")
-                break
-            elif 'NO CARRIER' in call_status:
-                logging.info(f"L'appel avec {self.phone} a été terminé.")
-                break
-            time.sleep(1)  # Attendre un moment avant de vérifier à nouveau
+        """Attend le décrochage ou la fin de l'appel, notifiés par les URC."""
+        if not self._call_event.wait(self.call_timeout):
+            logging.warning(f"Aucune réponse de {self.phone} après {self.call_timeout}s.")
+        return self.answered
+
+    def _on_call_begin(self, line):
+        logging.debug(f"Début de l'appel avec {self.phone}")
+        logging.info(f"L'appelé {self.phone} a décroché.")
+        self.answered = True
+        self._call_event.set()
+        if self.mode_call == TypeCall.AUTOMATE:
+            self._handle_automate_mode()
+
+    def _on_call_end(self, line):
+        self.duration = self.extract_call_duration(line)
+        logging.debug(f"Fin de l'appel avec {self.phone}")
+        self._call_event.set()
+
+    def _on_call_failed(self, line):
+        logging.info(f"L'appel avec {self.phone} a été terminé ({line}).")
+        self._call_event.set()
 
     def hang_up(self):
         """Raccroche l'appel en cours."""
@@ -74,28 +98,6 @@ class SIM7600Voice(SIM7600Cmd):
             logging.error("Erreur lors du réglage du volume.")
         return response
 
-    def read_response(self):
-        """Lit la réponse du module SIM7600 depuis le port série."""
-        response = []
-        while True:
-            line = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
-            if line:
-                if "BEGIN" in line:
-                    logging.debug(f"Début de l'appel avec {self.phone}")
-                    if self.mode_call == TypeCall.AUTOMATE:
-                        self._handle_automate_mode()
-                elif "END" in line:
-                    self.duration = self.extract_call_duration(line)
-                    logging.debug(f"Fin de l'appel avec {self.phone}")
-                elif "NO CARRIER" in line:
-                    pass
-                else:
-                    logging.debug(f"Lu: {line}")
-                response.append(line)
-            else:
-                break  # Arrête de lire si aucune nouvelle donnée n'est reçue
-        return '\n'.join(response)
-
     def _handle_automate_mode(self):
         """Gère le mode d'appel automatique."""
         if self.tts:
@@ -133,6 +135,7 @@ class SIM7600Voice(SIM7600Cmd):
 
 # Exemple d'utilisation
 def main():
+    setup_logging()
     serp = SerialPortCategorizer()
     port=serp.get_port("at")
     # tts = TextToSpeech()
@@ -0,0 +1,547 @@
+"""
+Codage et décodage des SMS en mode PDU (AT+CMGF=0), selon 3GPP TS 23.040 et 23.038.
+
+Trois alphabets sont pris en charge : GSM 7 bits (avec la table d'extension), 8 bits
+et UCS2. Un message trop long pour un PDU est découpé avec un en-tête de concaténation
+(UDH, IEI 0x00) ; à la réception, ConcatenatedMessages réassemble les parties. Le
+décodage est déterministe : chaque champ est lu à sa position dans le PDU, l'alphabet
+est donné par le DCS, sans heuristique sur le contenu.
+"""
+import codecs
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Alphabet GSM 7 bits par défaut (TS 23.038 §6.2.1), indexé par valeur de septet
+GSM7_BASIC = (
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞ\x1bÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+
+# Table d'extension (précédée du septet d'échappement 0x1B)
+GSM7_EXTENSION = {
+    0x0A: "\f", 0x14: "^", 0x28: "{", 0x29: "}", 0x2F: "\\",
+    0x3C: "[", 0x3D: "~", 0x3E: "]", 0x40: "|", 0x65: "€",
+}
+
+GSM7_ESCAPE = 0x1B
+
+ENCODING_GSM7 = 'gsm7'
+ENCODING_8BIT = '8bit'
+ENCODING_UCS2 = 'ucs2'
+
+# Type de message (TP-MTI, deux bits de poids faible du premier octet)
+MTI_DELIVER = 0
+MTI_SUBMIT = 1
+MTI_STATUS_REPORT = 2
+MESSAGE_KINDS = {MTI_DELIVER: 'DELIVER', MTI_SUBMIT: 'SUBMIT', MTI_STATUS_REPORT: 'STATUS-REPORT'}
+
+# Capacité d'un PDU, sans et avec l'en-tête de concaténation de 6 octets
+SINGLE_LIMITS = {ENCODING_GSM7: 160, ENCODING_8BIT: 140, ENCODING_UCS2: 140}
+PART_LIMITS = {ENCODING_GSM7: 153, ENCODING_8BIT: 134, ENCODING_UCS2: 134}
+MAX_PARTS = 255
+
+# Durée de validité relative par défaut (TP-VP 167 = 24 heures, valeur de AT+CSMP)
+DEFAULT_VALIDITY = 167
+
+_DCS = {ENCODING_GSM7: 0x00, ENCODING_8BIT: 0x04, ENCODING_UCS2: 0x08}
+
+# Chiffres en semi-octets : 0-9 puis *, #, a, b, c (TS 23.040 §9.1.2.3)
+_SEMI_OCTET_DIGITS = "0123456789*#abc"
+_SEMI_OCTET_ENCODE = {digit: index for index, digit in enumerate(_SEMI_OCTET_DIGITS)}
+
+# Tables du codec « charmap » (conversion en C) : 128 septets, les octets 128-255 sont indéfinis
+_GSM7_DECODE = GSM7_BASIC + "\ufffe" * 128
+_GSM7_ENCODE: Dict[int, bytes] = {ord(char): bytes([index]) for index, char in enumerate(GSM7_BASIC)
+                                  if index != GSM7_ESCAPE}
+_GSM7_ENCODE.update({ord(char): bytes([GSM7_ESCAPE, code]) for code, char in GSM7_EXTENSION.items()})
+_GSM7_CHARS = frozenset(map(chr, _GSM7_ENCODE))
+
+# Compactage par blocs de 256 septets (224 octets, alignés) : masque des septets de rang j modulo 8
+_BLOCK_SEPTETS = 256
+_SEPTET_MASKS = tuple(sum(0x7F << (8 * (8 * group + rank)) for group in range(_BLOCK_SEPTETS // 8))
+                      for rank in range(8))
+
+# Référence des messages concaténés (8 bits), tirée au hasard au démarrage
+_concat_references = itertools.count(random.randrange(256))
+
+
+class Concatenation(NamedTuple):
+    """En-tête de concaténation : référence commune, nombre de parties et rang (à partir de 1)."""
+    reference: int
+    total: int
+    sequence: int
+
+
+class SmsPdu(NamedTuple):
+    """
+    PDU décodé. address est l'expéditeur (DELIVER) ou le destinataire (SUBMIT,
+    STATUS-REPORT). data contient les données utilisateur sans en-tête (septets pour
+    GSM 7 bits) ; text est None pour un message 8 bits.
+    """
+    kind: str
+    smsc: Optional[str]
+    address: str
+    timestamp: Optional[datetime]
+    encoding: str
+    data: bytes
+    text: Optional[str]
+    concat: Optional[Concatenation] = None
+    message_reference: Optional[int] = None
+    status: Optional[int] = None
+    discharge_time: Optional[datetime] = None
+
+    @property
+    def delivered(self) -> bool:
+        """Rapport d'état : vrai si le SMS a été remis (TP-ST 0x00 à 0x1F)."""
+        return self.status is not None and self.status < 0x20
+
+
+class SubmitPdu(NamedTuple):
+    """PDU à envoyer : hexadécimal complet et longueur du TPDU (hors SMSC) pour AT+CMGS=<length>."""
+    pdu: str
+    length: int
+
+
+class SmsMessage(NamedTuple):
+    """Message complet, éventuellement réassemblé à partir de plusieurs PDU."""
+    address: str
+    timestamp: Optional[datetime]
+    encoding: str
+    text: Optional[str]
+    data: bytes
+    indices: Tuple[int, ...] = ()
+    complete: bool = True
+
+
+# --- Alphabet GSM 7 bits ---
+
+def is_gsm7(text: str) -> bool:
+    """Vrai si le texte est représentable dans l'alphabet GSM 7 bits (table d'extension comprise)."""
+    return _GSM7_CHARS.issuperset(text)
+
+
+def gsm7_encode(text: str) -> bytes:
+    """Convertit un texte en septets (un octet par septet, valeurs 0-127)."""
+    try:
+        return codecs.charmap_encode(text, 'strict', _GSM7_ENCODE)[0]
+    except UnicodeEncodeError:
+        unsupported = "".join(sorted(set(text) - _GSM7_CHARS))
+        raise ValueError(f"Caractères hors de l'alphabet GSM 7 bits : {unsupported!r}") from None
+
+
+def gsm7_decode(septets: bytes) -> str:
+    """Convertit des septets en texte ; un échappement suivi d'un code inconnu donne le caractère de base."""
+    if GSM7_ESCAPE not in septets:
+        return codecs.charmap_decode(septets, 'strict', _GSM7_DECODE)[0]
+    # Chaque segment qui suit un échappement commence par un code de la table d'extension
+    first, *escaped = bytes(septets).split(b"\x1b")
+    chars = [codecs.charmap_decode(first, 'strict', _GSM7_DECODE)[0]]
+    for segment in escaped:
+        if segment:
+            chars.append(GSM7_EXTENSION.get(segment[0], GSM7_BASIC[segment[0]]))
+            chars.append(codecs.charmap_decode(segment[1:], 'strict', _GSM7_DECODE)[0])
+    return "".join(chars)
+
+
+def pack_septets(septets: bytes, fill_bits: int = 0) -> bytes:
+    """Compacte les septets sur 7 bits, après fill_bits bits de bourrage (alignement sur l'UDH)."""
+    count = len(septets)
+    packed = bytearray()
+    for start in range(0, count, _BLOCK_SEPTETS):
+        block = septets[start:start + _BLOCK_SEPTETS]
+        padded = bytes(block) + bytes(-len(block) % 8)
+        # Chaque septet glisse de son rang modulo 8 : 8 opérations sur un seul entier
+        value = int.from_bytes(padded, 'little')
+        compact = 0
+        for shift, mask in enumerate(_SEPTET_MASKS):
+            compact |= (value & mask) >> shift
+        octets = bytearray(compact.to_bytes(len(padded), 'little'))
+        del octets[7::8]  # un octet vide par groupe de 8 septets
+        packed += octets
+    size = (count * 7 + fill_bits + 7) // 8
+    if fill_bits:
+        return (int.from_bytes(packed, 'little') << fill_bits).to_bytes(size, 'little')
+    return bytes(packed[:size])
+
+
+def unpack_septets(data: bytes, count: int) -> bytes:
+    """Extrait count septets de données compactées."""
+    if len(data) * 8 < count * 7:
+        raise ValueError(f"Données GSM 7 bits tronquées : {len(data) * 8 // 7} septets sur {count}")
+    septets = bytearray()
+    block_octets = _BLOCK_SEPTETS * 7 // 8
+    for start in range(0, (count * 7 + 7) // 8, block_octets):
+        wanted = min(count - len(septets), _BLOCK_SEPTETS)
+        groups = (wanted + 7) // 8
+        raw = bytes(data[start:start + groups * 7]).ljust(groups * 7, b"\x00")
+        # Un octet vide tous les 7 octets, puis chaque septet revient sur 8 bits
+        spread = bytearray(groups * 8)
+        for i in range(7):
+            spread[i::8] = raw[i::7]
+        value = int.from_bytes(spread, 'little')
+        expanded = 0
+        for shift, mask in enumerate(_SEPTET_MASKS):
+            expanded |= (value << shift) & mask
+        septets += expanded.to_bytes(groups * 8, 'little')[:wanted]
+    return bytes(septets)
+
+
+def choose_encoding(message: Union[str, bytes]) -> str:
+    """Alphabet le plus compact pour le message : GSM 7 bits si possible, sinon UCS2 (8 bits pour bytes)."""
+    if isinstance(message, (bytes, bytearray)):
+        return ENCODING_8BIT
+    return ENCODING_GSM7 if is_gsm7(message) else ENCODING_UCS2
+
+
+# --- Adresses et horodatages ---
+
+def encode_address(number: str) -> bytes:
+    """Adresse TP-DA/TP-OA : nombre de chiffres, type (international si '+') et semi-octets inversés."""
+    toa = 0x91 if number.startswith('+') else 0x81
+    digits = number[1:] if toa == 0x91 else number
+    if not digits:
+        raise ValueError("Numéro de téléphone vide")
+    try:
+        nibbles = [_SEMI_OCTET_ENCODE[digit] for digit in digits]
+    except KeyError as e:
+        raise ValueError(f"Caractère invalide dans le numéro {number!r} : {e.args[0]!r}") from None
+    if len(nibbles) % 2:
+        nibbles.append(0x0F)
+    octets = bytes(nibbles[i] | nibbles[i + 1] << 4 for i in range(0, len(nibbles), 2))
+    return bytes([len(digits), toa]) + octets
+
+
+def _semi_octets(data: bytes) -> str:
+    digits = []
+    for octet in data:
+        for nibble in (octet & 0x0F, octet >> 4):
+            if nibble == 0x0F:
+                break
+            digits.append(_SEMI_OCTET_DIGITS[nibble])
+    return "".join(digits)
+
+
+def _decode_address(pdu: bytes, pos: int) -> Tuple[str, int]:
+    """Lit une adresse TP-OA/TP-DA/TP-RA à partir de pos ; retourne (adresse, position suivante)."""
+    length, toa = pdu[pos], pdu[pos + 1]
+    size = (length + 1) // 2
+    value = pdu[pos + 2:pos + 2 + size]
+    if len(value) < size:
+        raise ValueError("Adresse tronquée")
+    if toa & 0x70 == 0x50:
+        # Expéditeur alphanumérique : length est le nombre de semi-octets utiles
+        address = gsm7_decode(unpack_septets(value, length * 4 // 7))
+    else:
+        address = _semi_octets(value)
+        if toa & 0x70 == 0x10:
+            address = "+" + address
+    return address, pos + 2 + size
+
+
+def _decode_smsc(pdu: bytes) -> Tuple[Optional[str], int]:
+    """Adresse du centre SMS en tête de PDU (longueur en octets, type compris)."""
+    length = pdu[0]
+    if length == 0:
+        return None, 1
+    toa = pdu[1]
+    number = _semi_octets(pdu[2:1 + length])
+    return ("+" + number if toa & 0x70 == 0x10 else number), 1 + length
+
+
+def _swap(value: int) -> int:
+    """Valeur décimale d'un octet en semi-octets inversés (0x81 -> 18)."""
+    return (value & 0x0F) * 10 + (value >> 4)
+
+
+def decode_timestamp(data: bytes) -> datetime:
+    """TP-SCTS/TP-DT : 7 octets AA MM JJ hh mm ss fuseau (quarts d'heure, bit de signe)."""
+    year, month, day, hour, minute, second = (_swap(octet) for octet in data[:6])
+    zone = data[6]
+    quarters = (zone & 0x07) * 10 + (zone >> 4)
+    offset = timedelta(minutes=15 * quarters)
+    # Année sur deux chiffres : même pivot que strptime (%y), 69-99 -> 19xx
+    year += 1900 if year >= 69 else 2000
+    return datetime(year, month, day, hour, minute, second,
+                    tzinfo=timezone(-offset if zone & 0x08 else offset))
+
+
+def parse_text_timestamp(date: str, time_of_day: str) -> Optional[datetime]:
+    """Horodatage du mode texte (« 24/10/18 », « 10:15:00+08 », fuseau en quarts d'heure), ou None."""
+    try:
+        moment = datetime.strptime(f"{date},{time_of_day[:8]}", "%y/%m/%d,%H:%M:%S")
+        quarters = int(time_of_day[8:] or 0)
+    except ValueError:
+        return None
+    return moment.replace(tzinfo=timezone(timedelta(minutes=15 * quarters)))
+
+
+def encode_timestamp(moment: datetime) -> bytes:
+    """Inverse de decode_timestamp (une date sans fuseau est considérée en UTC)."""
+    offset = moment.utcoffset() if moment.tzinfo is not None else timedelta(0)
+    quarters = int(abs(offset.total_seconds()) // 900)
+    fields = (moment.year % 100, moment.month, moment.day, moment.hour, moment.minute, moment.second)
+    octets = bytes((value % 10) << 4 | value // 10 for value in fields)
+    zone = (quarters % 10) << 4 | quarters // 10 | (0x08 if offset < timedelta(0) else 0)
+    return octets + bytes([zone])
+
+
+# --- Données utilisateur ---
+
+def _split(message: Union[str, bytes], encoding: str) -> List[bytes]:
+    """Découpe le message en données utilisateur par partie (septets ou octets), sans couper un caractère."""
+    if encoding == ENCODING_GSM7:
+        payload = gsm7_encode(message)
+    elif encoding == ENCODING_UCS2:
+        payload = message.encode('utf-16-be')
+    elif encoding == ENCODING_8BIT:
+        payload = bytes(message) if isinstance(message, (bytes, bytearray)) else message.encode('latin-1')
+    else:
+        raise ValueError(f"Encodage SMS inconnu : {encoding}")
+    if len(payload) <= SINGLE_LIMITS[encoding]:
+        return [payload]
+
+    limit = PART_LIMITS[encoding]
+    parts = []
+    start = 0
+    while start < len(payload):
+        end = min(start + limit, len(payload))
+        if end < len(payload):
+            if encoding == ENCODING_GSM7 and payload[end - 1] == GSM7_ESCAPE:
+                end -= 1  # l'échappement reste avec son caractère
+            elif encoding == ENCODING_UCS2 and 0xD8 <= payload[end - 2] <= 0xDB:
+                end -= 2  # la paire de substitution n'est pas coupée
+        parts.append(payload[start:end])
+        start = end
+    if len(parts) > MAX_PARTS:
+        raise ValueError(f"Message trop long : {len(parts)} parties (maximum {MAX_PARTS})")
+    return parts
+
+
+def _user_data(payload: bytes, encoding: str, concat: Optional[Concatenation]) -> bytes:
+    """TP-UDL suivi de TP-UD, avec l'en-tête de concaténation le cas échéant."""
+    header = b""
+    if concat is not None:
+        header = bytes([5, 0x00, 3, concat.reference, concat.total, concat.sequence])
+    if encoding == ENCODING_GSM7:
+        header_septets = (len(header) * 8 + 6) // 7
+        fill_bits = header_septets * 7 - len(header) * 8
+        return bytes([header_septets + len(payload)]) + header + pack_septets(payload, fill_bits)
+    return bytes([len(header) + len(payload)]) + header + payload
+
+
+def _parts(message: Union[str, bytes], encoding: Optional[str], reference: Optional[int]):
+    encoding = encoding or choose_encoding(message)
+    payloads = _split(message, encoding)
+    if len(payloads) == 1:
+        return encoding, [(payloads[0], None)]
+    if reference is None:
+        reference = next(_concat_references) % 256
+    total = len(payloads)
+    return encoding, [(payload, Concatenation(reference, total, sequence))
+                      for sequence, payload in enumerate(payloads, 1)]
+
+
+def encode_submit(number: str, message: Union[str, bytes], encoding: Optional[str] = None,
+                  status_report: bool = False, validity: Optional[int] = DEFAULT_VALIDITY,
+                  reference: Optional[int] = None) -> List[SubmitPdu]:
+    """
+    Construit les PDU SMS-SUBMIT d'un message, découpé s'il dépasse la capacité d'un PDU
+    (160 caractères GSM, 140 octets, 70 caractères UCS2). Le centre SMS est celui de la SIM.
+
+    Args:
+        encoding: 'gsm7', '8bit' ou 'ucs2' ; choisi d'après le contenu par défaut.
+        status_report: Demande un rapport de remise (TP-SRR).
+        validity: Durée de validité relative (TP-VP), None pour l'omettre.
+        reference: Référence de concaténation (tirée automatiquement par défaut).
+
+    Raises:
+        ValueError: Numéro invalide, caractère non représentable ou message trop long.
+    """
+    encoding, parts = _parts(message, encoding, reference)
+    address = encode_address(number)
+    pdus = []
+    for payload, concat in parts:
+        first = MTI_SUBMIT
+        if validity is not None:
+            first |= 0x10  # TP-VPF relatif
+        if status_report:
+            first |= 0x20
+        if concat is not None:
+            first |= 0x40
+        tpdu = bytes([first, 0x00]) + address + bytes([0x00, _DCS[encoding]])
+        if validity is not None:
+            tpdu += bytes([validity])
+        tpdu += _user_data(payload, encoding, concat)
+        pdus.append(SubmitPdu("00" + tpdu.hex().upper(), len(tpdu)))
+    return pdus
+
+
+def encode_deliver(sender: str, message: Union[str, bytes], timestamp: Optional[datetime] = None,
+                   encoding: Optional[str] = None, reference: Optional[int] = None) -> List[str]:
+    """PDU SMS-DELIVER (tels que listés par AT+CMGL=4) d'un message reçu ; sert aux simulations et mesures."""
+    encoding, parts = _parts(message, encoding, reference)
+    scts = encode_timestamp(timestamp or datetime.now(timezone.utc))
+    address = encode_address(sender)
+    pdus = []
+    for payload, concat in parts:
+        first = MTI_DELIVER | 0x04 | (0x40 if concat is not None else 0)
+        tpdu = bytes([first]) + address + bytes([0x00, _DCS[encoding]]) + scts
+        tpdu += _user_data(payload, encoding, concat)
+        pdus.append("00" + tpdu.hex().upper())
+    return pdus
+
+
+def encode_status_report(recipient: str, reference: int, status: int = 0, timestamp: Optional[datetime] = None,
+                         discharge_time: Optional[datetime] = None) -> str:
+    """PDU SMS-STATUS-REPORT (rapport de remise de l'envoi reference) ; sert aux simulations et mesures."""
+    scts = encode_timestamp(timestamp or datetime.now(timezone.utc))
+    dt = encode_timestamp(discharge_time or timestamp or datetime.now(timezone.utc))
+    tpdu = bytes([MTI_STATUS_REPORT | 0x04, reference & 0xFF]) + encode_address(recipient) + scts + dt
+    return "00" + (tpdu + bytes([status])).hex().upper()
+
+
+def encoding_of(dcs: int) -> str:
+    """Alphabet indiqué par le schéma de codage TP-DCS (TS 23.038 §4)."""
+    group = dcs & 0xF0
+    if group < 0x80:
+        # Codage général (éventuellement marqué pour suppression automatique)
+        return (ENCODING_GSM7, ENCODING_8BIT, ENCODING_UCS2, ENCODING_8BIT)[(dcs >> 2) & 0x03]
+    if group == 0xF0:
+        return ENCODING_8BIT if dcs & 0x04 else ENCODING_GSM7
+    if group == 0xE0:
+        return ENCODING_UCS2
+    return ENCODING_GSM7  # groupes d'indication de message en attente
+
+
+def _concatenation(header: bytes) -> Optional[Concatenation]:
+    """Cherche l'élément de concaténation (IEI 0x00 ou 0x08) dans l'en-tête UDH."""
+    pos = 0
+    while pos + 2 <= len(header):
+        iei, length = header[pos], header[pos + 1]
+        value = header[pos + 2:pos + 2 + length]
+        if iei == 0x00 and length == 3:
+            return Concatenation(value[0], value[1], value[2])
+        if iei == 0x08 and length == 4:
+            return Concatenation(value[0] << 8 | value[1], value[2], value[3])
+        pos += 2 + length
+    return None
+
+
+def _decode_user_data(pdu: bytes, pos: int, dcs: int, has_header: bool):
+    encoding = encoding_of(dcs)
+    udl = pdu[pos]
+    ud = pdu[pos + 1:]
+    concat = None
+    header_length = 0
+    if has_header and ud:
+        header_length = ud[0] + 1
+        concat = _concatenation(ud[1:header_length])
+    if encoding == ENCODING_GSM7:
+        septets = unpack_septets(ud, udl)
+        data = septets[(header_length * 8 + 6) // 7:]
+        return encoding, data, gsm7_decode(data), concat
+    if len(ud) < udl:
+        raise ValueError(f"Données utilisateur tronquées : {len(ud)} octets sur {udl}")
+    data = bytes(ud[header_length:udl])
+    text = data.decode('utf-16-be', errors='replace') if encoding == ENCODING_UCS2 else None
+    return encoding, data, text, concat
+
+
+def decode_pdu(pdu: Union[str, bytes], has_smsc: bool = True) -> SmsPdu:
+    """
+    Décode un PDU SMS-DELIVER, SMS-SUBMIT ou SMS-STATUS-REPORT (hexadécimal ou octets).
+
+    Raises:
+        ValueError: PDU mal formé ou tronqué.
+    """
+    try:
+        data = bytes.fromhex(pdu) if isinstance(pdu, str) else bytes(pdu)
+        smsc, pos = _decode_smsc(data) if has_smsc else (None, 0)
+        first = data[pos]
+        mti = first & 0x03
+        pos += 1
+        if mti == MTI_DELIVER:
+            address, pos = _decode_address(data, pos)
+            dcs = data[pos + 1]
+            timestamp = decode_timestamp(data[pos + 2:pos + 9])
+            encoding, payload, text, concat = _decode_user_data(data, pos + 9, dcs, bool(first & 0x40))
+            return SmsPdu('DELIVER', smsc, address, timestamp, encoding, payload, text, concat)
+        if mti == MTI_SUBMIT:
+            reference = data[pos]
+            address, pos = _decode_address(data, pos + 1)
+            dcs = data[pos + 1]
+            pos += 2
+            vpf = (first >> 3) & 0x03
+            pos += {0: 0, 2: 1}.get(vpf, 7)
+            encoding, payload, text, concat = _decode_user_data(data, pos, dcs, bool(first & 0x40))
+            return SmsPdu('SUBMIT', smsc, address, None, encoding, payload, text, concat, reference)
+        if mti == MTI_STATUS_REPORT:
+            reference = data[pos]
+            address, pos = _decode_address(data, pos + 1)
+            timestamp = decode_timestamp(data[pos:pos + 7])
+            discharge = decode_timestamp(data[pos + 7:pos + 14])
+            status = data[pos + 14]
+            return SmsPdu('STATUS-REPORT', smsc, address, timestamp, ENCODING_GSM7, b"", None, None,
+                          reference, status, discharge)
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"PDU invalide : {e}") from None
+    raise ValueError(f"PDU invalide : type de message {mti} non pris en charge")
+
+
+# --- Réassemblage ---
+
+def _message(parts: List[Tuple[SmsPdu, Optional[int]]], complete: bool) -> SmsMessage:
+    first = parts[0][0]
+    data = b"".join(pdu.data for pdu, _ in parts)
+    if first.encoding == ENCODING_GSM7:
+        text = gsm7_decode(data)
+    elif first.encoding == ENCODING_UCS2:
+        # Décodé une fois réassemblé : une paire de substitution peut chevaucher deux parties
+        text = data.decode('utf-16-be', errors='replace')
+    else:
+        text = None
+    indices = tuple(index for _, index in parts if index is not None)
+    return SmsMessage(first.address, first.timestamp, first.encoding, text, data, indices, complete)
+
+
+class ConcatenatedMessages:
+    """
+    Réassemble les messages concaténés. Les parties sont regroupées par (expéditeur,
+    référence, nombre de parties) ; un groupe incomplet plus ancien que max_age secondes
+    est abandonné au prochain ajout.
+    """
+
+    def __init__(self, max_age: float = 24 * 3600.0):
+        self.max_age = max_age
+        self._pending: Dict[Tuple[str, int, int], Tuple[float, Dict[int, Tuple[SmsPdu, Optional[int]]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, pdu: SmsPdu, index: Optional[int] = None) -> Optional[SmsMessage]:
+        """Ajoute un PDU (et son index en mémoire) ; retourne le message dès qu'il est complet."""
+        if pdu.concat is None or pdu.concat.total <= 1:
+            return _message([(pdu, index)], True)
+        now = time.monotonic()
+        self._expire(now)
+        key = (pdu.address, pdu.concat.reference, pdu.concat.total)
+        _, parts = self._pending.setdefault(key, (now, {}))
+        parts[pdu.concat.sequence] = (pdu, index)
+        if len(parts) < pdu.concat.total:
+            return None
+        del self._pending[key]
+        return _message([parts[sequence] for sequence in sorted(parts)], True)
+
+    def flush(self) -> List[SmsMessage]:
+        """Retourne les messages incomplets en attente (complete=False) et vide la file."""
+        messages = [_message([parts[sequence] for sequence in sorted(parts)], False)
+                    for _, parts in self._pending.values()]
+        self._pending.clear()
+        return messages
+
+    def _expire(self, now: float):
+        for key in [key for key, (started, _) in self._pending.items() if now - started > self.max_age]:
+            del self._pending[key]
@@ -67,6 +67,14 @@ class SerialPortCategorizer:
         except KeyError:
             return None  # Catégorie non trouvée
 
+    def get_all_ports(self, categorie):
+        """Retourne les noms de tous les ports de la catégorie donnée (un par module pour 'at')."""
+        try:
+            category_enum = PortCategory[categorie.upper()]
+        except KeyError:
+            return []  # Catégorie non trouvée
+        return [port.device for port in self.categorized_ports.get(category_enum, [])]
+
 if __name__ == "__main__":
     port_categorizer = SerialPortCategorizer()
     category = "gps"
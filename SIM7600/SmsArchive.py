@@ -0,0 +1,321 @@
+"""
+Archive persistante des SMS reçus et envoyés (SQLite).
+
+La base est ouverte en mode WAL : l'export, lu par sa propre connexion, ne bloque pas
+l'écriture. Les messages sont mis en attente puis insérés par lots, dans une seule
+transaction ; un lot est écrit dès qu'il atteint batch_size messages, que le précédent
+date de plus de flush_interval secondes, avant chaque recherche et à la fermeture.
+
+Un message déjà archivé (même IMEI, index, horodatage et empreinte du contenu) est
+ignoré : relire la carte SIM ne crée pas de doublons. Les références (mr) des SMS envoyés,
+une par partie, sont indexées pour retrouver un envoi à partir d'un rapport de remise.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import SMSPdu
+from SMSPdu import SmsMessage
+
+DIRECTION_IN = 'in'
+DIRECTION_OUT = 'out'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sms (
+    id INTEGER PRIMARY KEY,
+    direction TEXT NOT NULL,
+    imei TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    ts REAL NOT NULL,
+    sms_index INTEGER,
+    status TEXT,
+    content TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    archived REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sms_dedup ON sms (imei, COALESCE(sms_index, -1), ts, hash);
+CREATE INDEX IF NOT EXISTS sms_phone_ts ON sms (phone, ts);
+CREATE INDEX IF NOT EXISTS sms_ts ON sms (ts);
+CREATE INDEX IF NOT EXISTS sms_imei_ts ON sms (imei, ts);
+CREATE TABLE IF NOT EXISTS sms_reference (
+    imei TEXT NOT NULL,
+    mr INTEGER NOT NULL,
+    sms_id INTEGER NOT NULL REFERENCES sms (id) ON DELETE CASCADE,
+    part INTEGER NOT NULL,
+    PRIMARY KEY (imei, mr, sms_id)
+);
+CREATE INDEX IF NOT EXISTS sms_reference_sms ON sms_reference (sms_id);
+"""
+
+_COLUMNS = ("sms.id, sms.direction, sms.imei, sms.phone, sms.ts, sms.sms_index, sms.status, sms.content, "
+            "(SELECT group_concat(mr) FROM (SELECT mr FROM sms_reference WHERE sms_id = sms.id ORDER BY part))")
+
+_INSERT = ("INSERT OR IGNORE INTO sms (direction, imei, phone, ts, sms_index, status, content, hash, archived) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class ArchivedSms(NamedTuple):
+    """Message archivé ; timestamp en secondes depuis l'epoch (0 pour un SMS stocké non daté)."""
+    id: int
+    direction: str
+    imei: str
+    phone: str
+    timestamp: float
+    index: Optional[int]
+    status: Optional[str]
+    content: str
+    references: Tuple[int, ...] = ()
+
+    @property
+    def datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp).astimezone()
+
+    def as_dict(self) -> Dict[str, Any]:
+        record = self._asdict()
+        record['references'] = list(self.references)
+        return record
+
+
+def content_hash(phone: str, content: str) -> int:
+    """Empreinte 64 bits (signée, type INTEGER de SQLite) du numéro et du texte."""
+    digest = hashlib.blake2b(f"{phone}\0{content}".encode('utf-8', errors='replace'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _row(row: Sequence) -> ArchivedSms:
+    references = tuple(int(mr) for mr in row[8].split(",")) if row[8] else ()
+    return ArchivedSms(*row[:8], references)
+
+
+class _Pending(NamedTuple):
+    values: tuple
+    references: Tuple[int, ...]
+
+
+class SmsArchive:
+    """
+    Archive SQLite des SMS, partagée entre threads (abonnés d'InboxSync, envois en nombre).
+
+    Les recherches (last_from, between, find_by_reference) s'appuient chacune sur un index :
+    leur durée ne dépend pas du nombre de messages archivés.
+    """
+
+    def __init__(self, path: str, imei: str = "", batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Args:
+            path: Fichier de la base (créé si besoin), ou ":memory:".
+            imei: IMEI par défaut des messages archivés (modem unique).
+            batch_size: Nombre de messages par transaction d'insertion.
+            flush_interval: Âge maximal (secondes) d'un lot en attente lors d'un nouvel ajout.
+        """
+        self.path = path
+        self.imei = imei
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self.duplicates = 0
+        self._pending: List[_Pending] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush()
+            return self._conn.execute("SELECT count(*) FROM sms").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._conn.close()
+            self._conn = None
+
+    # --- Ajout ---
+
+    def add(self, direction: str, phone: str, content: str, timestamp: Union[datetime, float, None] = None,
+            index: Optional[int] = None, status: Optional[str] = None, references: Iterable[int] = (),
+            imei: Optional[str] = None):
+        """
+        Met un message en attente d'archivage. timestamp : horodatage du message (datetime
+        ou secondes), 0 si inconnu ; index : emplacement dans la mémoire du module.
+        """
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        values = (direction, self.imei if imei is None else imei, phone, float(timestamp or 0.0), index, status,
+                  content, content_hash(phone, content), time.time())
+        with self._lock:
+            self._pending.append(_Pending(values, tuple(references)))
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                try:
+                    self._flush()
+                except sqlite3.Error:
+                    # Lot conservé : nouvel essai à la prochaine écriture
+                    pass
+
+    def add_received(self, message: Union[SmsMessage, Dict[str, Any]], imei: Optional[str] = None):
+        """Archive un SMS reçu : dictionnaire de read_sms/stream_sms ou SmsMessage (InboxSync, mode PDU)."""
+        if isinstance(message, SmsMessage):
+            text = message.text if message.text is not None else message.data.hex()
+            self.add(DIRECTION_IN, message.address, text, message.timestamp,
+                     message.indices[0] if message.indices else None, "REC READ", imei=imei)
+            return
+        self.add(DIRECTION_IN, message['phone_number'], message['content'],
+                 SMSPdu.parse_text_timestamp(message['date'], message['time']),
+                 message.get('index'), message.get('status'), imei=imei)
+
+    def add_sent(self, phone: str, content: Union[str, bytes], references: Iterable[int] = (),
+                 imei: Optional[str] = None, timestamp: Union[datetime, float, None] = None):
+        """Archive un SMS envoyé et les références (mr) de ses parties."""
+        if isinstance(content, bytes):
+            content = content.hex()
+        self.add(DIRECTION_OUT, phone, content, timestamp if timestamp is not None else time.time(),
+                 status="SENT", references=references, imei=imei)
+
+    def flush(self):
+        """
+        Écrit immédiatement les messages en attente.
+
+        Raises:
+            sqlite3.Error: Écriture impossible ; les messages restent en attente.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if not pending or self._conn is None:
+            return
+        conn = self._conn
+        plain = [item.values for item in pending if not item.references]
+        inserted = 0
+        conn.execute("BEGIN")
+        try:
+            if plain:
+                cursor = conn.executemany(_INSERT, plain)
+                inserted += cursor.rowcount
+            for item in pending:
+                if not item.references:
+                    continue
+                # Envois : l'identifiant de la ligne est nécessaire pour indexer les références
+                cursor = conn.execute(_INSERT, item.values)
+                if cursor.rowcount:
+                    inserted += 1
+                    conn.executemany("INSERT OR IGNORE INTO sms_reference (imei, mr, sms_id, part) VALUES (?, ?, ?, ?)",
+                                     [(item.values[1], mr, cursor.lastrowid, part)
+                                      for part, mr in enumerate(item.references)])
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            # Le lot est remis en tête de la file pour la prochaine écriture
+            self._pending[:0] = pending
+            logging.error(f"Archivage de {len(pending)} SMS impossible, nouvel essai au prochain lot : {e}")
+            raise
+        self.inserted += inserted
+        self.duplicates += len(pending) - inserted
+
+    # --- Recherche ---
+
+    def _query(self, sql: str, params: tuple) -> List[ArchivedSms]:
+        with self._lock:
+            self._flush()
+            return [_row(row) for row in self._conn.execute(sql, params)]
+
+    def last_from(self, phone: str, limit: int = 50, direction: Optional[str] = None) -> List[ArchivedSms]:
+        """Derniers messages échangés avec phone, du plus récent au plus ancien."""
+        if direction is None:
+            return self._query(f"SELECT {_COLUMNS} FROM sms WHERE phone = ? ORDER BY ts DESC LIMIT ?",
+                               (phone, limit))
+        return self._query(f"SELECT {_COLUMNS} FROM sms WHERE phone = ? AND direction = ? ORDER BY ts DESC LIMIT ?",
+                           (phone, direction, limit))
+
+    def between(self, start: Union[datetime, float], end: Union[datetime, float],
+                imei: Optional[str] = None, limit: int = 1000) -> List[ArchivedSms]:
+        """Messages horodatés dans [start, end[, du plus ancien au plus récent."""
+        start = start.timestamp() if isinstance(start, datetime) else start
+        end = end.timestamp() if isinstance(end, datetime) else end
+        if imei is None:
+            return self._query(f"SELECT {_COLUMNS} FROM sms WHERE ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                               (start, end, limit))
+        return self._query(f"SELECT {_COLUMNS} FROM sms WHERE imei = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                           (imei, start, end, limit))
+
+    def find_by_reference(self, mr: int, imei: Optional[str] = None) -> Optional[ArchivedSms]:
+        """Dernier envoi dont une partie porte la référence mr (les références reviennent à 0 après 255)."""
+        rows = self._query(f"SELECT {_COLUMNS} FROM sms_reference AS r JOIN sms ON sms.id = r.sms_id "
+                           f"WHERE r.imei = ? AND r.mr = ? ORDER BY sms.ts DESC LIMIT 1",
+                           (self.imei if imei is None else imei, mr))
+        return rows[0] if rows else None
+
+    def set_status(self, sms_id: int, status: str):
+        """Met à jour l'état d'un message archivé (ex. remise confirmée)."""
+        with self._lock:
+            self._flush()
+            self._conn.execute("UPDATE sms SET status = ? WHERE id = ?", (status, sms_id))
+
+    # --- Export ---
+
+    def iter_all(self, batch: int = 1000) -> Iterator[ArchivedSms]:
+        """
+        Parcourt toute l'archive dans l'ordre d'insertion, batch lignes à la fois. Une base
+        sur fichier est lue par une connexion en lecture seule : en WAL, elle voit l'archive
+        telle qu'au début du parcours sans bloquer les insertions. Une base en mémoire
+        n'a qu'une connexion : elle reste verrouillée pendant le parcours.
+        """
+        with self._lock:
+            self._flush()
+        if self.path == ":memory:" or not self.path:
+            with self._lock:
+                yield from self._iter_rows(self._conn, batch)
+            return
+        reader = sqlite3.connect(f"{Path(self.path).absolute().as_uri()}?mode=ro", uri=True)
+        try:
+            # Transaction de lecture : instantané cohérent pendant tout le parcours
+            reader.execute("BEGIN")
+            yield from self._iter_rows(reader, batch)
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _iter_rows(conn: sqlite3.Connection, batch: int) -> Iterator[ArchivedSms]:
+        cursor = conn.execute(f"SELECT {_COLUMNS} FROM sms ORDER BY id")
+        try:
+            rows = cursor.fetchmany(batch)
+            while rows:
+                for row in rows:
+                    yield _row(row)
+                rows = cursor.fetchmany(batch)
+        finally:
+            cursor.close()
+
+    def export_jsonl(self, path: str, compresslevel: int = 6) -> int:
+        """Écrit l'archive en JSON Lines compressé (gzip), message par message ; retourne le nombre de lignes."""
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel) as f:
+            for message in self.iter_all():
+                f.write(json.dumps(message.as_dict(), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        logging.info(f"{count} SMS exportés vers {path}.")
+        return count
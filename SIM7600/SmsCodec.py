@@ -0,0 +1,151 @@
+"""
+Décodage du texte des SMS en mode texte (AT+CMGF=1) d'après la configuration du module.
+
+En mode texte, le contenu affiché dépend du jeu de caractères de l'interface (AT+CSCS) et
+de l'alphabet du message (schéma de codage, TP-DCS) : hexadécimal UCS2 avec AT+CSCS="UCS2"
+ou pour un message UCS2, octets hexadécimaux pour un message 8 bits, codes GSM 7 bits avec
+AT+CSCS="GSM", texte brut sinon. Le format est donc déduit de la configuration, jamais du
+contenu : un SMS « 1234 » reste « 1234 ».
+
+Le DCS d'un message n'est connu qu'à la lecture d'un SMS avec AT+CSDH=1 (+CMGR) ; pour une
+liste (+CMGL), c'est le DCS de AT+CSMP qui s'applique. Avec AT+CSCS="UCS2", tous les textes,
+numéros compris, sont en hexadécimal UCS2 : le décodage est exact quel que soit le message.
+"""
+import codecs
+from typing import Iterable, List, Optional
+
+import ResponseParsers
+import SMSPdu
+from SMSPdu import ENCODING_GSM7, ENCODING_UCS2
+
+# Jeux de caractères de l'interface (AT+CSCS) reconnus par le SIM7600
+CHARSET_IRA = "IRA"
+CHARSET_GSM = "GSM"
+CHARSET_UCS2 = "UCS2"
+
+# Texte transmis tel quel (AT+CSCS="IRA", message GSM 7 bits)
+ENCODING_TEXT = 'text'
+
+# Séparateur des messages décodés ensemble : non-caractère Unicode, absent d'un SMS
+_BATCH_SEPARATOR = "FFFF"
+
+# Table GSM 7 bits du décodage groupé : le code 0x80, hors alphabet, sépare les messages
+_GSM7_BATCH_SEPARATOR = "\x80"
+_GSM7_BATCH_DECODE = SMSPdu.GSM7_BASIC + "\uffff" + "\ufffe" * 127
+
+
+def decode_ucs2(data: str) -> Optional[str]:
+    """Texte d'une chaîne hexadécimale UCS2 (UTF-16 BE), ou None si elle n'est pas hexadécimale."""
+    try:
+        return bytes.fromhex(data).decode('utf-16-be', errors='replace')
+    except ValueError:
+        return None
+
+
+def encode_ucs2(text: str) -> str:
+    return text.encode('utf-16-be').hex().upper()
+
+
+def decode_ucs2_batch(bodies: List[str]) -> List[Optional[str]]:
+    """Décode plusieurs chaînes UCS2 en une conversion ; None pour une chaîne invalide."""
+    if bodies and all(len(body) % 4 == 0 for body in bodies):
+        # Les chaînes sont jointes par U+FFFF puis converties en une seule passe
+        texts = decode_ucs2(_BATCH_SEPARATOR.join(bodies))
+        if texts is not None:
+            texts = texts.split("\uffff")
+            if len(texts) == len(bodies):
+                return texts
+    return [decode_ucs2(body) for body in bodies]
+
+
+def decode_gsm(body: str) -> str:
+    """Texte d'un contenu affiché avec AT+CSCS="GSM" (un code 7 bits par caractère)."""
+    try:
+        return SMSPdu.gsm7_decode(body.encode('latin-1'))
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return body
+
+
+def decode_gsm_batch(bodies: List[str]) -> List[str]:
+    """Décode plusieurs contenus GSM ; ceux sans échappement sont convertis ensemble par la table."""
+    texts: List[Optional[str]] = [None] * len(bodies)
+    plain = [i for i, body in enumerate(bodies) if "\x1b" not in body]
+    try:
+        data = _GSM7_BATCH_SEPARATOR.join(bodies[i] for i in plain).encode('latin-1')
+        decoded = codecs.charmap_decode(data, 'strict', _GSM7_BATCH_DECODE)[0].split("\uffff") if plain else []
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        decoded = []
+    if len(decoded) == len(plain):
+        for i, text in zip(plain, decoded):
+            texts[i] = text
+    return [text if text is not None else decode_gsm(body) for body, text in zip(bodies, texts)]
+
+
+class SmsCodec:
+    """
+    Conversion du texte des SMS en mode texte selon AT+CSCS (charset) et AT+CSMP (dcs).
+    classify() indique le format d'un contenu : 'ucs2', '8bit', 'gsm7' ou 'text'.
+    """
+
+    def __init__(self, charset: str = CHARSET_IRA, dcs: int = 0):
+        self.charset = charset.upper()
+        self.dcs = dcs
+
+    @classmethod
+    def from_response(cls, response) -> 'SmsCodec':
+        """Codec d'une réponse à AT+CSCS?;+CSMP? (valeurs par défaut du module si absentes)."""
+        charset = ResponseParsers.parse_response(response, '+CSCS')
+        parameters = ResponseParsers.parse_response(response, '+CSMP')
+        return cls(charset.name if charset is not None else CHARSET_IRA,
+                   parameters.dcs if parameters is not None else 0)
+
+    def __repr__(self):
+        return f"SmsCodec(charset={self.charset!r}, dcs={self.dcs})"
+
+    def classify(self, dcs: Optional[int] = None) -> str:
+        """Format du contenu d'un message de DCS dcs (par défaut celui de AT+CSMP)."""
+        if self.charset == CHARSET_UCS2:
+            return ENCODING_UCS2
+        alphabet = SMSPdu.encoding_of(dcs if dcs is not None else self.dcs)
+        if alphabet != ENCODING_GSM7:
+            # Messages UCS2 et 8 bits : affichés en hexadécimal quel que soit le jeu de caractères
+            return alphabet
+        return ENCODING_GSM7 if self.charset == CHARSET_GSM else ENCODING_TEXT
+
+    def decode(self, body: str, dcs: Optional[int] = None) -> str:
+        """Texte d'un message ; un contenu 8 bits est retourné en hexadécimal, tel qu'affiché."""
+        encoding = self.classify(dcs)
+        if encoding == ENCODING_UCS2:
+            text = decode_ucs2(body)
+            return text if text is not None else body
+        if encoding == ENCODING_GSM7:
+            return decode_gsm(body)
+        return body
+
+    def decode_many(self, bodies: Iterable[str], dcs: Optional[int] = None) -> List[str]:
+        """Décode les messages d'une boîte de réception ; les contenus UCS2 sont convertis ensemble."""
+        bodies = list(bodies)
+        encoding = self.classify(dcs)
+        if encoding == ENCODING_UCS2:
+            return [text if text is not None else body for body, text in zip(bodies, decode_ucs2_batch(bodies))]
+        if encoding == ENCODING_GSM7:
+            return decode_gsm_batch(bodies)
+        return bodies
+
+    def decode_address(self, address: str) -> str:
+        """Numéro ou nom d'un en-tête (hexadécimal UCS2 avec AT+CSCS="UCS2")."""
+        if self.charset == CHARSET_UCS2 and address:
+            text = decode_ucs2(address)
+            return text if text is not None else address
+        return address
+
+    def encode(self, text: str) -> str:
+        """Texte à saisir après AT+CMGS dans le jeu de caractères de l'interface."""
+        if self.charset == CHARSET_UCS2:
+            return encode_ucs2(text)
+        if self.charset == CHARSET_GSM:
+            return SMSPdu.gsm7_encode(text).decode('latin-1')
+        return text
+
+    def encode_address(self, address: str) -> str:
+        return encode_ucs2(address) if self.charset == CHARSET_UCS2 else address
@@ -0,0 +1,126 @@
+"""
+Analyse incrémentale des listes de SMS (AT+CMGL), ligne par ligne.
+
+Le découpage ne repose pas sur le texte des messages : un en-tête n'est reconnu que s'il
+a le format complet d'un en-tête +CMGL, et lorsque sa longueur est connue (mode PDU, ou
+mode texte avec AT+CSDH=1) le corps est lu jusqu'à cette longueur. Un message contenant
+« OK » ou « +CMGL » ne coupe donc pas la liste ; les lignes vides d'un tel corps doivent
+être transmises à feed() pour que le compte soit juste. Seul le message en cours est conservé :
+la mémoire utilisée ne dépend pas du nombre de messages.
+"""
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import ResponseParsers
+from ResponseParsers import PduHeader, SmsHeader
+from ResponseReader import ResultCode, parse_final_result
+
+
+class ListedSms(NamedTuple):
+    """Entrée d'une liste : en-tête analysé et corps (lignes jointes par '\\n' en mode texte)."""
+    header: Union[SmsHeader, PduHeader]
+    body: str
+
+    @property
+    def index(self) -> Optional[int]:
+        return self.header.index
+
+
+class SmsListingParser:
+    """
+    Automate d'analyse d'une réponse AT+CMGL : feed() reçoit chaque ligne et retourne
+    l'entrée qu'elle termine. done passe à vrai au code final de la réponse.
+    """
+
+    def __init__(self, prefix: str = "+CMGL"):
+        self.marker = prefix + ":"
+        self.done = False
+        self.result_code: Optional[ResultCode] = None
+        self.final_line: Optional[str] = None
+        self._header: Union[SmsHeader, PduHeader, None] = None
+        self._body: List[str] = []
+        self._remaining: Optional[int] = None
+
+    @property
+    def in_body(self) -> bool:
+        """Vrai tant que la longueur annoncée du message en cours n'est pas atteinte."""
+        return self._header is not None and self._remaining is not None and self._remaining > 0
+
+    def feed(self, line: str) -> Optional[ListedSms]:
+        if self.done:
+            return None
+        if self.in_body:
+            # Un saut de ligne compté deux fois (CR LF) laisse au plus un caractère par ligne
+            # du corps : au-delà, une ligne au format d'en-tête ou de code final fait partie du texte
+            if self._remaining <= len(self._body):
+                header = self._parse_header(line)
+                if header is not None:
+                    return self._start(header)
+                code, _ = parse_final_result(line)
+                if code is not None:
+                    return self._finish(code, line)
+            self._append(line)
+            return self._complete() if self._remaining <= 0 else None
+
+        if not line.strip():
+            # Ligne vide hors d'un corps de longueur connue : séparateur de la réponse
+            return None
+        header = self._parse_header(line)
+        if header is not None:
+            return self._start(header)
+        code, _ = parse_final_result(line)
+        if code is not None:
+            return self._finish(code, line)
+        if self._header is not None and self._remaining is None:
+            self._append(line)
+        return None
+
+    def close(self) -> Optional[ListedSms]:
+        """Termine l'analyse (fin de flux sans code final) et retourne l'entrée en cours."""
+        self.done = True
+        return self._complete()
+
+    def _finish(self, code: ResultCode, line: str) -> Optional[ListedSms]:
+        self.done = True
+        self.result_code = code
+        self.final_line = line
+        return self._complete()
+
+    def _parse_header(self, line: str) -> Union[SmsHeader, PduHeader, None]:
+        if not line.startswith(self.marker):
+            return None
+        return ResponseParsers.parse_line(line)
+
+    def _start(self, header) -> Optional[ListedSms]:
+        completed = self._complete()
+        self._header = header
+        # En mode PDU, le corps est toujours une seule ligne hexadécimale
+        self._remaining = 1 if isinstance(header, PduHeader) else header.length
+        return completed
+
+    def _append(self, line: str):
+        if self._remaining is not None:
+            self._remaining -= len(line) + (1 if self._body else 0)
+        self._body.append(line)
+
+    def _complete(self) -> Optional[ListedSms]:
+        if self._header is None:
+            return None
+        entry = ListedSms(self._header, "\n".join(self._body))
+        self._header = None
+        self._body = []
+        self._remaining = None
+        return entry
+
+
+def iter_sms_listing(lines: Iterable[str], prefix: str = "+CMGL") -> Iterator[ListedSms]:
+    """Produit chaque entrée dès que son corps est complet ; s'arrête au code final de la réponse."""
+    parser = SmsListingParser(prefix)
+    for line in lines:
+        entry = parser.feed(line)
+        if entry is not None:
+            yield entry
+        if parser.done:
+            return
+    entry = parser.close()
+    if entry is not None:
+        yield entry
@@ -1,9 +1,6 @@
 import logging
 import time
 
-import vlc
-from gtts import gTTS
-
 
 class TextToSpeech:
     def __init__(self, lang='fr'):
@@ -13,6 +10,8 @@ class TextToSpeech:
     def synthesize(self, text, output_file="output.mp3"):
         """Convertit du texte en parole et sauvegarde en tant que fichier MP3."""
         try:
+            from gtts import gTTS
+
             self.audio_file = output_file
             tts = gTTS(text=text, lang=self.lang)
             tts.save(output_file)
@@ -23,6 +22,8 @@ class TextToSpeech:
             return None
 
     def play(self):
+        import vlc
+
         # Créer un instance de lecteur VLC
         player = vlc.MediaPlayer(self.audio_file)
 
@@ -0,0 +1,302 @@
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from serial import SerialException
+
+from ResponseReader import ATResponse, LineBuffer, ResultCode, parse_final_result
+
+# Préfixes des codes de résultat non sollicités (URC) émis par le SIM7600
+DEFAULT_URC_PREFIXES = (
+    "+CMTI:", "+CMT:", "+CDSI:", "+CDS:", "+CBM:",
+    "RING", "+CLIP:", "+CRING:", "VOICE CALL:", "MISSED_CALL:", "NO CARRIER",
+    "+CREG:", "+CEREG:", "+CGREG:", "+CGEV:", "+CSQ:", "+CPSI:",
+    "+CPIN:", "RDY", "SMS DONE", "PB DONE", "+CGPSINFO:",
+)
+
+# URC suivis d'une ligne de données (PDU, ou texte d'un +CMT en mode texte), transmise avec eux
+DATA_URC_PREFIXES = ("+CMT:", "+CBM:")
+
+# Commandes pour lesquelles NO CARRIER / CONNECT sont des codes finaux et non des URC
+_CALL_COMMANDS = ("ATD", "ATA", "ATO")
+
+_PREFIX_RE = re.compile(r'(\+[A-Z0-9]+)')
+
+
+def has_data_line(line: str) -> bool:
+    """Vrai si la ligne non sollicitée est suivie d'une ligne de données (+CDS: <length> en mode PDU)."""
+    if line.startswith(DATA_URC_PREFIXES):
+        return True
+    return line.startswith("+CDS:") and line[5:].strip().isdigit()
+
+
+def command_prefixes(command: Optional[str]) -> tuple:
+    """Retourne les préfixes de réponse attendus pour une commande (ex. 'AT+CSQ;+COPS?' -> ('+CSQ', '+COPS'))."""
+    if not command or not command.upper().startswith("AT"):
+        return ()
+    return tuple(_PREFIX_RE.findall(command.upper()))
+
+
+class PendingCommand:
+    """Commande AT en attente de son code de résultat final."""
+
+    def __init__(self, command: Optional[str], expect_prompt: bool = False,
+                 on_complete: Optional[Callable[['PendingCommand'], None]] = None, parser=None):
+        """
+        parser : analyseur incrémental de la réponse (feed, done, in_body ; ex. SmsListingParser).
+        Il décide de la fin de la réponse, et les entrées qu'il produit sont placées dans
+        entries au fil de la réception au lieu d'accumuler les lignes.
+        """
+        self.command = command
+        self.prefixes = command_prefixes(command)
+        self.is_call = bool(command) and command.upper().startswith(_CALL_COMMANDS)
+        self.expect_prompt = expect_prompt
+        self.on_complete = on_complete
+        self.parser = parser
+        self.entries: queue.Queue = queue.Queue()
+        self.lines: List[str] = []
+        self.result: Optional[ATResponse] = None
+        self.started = time.monotonic()
+        self.done = threading.Event()
+
+    def owns(self, line: str) -> bool:
+        """Vrai si la ligne porte le préfixe de réponse de cette commande."""
+        return any(line.startswith(prefix + ":") for prefix in self.prefixes)
+
+    def complete(self, result: ATResponse):
+        result.elapsed = time.monotonic() - self.started
+        self.result = result
+        self.done.set()
+        if self.on_complete is not None:
+            self.on_complete(self)
+
+
+class URCDispatcher:
+    """
+    Démultiplexe le flux de lignes d'un port AT : les lignes sollicitées vont à la
+    commande en cours, les codes non sollicités aux abonnés enregistrés par préfixe.
+
+    Une ligne dont le préfixe correspond à la commande en cours (ex. '+CREG:' pendant
+    AT+CREG?) est toujours considérée comme sollicitée. Un URC suivi d'une ligne de
+    données (+CMT, +CDS en mode PDU) est transmis en une seule chaîne « en-tête\ndonnées ».
+    """
+
+    def __init__(self, encoding='utf-8', errors='ignore'):
+        self.encoding = encoding
+        self.errors = errors
+        self.urc_prefixes = list(DEFAULT_URC_PREFIXES)
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._buffer = LineBuffer()
+        self._pending: Optional[PendingCommand] = None
+        # En-tête d'un URC dont la ligne de données n'est pas encore reçue
+        self._urc_header: Optional[str] = None
+        self.bytes_received = 0
+        self._lock = threading.RLock()
+        # Fonction appelée pour chaque URC ; remplacée par le thread lecteur pour
+        # exécuter les abonnés hors du thread qui lit le port.
+        self.deliver: Callable[[str], None] = self.dispatch
+
+    def subscribe(self, prefix: str, callback: Callable[[str], None]):
+        """Abonne callback(line) aux lignes non sollicitées commençant par prefix ('' pour toutes)."""
+        with self._lock:
+            self._handlers.setdefault(prefix, []).append(callback)
+            if prefix and not prefix.startswith(tuple(self.urc_prefixes)):
+                self.urc_prefixes.append(prefix)
+
+    def unsubscribe(self, prefix: str, callback: Callable[[str], None]):
+        with self._lock:
+            handlers = self._handlers.get(prefix, [])
+            if callback in handlers:
+                handlers.remove(callback)
+
+    def begin(self, pending: PendingCommand):
+        """Déclare la commande dont la réponse est attendue."""
+        with self._lock:
+            self._pending = pending
+
+    def abort(self, pending: PendingCommand) -> ATResponse:
+        """Termine une commande restée sans code final (délai expiré)."""
+        with self._lock:
+            if self._pending is pending:
+                self._pending = None
+            if pending.result is None:
+                pending.complete(ATResponse(pending.lines, ResultCode.TIMEOUT))
+            return pending.result
+
+    def reset(self):
+        with self._lock:
+            self._buffer.clear()
+            self._pending = None
+            self._urc_header = None
+
+    def feed(self, data: bytes):
+        """Traite les octets reçus : découpe en lignes et route chacune immédiatement."""
+        with self._lock:
+            self.bytes_received += len(data)
+            buffer = self._buffer
+            buffer.feed(data)
+            span = buffer.next_span()
+            while span is not None:
+                line = buffer.data[span[0]:span[1]].decode(self.encoding, errors=self.errors)
+                if line.strip() or self._in_body():
+                    self._route(line)
+                span = buffer.next_span()
+
+            pending = self._pending
+            if pending is not None and pending.expect_prompt and buffer.pending_startswith(b">"):
+                self._buffer.clear()
+                self._pending = None
+                pending.complete(ATResponse(pending.lines, ResultCode.PROMPT, ">"))
+
+    def _in_body(self) -> bool:
+        """Vrai si l'analyseur de la commande en cours attend la suite d'un corps (lignes vides comprises)."""
+        pending = self._pending
+        return (self._urc_header is None and pending is not None and pending.parser is not None
+                and pending.parser.in_body)
+
+    def _is_unsolicited(self, line: str, pending: Optional[PendingCommand]) -> bool:
+        if pending is None:
+            return True
+        if pending.owns(line):
+            return False
+        if line == "NO CARRIER" and pending.is_call:
+            return False
+        return line.startswith(tuple(self.urc_prefixes))
+
+    def _route(self, line: str):
+        if self._urc_header is not None:
+            header, self._urc_header = self._urc_header, None
+            self.deliver(f"{header}\n{line}")
+            return
+        pending = self._pending
+        parser = pending.parser if pending is not None else None
+        # Une ligne de corps attendue par l'analyseur n'est jamais un URC, même si elle en a l'air
+        if not (parser is not None and parser.in_body) and self._is_unsolicited(line, pending):
+            if has_data_line(line):
+                self._urc_header = line
+            else:
+                self.deliver(line)
+            return
+
+        if parser is not None:
+            entry = parser.feed(line)
+            if entry is not None:
+                pending.entries.put(entry)
+            if parser.done:
+                self._pending = None
+                pending.complete(ATResponse(pending.lines, parser.result_code, line,
+                                            parse_final_result(line)[1]))
+            return
+
+        code, detail = parse_final_result(line)
+        if code is not None:
+            self._pending = None
+            pending.complete(ATResponse(pending.lines, code, line, detail))
+        else:
+            pending.lines.append(line)
+
+    def dispatch(self, line: str):
+        """Transmet une ligne non sollicitée à tous les abonnés dont le préfixe correspond."""
+        handlers = [callback for prefix, callbacks in list(self._handlers.items())
+                    if line.startswith(prefix) for callback in list(callbacks)]
+        if not handlers:
+            logging.debug(f"URC non traité : {line}")
+        for callback in handlers:
+            try:
+                callback(line)
+            except Exception as e:
+                logging.error(f"Erreur dans le gestionnaire d'URC pour '{line}': {e}")
+
+
+class URCReaderThread(threading.Thread):
+    """
+    Thread propriétaire du flux d'octets d'un port série : il est le seul à lire le port
+    et alimente le URCDispatcher. Les commandes sont échangées via transact().
+
+    Les abonnés sont appelés depuis un second thread : ils peuvent donc eux-mêmes
+    envoyer des commandes (par exemple AT+CMGR sur réception de +CMTI).
+    """
+
+    def __init__(self, serial_conn, dispatcher: URCDispatcher, poll_interval=0.05):
+        super().__init__(name=f"URCReader-{getattr(serial_conn, 'port', '')}", daemon=True)
+        self.serial_conn = serial_conn
+        self.dispatcher = dispatcher
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._command_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._notifier = threading.Thread(target=self._notify_loop, name=f"{self.name}-notify", daemon=True)
+        dispatcher.deliver = self._events.put
+
+    def start(self):
+        super().start()
+        self._notifier.start()
+
+    def _notify_loop(self):
+        while True:
+            line = self._events.get()
+            if line is None:
+                break
+            self.dispatcher.dispatch(line)
+
+    def run(self):
+        saved_timeout = self.serial_conn.timeout
+        self.serial_conn.timeout = self.poll_interval
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+                except (SerialException, OSError, TypeError) as e:
+                    if not self._stop_event.is_set():
+                        logging.error(f"Lecture interrompue sur le port {self.serial_conn.port}: {e}")
+                    break
+                if data:
+                    self.dispatcher.feed(data)
+        finally:
+            if self.serial_conn.is_open:
+                self.serial_conn.timeout = saved_timeout
+
+    def stop(self):
+        self._stop_event.set()
+        self._events.put(None)
+        self.dispatcher.deliver = self.dispatcher.dispatch
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=max(1.0, self.poll_interval * 4))
+
+    def transact(self, data: bytes, command: Optional[str], timeout: float, expect_prompt: bool = False) -> ATResponse:
+        """Écrit data et attend la réponse routée par le dispatcher (une commande à la fois)."""
+        with self._command_lock:
+            pending = PendingCommand(command, expect_prompt)
+            self.dispatcher.begin(pending)
+            self.serial_conn.write(data)
+            if not pending.done.wait(timeout):
+                return self.dispatcher.abort(pending)
+            return pending.result
+
+    def stream(self, data: bytes, command: Optional[str], timeout: float, parser) -> Iterator:
+        """
+        Écrit data et produit les entrées de parser au fil de la réponse. Si l'itération est
+        interrompue, la fin de la réponse est attendue avant de libérer le port ; la réponse
+        complète (code final, TIMEOUT après timeout secondes) est ensuite dans parser.
+        """
+        with self._command_lock:
+            pending = PendingCommand(command, parser=parser)
+            deadline = time.monotonic() + timeout
+            self.dispatcher.begin(pending)
+            self.serial_conn.write(data)
+            try:
+                while not (pending.done.is_set() and pending.entries.empty()):
+                    try:
+                        entry = pending.entries.get(timeout=min(self.poll_interval,
+                                                                max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        if time.monotonic() >= deadline:
+                            break
+                        continue
+                    yield entry
+            finally:
+                if not pending.done.wait(max(0.0, deadline - time.monotonic())):
+                    self.dispatcher.abort(pending)
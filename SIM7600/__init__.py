@@ -0,0 +1,107 @@
+"""
+Pilotage des modules SIMCom SIM7600.
+
+Les classes sont chargées à la première utilisation (PEP 562) : `from SIM7600 import SIM7600Cmd`
+n'importe que le moteur AT, sans les dépendances optionnelles (paho-mqtt, pyaudio, vlc, gTTS)
+des autres modules. La configuration du logging est laissée à l'application (setup_logging).
+"""
+import importlib
+import os
+import sys
+
+# Les modules du paquet s'importent entre eux par leur nom de fichier : ils sont chargés
+# sous ce nom pour qu'une classe n'existe qu'en un seul exemplaire.
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if _PACKAGE_DIR not in sys.path:
+    sys.path.append(_PACKAGE_DIR)
+
+# Nom exporté -> module qui le définit
+_EXPORTS = {
+    'SIM7600Cmd': 'SIM7600Cmd',
+    'NetworkStatus': 'SIM7600Cmd',
+    'NetworkType': 'SIM7600Cmd',
+    'RegistrationError': 'SIM7600Cmd',
+    'AccessTechnology': 'SIM7600Cmd',
+    'NetworkSnapshot': 'NetworkSnapshot',
+    'NetworkMonitor': 'NetworkMonitor',
+    'NetworkState': 'NetworkMonitor',
+    'setup_logging': 'SIM7600Cmd',
+    'SIM7600SMS': 'SIM7600SMS',
+    'SmsPdu': 'SMSPdu',
+    'SmsMessage': 'SMSPdu',
+    'ConcatenatedMessages': 'SMSPdu',
+    'encode_submit': 'SMSPdu',
+    'decode_pdu': 'SMSPdu',
+    'BulkSmsSender': 'BulkSmsSender',
+    'BulkReport': 'BulkSmsSender',
+    'SendResult': 'BulkSmsSender',
+    'InboxSync': 'InboxSync',
+    'DeliveryTracker': 'DeliveryReports',
+    'DeliveryReport': 'DeliveryReports',
+    'DeliveryOutcome': 'DeliveryReports',
+    'SmsListingParser': 'SmsListing',
+    'ListedSms': 'SmsListing',
+    'iter_sms_listing': 'SmsListing',
+    'SmsCodec': 'SmsCodec',
+    'SmsArchive': 'SmsArchive',
+    'ArchivedSms': 'SmsArchive',
+    'SIM7600GPS': 'SIM7600GPS',
+    'SIM7600Info': 'SIM7600Info',
+    'SIM7600Voice': 'SIM7600Voice',
+    'SIM7600MQTT': 'SIM7600MQTT',
+    'SIM7600Audio': 'SIM7600Audio',
+    'TextToSpeech': 'TextToSpeech',
+    'NMEParser': 'NMEParser',
+    'SerialPortCategorizer': 'SerialPortCategorizer',
+    'PortCategory': 'SerialPortCategorizer',
+    'ATResponse': 'ResponseReader',
+    'ResultCode': 'ResponseReader',
+    'ResponseReader': 'ResponseReader',
+    'SignalQuality': 'ResponseParsers',
+    'Registration': 'ResponseParsers',
+    'Operator': 'ResponseParsers',
+    'NetworkMode': 'ResponseParsers',
+    'ServingCell': 'ResponseParsers',
+    'SmsHeader': 'ResponseParsers',
+    'PduHeader': 'ResponseParsers',
+    'CharacterSet': 'ResponseParsers',
+    'TextModeParameters': 'ResponseParsers',
+    'StatusReport': 'ResponseParsers',
+    'parse_line': 'ResponseParsers',
+    'parse_response': 'ResponseParsers',
+    'register_parser': 'ResponseParsers',
+    'URCDispatcher': 'URCDispatcher',
+    'ResponseCache': 'ResponseCache',
+    'CommandMetrics': 'CommandMetrics',
+    'CommandTimeouts': 'CommandTimeouts',
+    'DeadlineExceeded': 'CommandTimeouts',
+    'operation_deadline': 'CommandTimeouts',
+    'SIM7600Modem': 'SIM7600Modem',
+    'SIM7600Data': 'SIM7600Data',
+    'CommandScheduler': 'CommandScheduler',
+    'Priority': 'CommandScheduler',
+    'ModemFleet': 'ModemFleet',
+    'ModemDaemon': 'ModemDaemon',
+    'ModemClient': 'ModemDaemon',
+    'DaemonError': 'ModemDaemon',
+    'SIM7600Simulator': 'SIM7600Simulator',
+    'AsyncSIM7600Cmd': 'AsyncSIM7600Cmd',
+    'AsyncSIM7600SMS': 'AsyncSIM7600SMS',
+    'AsyncSIM7600GPS': 'AsyncSIM7600GPS',
+    'AsyncSIM7600Info': 'AsyncSIM7600Info',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,7 +1,13 @@
 import asyncio
 import logging
+import os
+import sys
 
-from SIM7600.SIM7600Cmd import SIM7600Cmd
+# Les modules du paquet SIM7600 s'importent entre eux par leur nom de fichier
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SIM7600'))
+
+from AsyncSIM7600Cmd import AsyncSIM7600Cmd
+from SerialPortCategorizer import SerialPortCategorizer
 
 # Configuration du logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,7 +18,8 @@ class SerialPortError(Exception):
 
 
 async def main():
-    sim7600 = SIM7600Cmd()
+    port = SerialPortCategorizer().get_port("at") or "COM17"
+    sim7600 = AsyncSIM7600Cmd(port)
     await sim7600.open()
 
     try:
@@ -32,8 +39,7 @@ async def main():
         # Envoi d'un SMS
         await sim7600.send_command("AT+CMGF=1")  # Mettre le mode SMS
         sms_command = 'AT+CMGS="+1234567890"'  # Remplacez par le numéro à appeler
-        sms_response = await sim7600.send_command(sms_command)
-        await asyncio.sleep(1)  # Attendre un moment pour que la commande soit acceptée
+        sms_response = await sim7600.send_command(sms_command, expect_prompt=True)
         sms_response += await sim7600.send_command("Bonjour, ceci est un test. \x1A")  # Envoyer le message
         logging.info(f"Réponse SMS: {sms_response}")
 
@@ -50,7 +56,7 @@ async def main():
         logging.error(f"Une erreur s'est produite : {e}")
 
     finally:
-        sim7600.close()
+        await sim7600.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
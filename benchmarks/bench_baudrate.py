@@ -0,0 +1,64 @@
+"""
+Débit utile de l'UART selon le débit négocié par AT+IPR (simulateur en mode UART).
+
+Usage :
+    python benchmarks/bench_baudrate.py [--rates 115200 921600 3000000] [--sms 100] [--json f.json]
+
+Pour chaque débit, le module simulé et le port hôte sont passés au débit par
+negotiate_baudrate, puis la liste des SMS (AT+CMGL) est lue à plusieurs reprises.
+"""
+import argparse
+import logging
+
+from common import measure, write_results
+
+from SIM7600SMS import SIM7600SMS
+from SIM7600Simulator import SIM7600Simulator
+
+
+def run(rate, sms_count, repeat):
+    simulator = SIM7600Simulator(uart=True)
+    for i in range(sms_count):
+        simulator.add_sms("+33612345678", f"Message numero {i} : texte de longueur moyenne pour le test",
+                          status="REC READ")
+    modem = simulator.attach(SIM7600SMS("sim"), timeout=5)
+    modem.set_echo_command(False)
+    modem.card_is_ready = True
+    negotiated = modem.negotiate_baudrate(max_rate=rate)
+
+    reader = modem.get_reader()
+    received = reader.bytes_read
+    measurement = measure(modem.read_sms, number=1, repeat=repeat)
+    per_listing = (reader.bytes_read - received) / repeat
+    measurement.update({
+        'baudrate': negotiated,
+        'bytes_per_listing': per_listing,
+        'bytes_per_s': per_listing / measurement['median_s'],
+    })
+    return measurement
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[115200, 230400, 460800, 921600, 3000000])
+    parser.add_argument("--sms", type=int, default=100, help="SMS en mémoire")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    print(f"{'débit':>9} {'read_sms':>10} {'octets':>8} {'octets/s':>11}")
+    for rate in args.rates:
+        r = run(rate, args.sms, args.repeat)
+        results[f'uart.read_sms[{r["baudrate"]}]'] = r
+        print(f"{r['baudrate']:>9} {r['median_s'] * 1000:>8.1f}ms {r['bytes_per_listing']:>8.0f} "
+              f"{r['bytes_per_s']:>11,.0f}")
+
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
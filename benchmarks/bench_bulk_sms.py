@@ -0,0 +1,95 @@
+"""
+Débit d'une campagne SMS sur un modem simulé : boucle de send_sms (AT+CMGF à chaque
+message, liaison radio rétablie à chaque envoi) contre BulkSmsSender (mode configuré une
+fois, AT+CMMS=2), en mode texte et en mode PDU. Vérifie aussi qu'un délai dépassé et une
+erreur réseau temporaire sont suivis d'un nouvel essai.
+
+Usage :
+    python benchmarks/bench_bulk_sms.py [--messages 200] [--latency 0.002] [--link-setup 0.05] [--json f.json]
+"""
+import argparse
+import logging
+import time
+
+from common import write_results
+
+from BulkSmsSender import BulkSmsSender
+from SIM7600SMS import SIM7600SMS
+from SIM7600Simulator import SIM7600Simulator
+
+MESSAGE = "Votre rendez-vous est confirmé pour demain 10h. Répondez STOP pour vous désabonner."
+
+
+def recipients(count):
+    return (f"+336{i:08d}" for i in range(count))
+
+
+def modem_for(args):
+    simulator = SIM7600Simulator(latency=args.latency, sms_link_setup=args.link_setup)
+    modem = simulator.attach(SIM7600SMS("sim"))
+    modem.set_echo_command(False)
+    modem.card_is_ready = True
+    return modem
+
+
+def send_sms_loop(args):
+    modem = modem_for(args)
+    start = time.perf_counter()
+    for number in recipients(args.messages):
+        modem.send_sms(number, MESSAGE)
+    return time.perf_counter() - start
+
+
+def bulk(args, pdu):
+    sender = BulkSmsSender(modem_for(args), pdu=pdu, keep_results=False)
+    report = sender.send(recipients(args.messages), MESSAGE)
+    assert report.sent == args.messages, report.as_dict()
+    return report.duration
+
+
+def check_retries(args):
+    """Premier AT+CMGS sans réponse puis +CMS ERROR: 42 (congestion) : les deux sont réessayés."""
+    modem = modem_for(args)
+    modem.timeouts.set_deadline('AT+CMGS', 0.2)
+    simulator = modem.serial_conn.simulator
+    simulator.inject_timeout('AT+CMGS=')
+    simulator.inject_error('AT+CMGS', '+CMS ERROR: 42')
+    sender = BulkSmsSender(modem, pdu=True, retry_delay=0.01)
+    report = sender.send(recipients(3), MESSAGE)
+    assert report.sent == 3 and report.retries == 2, report.as_dict()
+    return report.retries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200, help="nombre de destinataires")
+    parser.add_argument("--latency", type=float, default=0.002, help="latence simulée par commande (s)")
+    parser.add_argument("--link-setup", type=float, default=0.05,
+                        help="établissement simulé de la liaison radio par envoi (s)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"nouveaux essais après un délai dépassé et une congestion : {check_retries(args)}")
+
+    runs = {
+        'send_sms.loop': lambda: send_sms_loop(args),
+        'bulk.text': lambda: bulk(args, pdu=False),
+        'bulk.pdu': lambda: bulk(args, pdu=True),
+    }
+    results = {}
+    print(f"{'méthode':<16} {'SMS':>6} {'durée':>9} {'SMS/min':>10} {'accélération':>13}")
+    for name, run in runs.items():
+        elapsed = run()
+        r = {'messages': args.messages, 'elapsed_s': elapsed, 'messages_per_minute': args.messages * 60 / elapsed}
+        r['speedup'] = r['messages_per_minute'] / results['send_sms.loop']['messages_per_minute'] if results else 1.0
+        results[name] = r
+        print(f"{name:<16} {args.messages:>6} {elapsed:>8.2f}s {r['messages_per_minute']:>10.0f} "
+              f"{r['speedup']:>12.1f}x")
+
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Débit d'envoi de SMS d'une ModemFleet en fonction du nombre de modems (simulés).
+
+Usage :
+    python benchmarks/bench_fleet.py [--modems 1 2 4 8 16] [--messages 20] [--latency 0.02] [--json f.json]
+
+Avec une latence par commande fixe, le débit doit croître à peu près linéairement
+avec le nombre de modems : chaque port est piloté par son propre thread.
+"""
+import argparse
+import logging
+import time
+
+from common import write_results
+
+from ModemFleet import ModemFleet
+from SIM7600SMS import SIM7600SMS
+from SIM7600Simulator import SIM7600Simulator
+
+
+def run(modem_count, messages_per_modem, latency):
+    modems = []
+    for i in range(modem_count):
+        simulator = SIM7600Simulator(latency=latency)
+        modem = SIM7600SMS(f"sim{i}")
+        simulator.attach(modem)
+        modem.set_echo_command(False)
+        modems.append(modem)
+
+    with ModemFleet(modems) as fleet:
+        total = modem_count * messages_per_modem
+        start = time.perf_counter()
+        futures = fleet.send_many(("+33612345678", f"Message {i}") for i in range(total))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        per_modem = [stats['completed'] for stats in fleet.stats().values()]
+
+    return {
+        'modems': modem_count,
+        'messages': total,
+        'elapsed_s': elapsed,
+        'messages_per_s': total / elapsed,
+        'min_per_modem': min(per_modem),
+        'max_per_modem': max(per_modem),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modems", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--messages", type=int, default=20, help="SMS par modem")
+    parser.add_argument("--latency", type=float, default=0.02, help="latence simulée par commande (s)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    baseline = None
+    print(f"{'modems':>6} {'SMS':>6} {'durée':>9} {'SMS/s':>9} {'accélération':>13}")
+    for count in args.modems:
+        r = run(count, args.messages, args.latency)
+        baseline = baseline or r['messages_per_s'] / count
+        r['speedup'] = r['messages_per_s'] / baseline
+        results[f'fleet.send_sms[{count}]'] = r
+        print(f"{count:>6} {r['messages']:>6} {r['elapsed_s']:>8.2f}s {r['messages_per_s']:>9.1f} "
+              f"{r['speedup']:>12.1f}x")
+
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
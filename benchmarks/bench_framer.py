@@ -0,0 +1,124 @@
+"""
+Coût CPU et mémoire du traitement d'une réponse : ancien enchaînement decode / replace("OK") /
+clean_message contre le ResponseFramer (lignes découpées sur les octets, décodage à la demande).
+Trois niveaux sont comparés : mise en forme seule (clean_message / format_response d'une réponse
+déjà découpée), découpage et mise en forme (framer), et lecture complète sur un port série
+loop:// (ancien read_until(b"OK\r\n") octet par octet / ResponseReader).
+
+Usage :
+    python benchmarks/bench_framer.py [--sms 255] [--json f.json]
+"""
+import argparse
+import tracemalloc
+
+import serial
+
+from common import measure, print_results, write_results
+
+from ResponseReader import ResponseFramer, ResponseReader
+from SIM7600Cmd import SIM7600Cmd
+
+
+def build_responses(sms_count):
+    listing = "".join(f'+CMGL: {i},"REC READ","+33612345678","","24/10/18,10:15:00+08"\r\n'
+                      f'Message {i} : rendez-vous OK pour demain\r\n' for i in range(1, sms_count + 1))
+    return {
+        'csq': b'AT+CSQ\r\r\n+CSQ: 20,99\r\n\r\nOK\r\n',
+        'cpsi': b'AT+CPSI?\r\r\n+CPSI: LTE,Online,208-01,0x1A2B,26853377,262,EUTRAN-BAND3,1300,5,5,-94,-1087,'
+                b'-794,12\r\n\r\nOK\r\n',
+        f'cmgl[{sms_count}]': f'AT+CMGL="ALL"\r\r\n{listing}\r\nOK\r\n'.encode(),
+    }
+
+
+def legacy(data):
+    response = data.decode('utf-8', errors='ignore')
+    response = response.replace("OK", "")
+    return SIM7600Cmd.clean_message(response)
+
+
+# Comme dans ResponseReader, le framer est réutilisé d'une réponse à l'autre
+FRAMER = ResponseFramer()
+
+
+def framed(data):
+    FRAMER.feed(data)
+    return SIM7600Cmd.format_response(FRAMER.pop_response())
+
+
+def framed_field(data):
+    # Lecture d'un seul champ : seule la ligne demandée est décodée
+    FRAMER.feed(data)
+    return FRAMER.pop_response().line_with("+C")
+
+
+def formatter(data):
+    """Mise en forme seule : format_response d'une réponse déjà découpée."""
+    FRAMER.feed(data)
+    response = FRAMER.pop_response()
+    return lambda: SIM7600Cmd.format_response(response)
+
+
+def serial_paths(data):
+    """Lecture complète d'une réponse écrite sur un port loop:// : ancien read_response et ResponseReader."""
+    port = serial.serial_for_url("loop://", timeout=1, do_not_open=True)
+    # La file du port loop:// doit contenir toute la réponse : elle est écrite avant d'être lue
+    port.buffer_size = len(data)
+    port.open()
+    reader = ResponseReader(port)
+
+    def read_until():
+        port.write(data)
+        return legacy(port.read_until(b"OK\r\n"))
+
+    def response_reader():
+        port.write(data)
+        return SIM7600Cmd.format_response(reader.read())
+
+    return read_until, response_reader
+
+
+def peak_bytes(func, data):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(data)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sms", type=int, default=255, help="SMS dans la réponse AT+CMGL")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, data in build_responses(args.sms).items():
+        number = 200 if len(data) > 4096 else 20000
+        for label, func in (('clean_message', legacy), ('framer', framed), ('framer.line_with', framed_field)):
+            r = measure(lambda: func(data), number=number)
+            r['response_bytes'] = len(data)
+            r['peak_bytes'] = peak_bytes(func, data)
+            results[f'{name}.{label}'] = r
+        r = measure(formatter(data), number=number)
+        r['response_bytes'] = len(data)
+        results[f'{name}.format_response'] = r
+        # read_until lit un octet par appel : quelques itérations suffisent pour une longue liste
+        for label, func in zip(('serial.read_until', 'serial.ResponseReader'), serial_paths(data)):
+            r = measure(func, number=max(number // 100, 2))
+            r['response_bytes'] = len(data)
+            results[f'{name}.{label}'] = r
+
+    print_results(results)
+    print(f"\n{'réponse':<40} {'octets':>8} {'pic mémoire':>12}")
+    for name, r in results.items():
+        if 'peak_bytes' in r:
+            print(f"{name:<40} {r['response_bytes']:>8} {r['peak_bytes']:>12}")
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
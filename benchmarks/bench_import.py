@@ -0,0 +1,101 @@
+"""
+Coût d'import du paquet mesuré avec `python -X importtime`, dans un interpréteur neuf.
+
+Usage :
+    python benchmarks/bench_import.py [--runs 5] [--budget-ms 80] [--json f.json]
+
+Le code de sortie vaut 1 si un import dépasse le budget (médiane), ou si l'import
+modifie la configuration du logging ou charge une dépendance optionnelle lourde.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from common import ROOT, write_results
+
+# Instruction d'import -> budget relatif (multiplicateur de --budget-ms)
+TARGETS = {
+    'import SIM7600': 0.5,
+    'from SIM7600 import SIM7600Cmd': 1.0,
+    'from SIM7600 import SIM7600SMS': 1.0,
+    'from SIM7600 import SIM7600Voice': 1.0,
+}
+
+# Modules qui ne doivent jamais être chargés par les imports ci-dessus
+HEAVY_MODULES = ('paho', 'pyaudio', 'vlc', 'gtts', 'asyncio', 'http.server', 'colorlog')
+
+CHECK = ("import json, logging, sys; root = logging.getLogger(); "
+         "print(json.dumps([len(root.handlers), root.level, [m for m in {heavy!r} if m in sys.modules]]))")
+
+
+def import_time(statement):
+    """Temps cumulé (µs) des modules importés au premier niveau par l'instruction."""
+    # Les modules chargés au démarrage de l'interpréteur (site, encodings) ne sont pas comptés
+    startup = {name for _, name in _top_level(_run_importtime('pass'))}
+    modules = [(us, name) for us, name in _top_level(_run_importtime(statement)) if name not in startup]
+    return sum(us for us, _ in modules), sorted(modules, reverse=True)
+
+
+def _run_importtime(statement):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                          capture_output=True, text=True, check=True).stderr
+
+
+def _top_level(report):
+    """(temps cumulé en µs, module) des imports de premier niveau d'un rapport -X importtime."""
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            yield int(cumulative), name.strip()
+
+
+def side_effects(statement):
+    check = CHECK.format(heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', f"{statement}; {check}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=80.0)
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results, failures = {}, []
+    print(f"{'import':<40} {'médiane':>9} {'budget':>8}  principaux modules")
+    for statement, factor in TARGETS.items():
+        runs = [import_time(statement) for _ in range(args.runs)]
+        median_us = statistics.median(total for total, _ in runs)
+        top = ", ".join(f"{name} {us / 1000:.1f}" for us, name in runs[-1][1][:3])
+        budget = args.budget_ms * factor
+        handlers, level, heavy = side_effects(statement)
+        results[f'import[{statement}]'] = {
+            'median_s': median_us / 1e6,
+            'budget_s': budget / 1000,
+            'root_handlers': handlers,
+            'root_level': level,
+            'heavy_modules': heavy,
+        }
+        print(f"{statement:<40} {median_us / 1000:>7.1f}ms {budget:>6.0f}ms  {top}")
+        if median_us / 1000 > budget:
+            failures.append(f"{statement}: {median_us / 1000:.1f}ms > {budget:.0f}ms")
+        if handlers or level != 30:
+            failures.append(f"{statement}: configuration du logging modifiée à l'import")
+        if heavy:
+            failures.append(f"{statement}: modules lourds chargés à l'import ({', '.join(heavy)})")
+
+    if args.json:
+        write_results(args.json, results)
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
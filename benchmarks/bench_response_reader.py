@@ -0,0 +1,90 @@
+"""
+Mesure la latence de lecture d'une réponse AT : ancienne lecture read_until(b"OK\r\n")
+contre le ResponseReader qui s'arrête sur tout code de résultat final.
+
+Usage : python benchmarks/bench_response_reader.py [--rounds N] [--json fichier]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SIM7600'))
+
+from ResponseReader import ResponseReader  # noqa: E402
+from SIM7600Simulator import SIM7600Simulator  # noqa: E402
+
+SMS_COMMAND = 'AT+CMGS="+33600000000"'
+
+# (scénario, commande, erreur injectée)
+SCENARIOS = (
+    ("OK", "AT+CSQ", None),
+    ("ERROR", "AT+CSQ", "ERROR"),
+    ("+CME ERROR", "AT+CPIN?", "+CME ERROR: 10"),
+    ("+CMS ERROR", SMS_COMMAND, "+CMS ERROR: 302"),
+    ("prompt >", SMS_COMMAND, None),
+)
+
+
+def legacy_read(conn, command):
+    conn.write((command + "\r\n").encode())
+    return conn.read_until(b"OK\r\n")
+
+
+def framed_read(conn, reader, command):
+    conn.write((command + "\r\n").encode())
+    return reader.read(timeout=conn.timeout, expect_prompt=True)
+
+
+def run(rounds, timeout, latency):
+    results = []
+    for name, command, error in SCENARIOS:
+        simulator = SIM7600Simulator(latency=latency)
+        if error:
+            simulator.inject_error(command, error, times=None)
+        conn = simulator.serial(timeout=timeout)
+        reader = ResponseReader(conn)
+        for label, func in (("read_until", lambda: legacy_read(conn, command)),
+                            ("ResponseReader", lambda: framed_read(conn, reader, command))):
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                func()
+                samples.append(time.perf_counter() - start)
+                if name == "prompt >":
+                    # Annule la saisie du SMS (ESC) pour revenir en mode commande
+                    conn.write(b"\x1b")
+                    reader.read(timeout=timeout)
+                reader.reset()
+                conn.reset_input_buffer()
+            samples.sort()
+            results.append({
+                "scenario": name,
+                "reader": label,
+                "rounds": rounds,
+                "median_ms": samples[len(samples) // 2] * 1000,
+                "max_ms": samples[-1] * 1000,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=2.0, help="délai du port série simulé (s)")
+    parser.add_argument("--latency", type=float, default=0.005, help="latence du modem simulé (s)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = run(args.rounds, args.timeout, args.latency)
+    print(f"{'scénario':<12} {'lecteur':<16} {'médiane (ms)':>13} {'max (ms)':>10}")
+    for r in results:
+        print(f"{r['scenario']:<12} {r['reader']:<16} {r['median_ms']:>13.1f} {r['max_ms']:>10.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
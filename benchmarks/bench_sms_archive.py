@@ -0,0 +1,78 @@
+"""
+Archive SQLite des SMS (SmsArchive) : débit d'insertion par lots, insertion message par
+message (batch_size=1), relecture dédupliquée, puis latence des recherches indexées
+(50 derniers messages d'un numéro, envoi par référence) sur une archive de --rows messages.
+
+Usage :
+    python benchmarks/bench_sms_archive.py [--rows 1000000] [--db archive.db] [--json f.json]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import measure, print_results, write_results
+
+from SmsArchive import DIRECTION_IN, SmsArchive
+
+IMEI = "861234567890123"
+PHONES = 10000
+START = 1.7e9
+
+
+def fill(archive, rows, offset=0):
+    """Ajoute rows SMS reçus, répartis sur PHONES numéros, un par minute."""
+    for i in range(offset, offset + rows):
+        archive.add(DIRECTION_IN, f"+336{i % PHONES:08d}", f"Message {i} : rendez-vous à {i % 24}h",
+                    START + 60 * i, i % 255, "REC READ")
+    archive.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="messages dans l'archive")
+    parser.add_argument("--db", help="fichier de l'archive (temporaire par défaut)")
+    parser.add_argument("--repeat", type=int, default=5, help="séries de mesure")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    path = args.db or os.path.join(directory.name, "archive.db")
+    results = {}
+    with SmsArchive(path, IMEI, batch_size=5000) as archive:
+        started = time.perf_counter()
+        fill(archive, args.rows)
+        elapsed = time.perf_counter() - started
+        print(f"{args.rows} SMS insérés en {elapsed:.1f} s ({args.rows / elapsed:.0f} SMS/s)")
+
+        sample = min(args.rows, 2000)
+        single = SmsArchive(os.path.join(directory.name, "single.db"), IMEI, batch_size=1)
+        results[f'insert.batch_size=1[{sample}]'] = measure(lambda: fill(single, sample, len(single)),
+                                                            repeat=args.repeat)
+        single.close()
+        batched = SmsArchive(os.path.join(directory.name, "batched.db"), IMEI, batch_size=5000)
+        results[f'insert.batch_size=5000[{sample}]'] = measure(lambda: fill(batched, sample, len(batched)),
+                                                               repeat=args.repeat)
+        batched.close()
+        # Relecture de la carte SIM : tous les messages sont des doublons
+        results[f'insert.duplicates[{sample}]'] = measure(lambda: fill(archive, sample), repeat=args.repeat)
+        assert archive.inserted == args.rows
+
+        phones = [f"+336{i:08d}" for i in range(0, PHONES, PHONES // 100)]
+        results['last_from(50)'] = measure(lambda: [archive.last_from(phone) for phone in phones],
+                                           repeat=args.repeat)
+        results['last_from(50)']['per_lookup_s'] = results['last_from(50)']['median_s'] / len(phones)
+        archive.add_sent("+33600000042", "Réponse", [17, 18])
+        results['find_by_reference'] = measure(lambda: archive.find_by_reference(18), number=1000,
+                                               repeat=args.repeat)
+
+    print_results(results)
+    print(f"recherche des 50 derniers messages d'un numéro : "
+          f"{results['last_from(50)']['per_lookup_s'] * 1e3:.3f} ms")
+    if args.json:
+        write_results(args.json, results)
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
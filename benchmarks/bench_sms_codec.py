@@ -0,0 +1,86 @@
+"""
+Décodage du texte des SMS en mode texte : heuristique d'origine (is_hexadecimal_and_printable,
+expression régulière, décodage UTF-8, test de string.printable, puis décodage UTF-16) contre
+SmsCodec (format déduit de AT+CSCS/AT+CSMP), message par message et par boîte entière.
+Le nombre de messages que l'heuristique restitue exactement est aussi affiché.
+
+Usage :
+    python benchmarks/bench_sms_codec.py [--messages 5000] [--json f.json]
+"""
+import argparse
+import re
+import string
+
+from common import measure, print_results, write_results
+
+from SmsCodec import CHARSET_GSM, CHARSET_UCS2, SmsCodec, encode_ucs2
+import SMSPdu
+
+TEXTS = (
+    "Votre code de confirmation est 482913",
+    "Rendez-vous demain à 10h devant la gare, n'oubliez pas les billets !",
+    "Встреча завтра в 10 часов у вокзала 🚉",
+    "Réunion à 10h — confirmé ✅",
+    "Colis livré au point relais, retrait avant le 25/10.",
+)
+
+
+def is_hexadecimal_and_printable(hex_str):
+    # Heuristique remplacée par SmsCodec, conservée ici comme référence
+    hex_str = hex_str.replace(" ", "")
+    if re.match(r'^[0-9A-Fa-f]+$', hex_str):
+        try:
+            decoded_str = bytes.fromhex(hex_str).decode('utf-8', errors='ignore')
+            return all(c in string.printable for c in decoded_str)
+        except ValueError:
+            return False
+    return False
+
+
+def legacy_decode_content(content_hex):
+    if is_hexadecimal_and_printable(content_hex):
+        return bytes.fromhex(content_hex).decode('utf-16-be', errors='ignore')
+    return content_hex
+
+
+def inbox(count, charset):
+    """Textes et corps des messages tels qu'affichés par AT+CMGL dans le jeu de caractères charset."""
+    texts = [f"{TEXTS[i % len(TEXTS)]} ({i})" for i in range(count)]
+    if charset == CHARSET_UCS2:
+        return texts, [encode_ucs2(text) for text in texts]
+    texts = [text for text in texts if SMSPdu.is_gsm7(text)]
+    if charset == CHARSET_GSM:
+        return texts, [SMSPdu.gsm7_encode(text).decode('latin-1') for text in texts]
+    return texts, list(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000, help="messages par boîte de réception")
+    parser.add_argument("--repeat", type=int, default=5, help="séries de mesure")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = {}
+    exact = {}
+    for charset in ("IRA", CHARSET_UCS2, CHARSET_GSM):
+        texts, bodies = inbox(args.messages, charset)
+        codec = SmsCodec(charset)
+        assert codec.decode_many(bodies) == [codec.decode(body) for body in bodies] == texts
+        label = f"{charset}[{len(bodies)}]"
+        exact[label] = sum(legacy_decode_content(body) == text for body, text in zip(bodies, texts))
+        results[f'legacy.decode_content.{label}'] = measure(
+            lambda: [legacy_decode_content(body) for body in bodies], repeat=args.repeat)
+        results[f'codec.decode.{label}'] = measure(
+            lambda: [codec.decode(body) for body in bodies], repeat=args.repeat)
+        results[f'codec.decode_many.{label}'] = measure(lambda: codec.decode_many(bodies), repeat=args.repeat)
+
+    print_results(results)
+    for label, count in exact.items():
+        print(f"messages exacts avec l'heuristique, {label:<12} {count}")
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Débit du codec PDU (SMSPdu) : encodage SMS-SUBMIT, décodage SMS-DELIVER et réassemblage
+des messages concaténés, par alphabet. Le décodage d'une entrée en mode texte
+(SIM7600SMS.parse_sms_line) sert de référence.
+
+Usage :
+    python benchmarks/bench_sms_pdu.py [--number 5000] [--json f.json]
+"""
+import argparse
+
+from common import measure, print_results, write_results
+
+import SMSPdu
+from SIM7600SMS import SIM7600SMS
+
+NUMBER = "+33612345678"
+
+MESSAGES = {
+    'gsm7': "Rendez-vous demain à 10h devant la gare, n'oubliez pas les billets {ref 42} !",
+    'ucs2': "Встреча завтра в 10 часов у вокзала 🚉",
+    '8bit': bytes(range(120)),
+    'gsm7.concat[3]': "Compte rendu de la réunion : budget validé, livraison € 1200. " * 6,
+    'ucs2.concat[3]': "Réunion à 10h — confirmé ✅ " * 6,
+}
+
+TEXT_ENTRY = (': 1,"REC READ","+33612345678","","24/10/18,10:15:00+08" '
+              + "0052006500750020006E0069006F006E002000E000200031003000680020")
+
+
+def reassemble(pdus):
+    reassembler = SMSPdu.ConcatenatedMessages()
+    message = None
+    for index, pdu in enumerate(pdus):
+        message = reassembler.add(SMSPdu.decode_pdu(pdu), index) or message
+    return message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=5000, help="appels par série")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, message in MESSAGES.items():
+        deliver = SMSPdu.encode_deliver(NUMBER, message)
+        assert reassemble(deliver).complete
+        results[f'encode_submit.{name}'] = measure(lambda: SMSPdu.encode_submit(NUMBER, message),
+                                                   number=args.number)
+        results[f'decode_pdu.{name}'] = measure(lambda: [SMSPdu.decode_pdu(pdu) for pdu in deliver],
+                                                number=args.number)
+        if len(deliver) > 1:
+            results[f'reassemble.{name}'] = measure(lambda: reassemble(deliver), number=args.number)
+    results['text_mode.parse_sms_line'] = measure(lambda: SIM7600SMS.parse_sms_line(TEXT_ENTRY),
+                                                  number=args.number)
+
+    print_results(results)
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
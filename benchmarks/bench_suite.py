@@ -0,0 +1,137 @@
+"""
+Suite de benchmarks du transport AT, des parseurs et des chemins SMS/GPS.
+
+Usage :
+    python benchmarks/bench_suite.py [--quick] [--json resultats.json] [--compare reference.json]
+
+Les résultats JSON peuvent être conservés à chaque version et comparés avec --compare
+(code de sortie 1 si une médiane régresse de plus de --threshold).
+"""
+import argparse
+import logging
+import sys
+
+from common import measure, write_results, compare, print_results
+
+from NMEParser import NMEParser
+import ResponseParsers
+from SIM7600Cmd import SIM7600Cmd
+from SIM7600SMS import SIM7600SMS
+from SIM7600Simulator import SIM7600Simulator, NMEA_SENTENCES
+
+CREG_RESPONSE = 'AT+CREG? +CREG: 2,1,"1A2B","01A2D001"'
+CEREG_RESPONSE = 'AT+CEREG? +CEREG: 2,1,"1A2B","01A2D001",7'
+CPSI_LINE = '+CPSI: LTE,Online,208-01,0x1A2B,27447297,302,EUTRAN-BAND3,1300,5,5,-94,-1017,-730,11'
+RAW_RESPONSE = 'AT+CSQ\r\r\n+CSQ: 20,99\r\n\r\nOK\r\n'
+
+
+def bench_transport(results, quick):
+    simulator = SIM7600Simulator(latency=0.0)
+    modem = simulator.attach(SIM7600Cmd("sim"))
+    modem.set_echo_command(False)
+    number = 200 if quick else 2000
+    results['transport.send_command(AT+CSQ)'] = measure(lambda: modem.send_command('AT+CSQ'), number=number)
+    results['transport.execute_command(AT)'] = measure(lambda: modem.execute_command('AT'), number=number)
+    results['transport.send_batch(status)'] = measure(
+        lambda: modem.send_batch(['AT+CREG?', 'AT+CEREG?', 'AT+CSQ', 'AT+COPS?', 'AT+CNMP?']), number=number // 4)
+
+
+def bench_parsers(results, quick):
+    number = 10000 if quick else 100000
+    modem = SIM7600Cmd("sim")
+    results['parser.clean_message'] = measure(lambda: modem.clean_message(RAW_RESPONSE.replace("OK", "")),
+                                              number=number)
+    results['parser._parse_creg_response'] = measure(lambda: modem._parse_creg_response(CREG_RESPONSE),
+                                                     number=number)
+    results['parser._parse_cereg_response'] = measure(
+        lambda: modem._parse_cereg_response(CEREG_RESPONSE.replace(",7", "")), number=number)
+    results['parser.parse_signal_quality'] = measure(lambda: modem.parse_signal_quality('+CSQ: 20,99'),
+                                                     number=number)
+    results['parser.registry(+CEREG)'] = measure(
+        lambda: ResponseParsers.parse_line('+CEREG: 2,1,"1A2B","01A2D001",7'), number=number)
+    results['parser.registry(+CPSI)'] = measure(lambda: ResponseParsers.parse_line(CPSI_LINE), number=number)
+
+
+def bench_read_sms(results, quick):
+    sizes = (1, 30, 255) if quick else (1, 10, 30, 100, 255)
+    for size in sizes:
+        simulator = SIM7600Simulator(latency=0.0)
+        for i in range(size):
+            simulator.add_sms("+33612345678", f"Message numero {i} du lot de test", status="REC READ")
+        sms = simulator.attach(SIM7600SMS("sim"))
+        sms.set_echo_command(False)
+        sms.card_is_ready = True
+        results[f'sms.read_sms[{size}]'] = measure(sms.read_sms, number=5 if quick else 20)
+
+
+# Corps de SMS piégeux pour la lecture en flux : lignes vides, CR LF, codes finaux et en-têtes dans le texte
+LISTING_TEXTS = ("Hello\n\nWorld", "A\r\nB", "\ndébut", "fin\n\n", "OK", "x\r\nOK",
+                 '+CMGL: 1,"REC READ","+33600000000","","24/10/18,10:15:00+08",145,3', "simple")
+
+
+def check_sms_listing():
+    """
+    Vérifie que read_sms et stream_sms restituent ces corps, sur les deux transports : exactement
+    en UCS2, et avec des sauts de ligne '\n' lorsque le texte est lu brut (read_charset=None).
+    """
+    for urc_reader in (False, True):
+        for charset in (None, "UCS2"):
+            expected = [text if charset else text.replace("\r\n", "\n") for text in LISTING_TEXTS]
+            simulator = SIM7600Simulator(latency=0.0)
+            for text in LISTING_TEXTS:
+                simulator.add_sms("+33612345678", text, status="REC READ")
+            sms = simulator.attach(SIM7600SMS("sim"))
+            sms.set_echo_command(False)
+            sms.card_is_ready = True
+            sms.read_charset = charset
+            if urc_reader:
+                sms.start_urc_reader()
+            for method in (sms.read_sms, sms.stream_sms):
+                contents = [message['content'] for message in method()]
+                assert contents == expected, (method.__name__, urc_reader, charset, contents)
+            sms.stop_urc_reader()
+
+
+def bench_nmea(results, quick):
+    count = 100000 if quick else 1000000
+    log = [NMEA_SENTENCES[i % len(NMEA_SENTENCES)].split('*')[0] for i in range(count)]
+    parser = NMEParser()
+
+    def parse_log():
+        for sentence in log:
+            parser.parse(sentence)
+
+    measurement = measure(parse_log, number=1, repeat=3)
+    measurement['sentences'] = count
+    measurement['sentences_per_s'] = count / measurement['median_s']
+    results[f'nmea.parse[{count}]'] = measurement
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="tailles réduites pour un contrôle rapide")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier JSON")
+    parser.add_argument("--compare", help="fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.10, help="régression tolérée (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    # Les journaux par commande faussent les mesures
+    logging.disable(logging.CRITICAL)
+
+    check_sms_listing()
+    results = {}
+    for bench in (bench_transport, bench_parsers, bench_read_sms, bench_nmea):
+        bench(results, args.quick)
+
+    print_results(results)
+    if args.json:
+        write_results(args.json, results)
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Outils communs aux scripts de benchmark : chemins, mesure et export JSON des résultats."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Les modules du paquet s'importent entre eux par leur nom de fichier
+for path in (os.path.join(ROOT, 'SIM7600'), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def measure(func, number=1, repeat=5):
+    """
+    Exécute func `number` fois par série, sur `repeat` séries.
+
+    Returns:
+        dict: temps par appel (médiane, min, max en secondes) et débit (appels/s).
+    """
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number)
+    median = statistics.median(per_call)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'median_s': median,
+        'min_s': min(per_call),
+        'max_s': max(per_call),
+        'ops_per_s': 1.0 / median if median else float('inf'),
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'commit': commit,
+    }
+
+
+def write_results(path, results):
+    """Écrit les résultats au format JSON : {"metadata": {...}, "results": {nom: mesure}}."""
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+
+
+def compare(baseline_path, results, threshold=0.10):
+    """Compare les médianes à un fichier de référence et retourne les régressions au-delà du seuil."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference.get('median_s'):
+            continue
+        ratio = current['median_s'] / reference['median_s']
+        print(f"{name:<40} {ratio:>6.2f}x")
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<40} {'médiane':>12} {'op/s':>14}")
+    for name, r in results.items():
+        print(f"{name:<40} {r['median_s'] * 1e6:>10.1f}µs {r['ops_per_s']:>14,.0f}")